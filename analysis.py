@@ -0,0 +1,413 @@
+"""
+analysis.py
+Exact error detection properties of CRC generators, computed from their syndromes instead of sampled.
+Where simulate.py estimates detection rates and injecterror.undetectable_error builds one undetected
+pattern (the generator itself), this counts every undetected error pattern of low weight.
+Usage:
+    python analysis.py [--bits N] [--max-weight W] [--polynomials ...]
+    python analysis.py --search WIDTH [--bits N] [--max-weight W] [--top K] [--parity] [--sample N] [--processes N]
+Functions:
+    first_undetected(polynomial: str, weight: int, max_length: int) -> int | None
+        Shortest codeword length with an undetected error pattern of the given weight.
+    hamming_distances(polynomial: str, max_length: int, max_weight: int = 6) -> list
+        Hamming distance of the code for every codeword length up to max_length.
+    undetected_counts(polynomial: str, nbits: int) -> dict
+        Number of undetected weight-2, 3 and 4 error patterns in an nbits-bit codeword.
+    burst_coverage(polynomial: str, nbits: int, length: int) -> dict
+        Number and fraction of detected bursts of the given length.
+    analyze(polynomial: str, nbits: int, max_weight: int = 6) -> dict
+        All of the above for one generator and codeword length.
+    candidates(width: int, parity: bool = False, sample: int = None, seed: int = 0) -> list
+        Generators of one degree to search, one of every reciprocal pair.
+    search(width: int, nbits: int, max_weight: int = 6, top: int = 10, parity: bool = False, sample: int = None,
+           processes: int = 1, seed: int = 0) -> list
+        Ranks the generators of one degree by Hamming distance at a codeword length.
+How it works:
+    The CRC is linear and has no initial value or final XOR, so an error pattern is missed exactly when the
+    XOR of the syndromes x^i mod G (crc.syndromes) of its flipped bits is 0; no codeword is ever built.
+    - Undetected patterns are shift invariant (for generators with a constant term), so the shortest one of
+      weight w can be taken to start at bit 0 and end at bit m. Growing m one bit at a time, the inner bits are
+      matched meet-in-the-middle: a dictionary of pair XORs covers two of them, so weights up to 5 cost O(n^2)
+      and weight 6 O(n^3), searched only up to the length where a lower weight already appeared.
+    - Weight 2/3/4 counts come from the multiplicities of single syndromes and of pair XORs, O(n^2).
+    - A burst of length b (first and last bits flipped, inner bits arbitrary) is missed exactly when its
+      pattern is a multiple of G, which is counted in closed form.
+    - The search computes each candidate's syndromes with whole-register shifts and XORs of Python ints (all the
+      degree's bits at once). It then looks for undetected patterns of weight 2, 3, ... in turn and stops at the
+      first weight found, which is the distance. Weights 2 and 3 cost O(n) and rule out most generators.
+      Candidates whose distance falls below the top-ranked ones' are dropped without looking further. The
+      reciprocal of a generator (its bits reversed) has the same distances, so only one of each pair is tried.
+      Chunks of candidates go to worker processes, a few ahead, each with the current lowest distance worth ranking.
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import crc
+import framing
+
+def _split_generator(polynomial: str) -> tuple:
+    """Returns (t, G1) with G = x^t * G1 and G1 having a constant term, G1 as an int."""
+    divisor = int(crc.polynomials.get(polynomial, polynomial), 2)
+    t = (divisor & -divisor).bit_length() - 1
+    return t, divisor >> t
+
+def first_undetected(polynomial: str, weight: int, max_length: int, syndromes: list = None):
+    """
+    Finds the shortest codeword length at which some error pattern of the given weight goes undetected.
+    Args:
+        polynomial (str): A key of crc.polynomials or a binary generator string with a constant term.
+        weight (int): Number of flipped bits (>= 2).
+        max_length (int): Longest codeword length to search.
+        syndromes (list, optional): crc.syndromes(polynomial, max_length) if already computed.
+    Returns:
+        int | None: The codeword length in bits, or None if there is no such pattern up to max_length.
+    Notes:
+        - Weight 1 is always detected. The cost grows as max_length^(weight-3) for weights >= 4.
+    """
+    s = syndromes or crc.syndromes(polynomial, max_length)
+    if weight == 2:
+        for m in range(1, max_length):
+            if s[m] == 1:
+                return m + 1
+        return None
+    if weight == 3:
+        seen = set()
+        for m in range(1, max_length):
+            if 1 ^ s[m] in seen:
+                return m + 1
+            seen.add(s[m])
+        return None
+
+    # 0 < a < b < c1 < ... < ck < m, with the pair (a, b) looked up: smallest b per pair XOR value
+    k = weight - 4
+    lowest = {}
+    for m in range(1, max_length):
+        target = 1 ^ s[m]
+        for high in itertools.combinations(range(1, m), k):
+            value = target
+            for c in high:
+                value ^= s[c]
+            b = lowest.get(value)
+            if b is not None and b < (high[0] if high else m):
+                return m + 1
+        sm = s[m]
+        for a in range(1, m):
+            lowest.setdefault(s[a] ^ sm, m)
+    return None
+
+def hamming_distances(polynomial: str, max_length: int, max_weight: int = 6) -> list:
+    """
+    Computes the Hamming distance (HD) of the code for every codeword length up to max_length.
+    The code detects every error pattern of fewer than HD flipped bits.
+    Args:
+        polynomial (str): A key of crc.polynomials or a binary generator string with a constant term.
+        max_length (int): Longest codeword length in bits.
+        max_weight (int, optional): Largest pattern weight searched. Defaults to 6.
+    Returns:
+        list: (hd, longest) tuples in order of decreasing HD: the code has distance hd for codeword lengths up to
+            'longest' bits. An hd of max_weight + 1 means "at least max_weight + 1".
+    """
+    s = crc.syndromes(polynomial, max_length)
+    first = {}
+    limit = max_length
+    for weight in range(2, max_weight + 1):
+        # a weight only sets the distance if it shows up before every lower one
+        length = first_undetected(polynomial, weight, limit, s)
+        if length is not None:
+            first[weight] = length
+            limit = length - 1
+
+    # first lengths shrink as the weight grows; below the shortest one nothing up to max_weight is missed
+    ranges = []
+    hd = max_weight + 1
+    for weight in sorted(first, reverse=True):
+        if first[weight] > 1:
+            ranges.append((hd, first[weight] - 1))
+        hd = weight
+    ranges.append((hd, max_length))
+    return ranges
+
+def undetected_counts(polynomial: str, nbits: int) -> dict:
+    """
+    Counts the undetected error patterns of weight 2, 3 and 4 in an nbits-bit codeword.
+    Args:
+        polynomial (str): A key of crc.polynomials or a binary generator string with a constant term.
+        nbits (int): Codeword length in bits.
+    Returns:
+        dict: weight -> (undetected, total) with total = C(nbits, weight).
+    Notes:
+        - weight 2: pairs with equal syndromes.
+        - weight 3: every pair {i, j} with a third bit of syndrome s_i ^ s_j; each triple is found 3 times.
+        - weight 4: two pairs with equal XOR; each quadruple is found 3 times, and pairs sharing a bit
+          {i, j}, {i, k} match exactly when {j, k} is an undetected weight-2 pattern (nbits - 2 choices of i).
+    """
+    s = crc.syndromes(polynomial, nbits)
+    singles = {}
+    for v in s:
+        singles[v] = singles.get(v, 0) + 1
+    pairs = {}
+    for j in range(nbits):
+        sj = s[j]
+        for i in range(j):
+            v = s[i] ^ sj
+            pairs[v] = pairs.get(v, 0) + 1
+
+    w2 = sum(c * (c - 1) // 2 for c in singles.values())
+    w3 = sum(c * singles.get(v, 0) for v, c in pairs.items()) // 3
+    w4 = (sum(c * (c - 1) // 2 for c in pairs.values()) - w2 * (nbits - 2)) // 3
+    return {
+        2: (w2, math.comb(nbits, 2)),
+        3: (w3, math.comb(nbits, 3)),
+        4: (w4, math.comb(nbits, 4)),
+    }
+
+def burst_coverage(polynomial: str, nbits: int, length: int) -> dict:
+    """
+    Counts the bursts of one length that a generator misses in an nbits-bit codeword.
+    A burst of length b flips its first and last bits and any of the b - 2 bits in between.
+    Args:
+        polynomial (str): A key of crc.polynomials or a binary generator string.
+        nbits (int): Codeword length in bits.
+        length (int): Burst length b, 1 <= b <= nbits.
+    Returns:
+        dict: length, bursts (all bursts of that length), undetected, and coverage (fraction detected).
+    Notes:
+        - With G = x^t * G1 (G1 with a constant term and degree r), the burst x^k * B is missed exactly when
+          k >= t and G1 divides B. B has degree b - 1 and a constant term, so B = G1 * Q with Q of degree
+          b - 1 - r and a constant term: 2^(b - 2 - r) choices if b >= r + 2, one if b = r + 1, none below.
+    """
+    t, g1 = _split_generator(polynomial)
+    r = g1.bit_length() - 1
+    per_position = 1 if length == 1 else 2 ** (length - 2)
+    bursts = (nbits - length + 1) * per_position
+
+    if length - 1 < r or r == 0:
+        missed = 0
+    elif length - 1 == r:
+        missed = 1
+    else:
+        missed = 2 ** (length - 2 - r)
+    undetected = max(0, nbits - length + 1 - t) * missed
+    return {
+        "length": length,
+        "bursts": bursts,
+        "undetected": undetected,
+        "coverage": 1 - undetected / bursts if bursts else 1.0,
+    }
+
+def analyze(polynomial: str, nbits: int, max_weight: int = 6) -> dict:
+    """
+    Runs every analysis for one generator and codeword length.
+    Args:
+        polynomial (str): A key of crc.polynomials or a binary generator string with a constant term.
+        nbits (int): Codeword length in bits.
+        max_weight (int, optional): Largest pattern weight searched for the Hamming distance. Defaults to 6.
+    Returns:
+        dict: polynomial, degree, nbits, distances (hamming_distances), hd (at nbits), counts (undetected_counts),
+            bursts (burst_coverage for lengths degree, degree + 1, degree + 2) and seconds.
+    """
+    start = time.perf_counter()
+    degree = len(crc.polynomials.get(polynomial, polynomial).lstrip("0")) - 1
+    distances = hamming_distances(polynomial, nbits, max_weight)
+    return {
+        "polynomial": polynomial,
+        "degree": degree,
+        "nbits": nbits,
+        "distances": distances,
+        "hd": distances[-1][0],
+        "counts": undetected_counts(polynomial, nbits),
+        "bursts": [burst_coverage(polynomial, nbits, b) for b in (degree, degree + 1, degree + 2) if b <= nbits],
+        "seconds": time.perf_counter() - start,
+    }
+
+SEARCH_CHUNK = 256  # candidates per worker task
+SHORTLIST = 4  # generators kept per one returned, to be ranked by their exact undetected counts
+EXHAUSTIVE_WIDTH = 20  # widest degree searched without --sample
+
+def _reverse(generator: int, width: int) -> int:
+    """Returns the reciprocal of a degree-width generator: its width + 1 bits in reverse order."""
+    return int(format(generator, f'0{width + 1}b')[::-1], 2)
+
+def candidates(width: int, parity: bool = False, sample: int = None, seed: int = 0) -> list:
+    """
+    Lists the generators of one degree to search: leading and constant terms set, and the smaller of every
+    generator and its reciprocal.
+    Args:
+        width (int): Degree of the generators (the CRC width).
+        parity (bool, optional): Only generators divisible by x + 1 (an even number of terms), which detect every
+            odd number of flipped bits. Defaults to False.
+        sample (int, optional): Draw this many distinct random generators instead of listing them all. Defaults to None.
+        seed (int, optional): Seed of the sample. Defaults to 0.
+    Returns:
+        list: The generators as ints, in ascending order.
+    Raises:
+        ValueError: If the width is below 2, or above EXHAUSTIVE_WIDTH without a sample.
+    """
+    if width < 2:
+        raise ValueError(f"width must be at least 2, got {width}")
+    top = (1 << width) | 1
+
+    def canonical(generator):
+        if parity and generator.bit_count() % 2:
+            return None
+        return min(generator, _reverse(generator, width))
+
+    if sample is None:
+        if width > EXHAUSTIVE_WIDTH:
+            raise ValueError(f"{2 ** (width - 1)} generators of degree {width}; search a --sample of them")
+        found = {canonical(top | middle << 1) for middle in range(1 << (width - 1))}
+    else:
+        rng = random.Random(seed)
+        found = set()
+        # distinct candidates there are, at least: half the 2^(width - 1) generators (half again with parity),
+        # a reciprocal pair counting once
+        space = 2 ** (width - 2 - parity)
+        while len(found) < min(sample, space):
+            found.add(canonical(top | rng.getrandbits(width - 1) << 1))
+            found.discard(None)
+    found.discard(None)
+    return sorted(found)
+
+def _evaluate(generators: list, width: int, nbits: int, max_weight: int, floor: int) -> list:
+    """
+    Finds the distance of every generator of a chunk at nbits bits, dropping those below `floor`.
+    Returns:
+        list: (hd, first, generator) for the generators kept, first being the shortest codeword length with an
+            undetected weight-hd pattern (nbits + 1 if hd > max_weight).
+    """
+    kept = []
+    for generator in generators:
+        polynomial = format(generator, 'b')
+        s = crc.syndromes(polynomial, nbits)
+        hd, first = max_weight + 1, nbits + 1
+        for weight in range(2, max_weight + 1):
+            length = first_undetected(polynomial, weight, nbits, s)
+            if length is not None:
+                hd, first = weight, length
+                break
+        if hd >= floor:
+            kept.append((hd, first, generator))
+    return kept
+
+def search(width: int, nbits: int, max_weight: int = 6, top: int = 10, parity: bool = False, sample: int = None,
+           processes: int = 1, seed: int = 0) -> list:
+    """
+    Searches the generators of one degree for the largest Hamming distance at a codeword length.
+    Generators are ranked by distance at nbits, then by the length at which that distance sets in (the longer,
+    the fewer patterns of that weight, as a rule). The best SHORTLIST * top of them are then ranked again by their
+    exact number of undetected patterns of that weight (for distances up to 4), then by fewer terms (a cheaper
+    circuit).
+    Args:
+        width (int): Degree of the generators (the CRC width).
+        nbits (int): Codeword length in bits, e.g. framing.DEFAULT.codeword_bits.
+        max_weight (int, optional): Largest pattern weight searched; a distance of max_weight + 1 means
+            "at least max_weight + 1". Weight 6 costs O(nbits^3) per generator that gets that far. Defaults to 6.
+        top (int, optional): Number of generators returned. Defaults to 10.
+        parity (bool, optional): Only generators divisible by x + 1 (see candidates). Defaults to False.
+        sample (int, optional): Search this many random generators instead of all (see candidates). Defaults to None.
+        processes (int, optional): Worker processes; 1 searches in this process. Defaults to 1.
+        seed (int, optional): Seed of the sample. Defaults to 0.
+    Returns:
+        list: Up to `top` dicts, best first, with polynomial (binary generator string, ready for crc.polynomials),
+            hex (normal form, leading term implied), reciprocal, degree, nbits, hd, first, terms and counts
+            (undetected_counts, for a distance of 4 or less), plus searched and seconds (the same in every dict).
+    """
+    start = time.perf_counter()
+    pool = candidates(width, parity, sample, seed)
+    chunks = [pool[i:i + SEARCH_CHUNK] for i in range(0, len(pool), SEARCH_CHUNK)]
+    ranked = []
+    keep = SHORTLIST * top
+
+    def rank(kept):
+        ranked.extend(kept)
+        ranked.sort(key=lambda r: (-r[0], -r[1], r[2].bit_count(), r[2]))
+        del ranked[keep:]
+
+    def floor():
+        # once the shortlist is full, a candidate has to reach the distance of its last generator
+        return ranked[-1][0] if len(ranked) >= keep else 2
+
+    if processes <= 1:
+        for chunk in chunks:
+            rank(_evaluate(chunk, width, nbits, max_weight, floor()))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            pending = []
+            for chunk in chunks:
+                pending.append(executor.submit(_evaluate, chunk, width, nbits, max_weight, floor()))
+                if len(pending) >= 2 * processes:
+                    rank(pending.pop(0).result())
+            for future in pending:
+                rank(future.result())
+
+    results = []
+    for hd, first, generator in ranked:
+        polynomial = format(generator, 'b')
+        results.append({
+            "polynomial": polynomial,
+            "hex": f"0x{generator & ((1 << width) - 1):0{(width + 3) // 4}x}",
+            "reciprocal": format(_reverse(generator, width), 'b'),
+            "degree": width,
+            "nbits": nbits,
+            "hd": hd,
+            "first": first,
+            "terms": generator.bit_count(),
+            "counts": undetected_counts(polynomial, nbits) if hd <= 4 else None,
+            "searched": len(pool),
+        })
+    results.sort(key=lambda r: (-r["hd"], r["counts"][r["hd"]][0] if r["counts"] else 0, -r["first"], r["terms"]))
+    seconds = time.perf_counter() - start
+    for r in results[:top]:
+        r["seconds"] = seconds
+    return results[:top]
+
+def main():
+    parser = argparse.ArgumentParser(usage="python analysis.py [--bits N] [--max-weight W] [--polynomials ...] | "
+                                           "--search WIDTH [--bits N] [--max-weight W] [--top K] [--parity] [--sample N] [--processes N]")
+    parser.add_argument("--bits", type=int, default=framing.DEFAULT.codeword_bits, help="codeword length in bits")
+    parser.add_argument("--max-weight", type=int, default=6, help="largest error weight searched for the Hamming distance")
+    parser.add_argument("--polynomials", nargs="+", default=list(crc.polynomials))
+    parser.add_argument("--search", type=int, metavar="WIDTH", help="rank every generator of this degree instead")
+    parser.add_argument("--top", type=int, default=10, help="generators listed by --search (default 10)")
+    parser.add_argument("--parity", action="store_true", help="search only generators divisible by x + 1")
+    parser.add_argument("--sample", type=int, help="search this many random generators (needed above degree 20)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of --sample (default 0)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes of --search")
+    args = parser.parse_args()
+
+    if args.search:
+        try:
+            results = search(args.search, args.bits, args.max_weight, args.top, args.parity, args.sample,
+                             args.processes, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+        atleast = lambda hd: f">={hd}" if hd > args.max_weight else f"{hd}"
+        print(f"Degree-{args.search} generators at {args.bits}-bit codewords: {results[0]['searched'] if results else 0} searched "
+              f"(one of each reciprocal pair{', divisible by x+1' if args.parity else ''}) in {results[0]['seconds'] if results else 0:.2f}s")
+        print(f"{'rank':>4} {'hex':>{args.search // 4 + 4}} {'HD':>4} {'HD from':>8} {'terms':>5}  undetected at HD")
+        for i, r in enumerate(results, 1):
+            count = f"{r['counts'][r['hd']][0]} of weight {r['hd']}" if r["counts"] else "-"
+            print(f"{i:>4} {r['hex']:>{args.search // 4 + 4}} {atleast(r['hd']):>4} {r['first'] if r['first'] <= args.bits else '-':>8} "
+                  f"{r['terms']:>5}  {count}")
+        print("\nTo use one, add it to crc.polynomials (its reciprocal is equally good):")
+        for i, r in enumerate(results[:3], 1):
+            print(f'    "CRC-{args.search}/{args.bits}-{i}": "{r["polynomial"]}",')
+        return
+
+    for polynomial in args.polynomials:
+        r = analyze(polynomial, args.bits, args.max_weight)
+        print(f"\n{polynomial} (degree {r['degree']}), {r['nbits']}-bit codewords, {r['seconds']:.2f}s")
+        atleast = lambda hd: f">={hd}" if hd > args.max_weight else f"{hd}"
+        print("  Hamming distance: " + ", ".join(f"HD={atleast(hd)} up to {longest} bits" for hd, longest in r["distances"]))
+        print(f"  Hamming distance at {r['nbits']} bits: {atleast(r['hd'])}")
+        for weight, (undetected, total) in r["counts"].items():
+            print(f"  weight {weight}: {undetected} undetected of {total} patterns ({undetected / total:.3e})")
+        for b in r["bursts"]:
+            print(f"  bursts of length {b['length']}: {b['undetected']} undetected of {b['bursts']} (coverage {b['coverage']:.10f})")
+
+if __name__ == "__main__":
+    main()
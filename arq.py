@@ -0,0 +1,284 @@
+"""
+arq.py
+Sliding-window automatic repeat request (ARQ) on top of the sender/receiver connection.
+Every frame carries a sequence number (see protocol.py); the receiver verifies it as usual and answers with
+an ACK or a NAK, and the sender keeps up to `window` frames in flight, retransmitting on NAK or timeout,
+so corrupted frames are delivered again instead of being lost.
+Modes:
+    gbn    Go-Back-N: ACKs are cumulative; a NAK for the oldest unacknowledged frame, or its timeout,
+           retransmits every frame in flight from that one on.
+    sr     Selective Repeat: every frame is acknowledged on its own; a NAK or a timeout retransmits
+           only the frame concerned.
+    The receiver side is the same for both: it buffers frames that arrive intact ahead of a missing one and
+    replies with the frame's own sequence number and the cumulative next expected one, so a Go-Back-N sender
+    reads the cumulative number and a Selective Repeat sender the individual one.
+Classes:
+    Receiver()
+        Receive window of one connection: turns verified frames into replies and counts deliveries.
+    Window(mode: str, size: int, timeout: float)
+        Send window: tracks frames in flight and decides what to retransmit.
+Functions:
+    send_reliable(s, codewords, encode, mode: str = "sr", window: int = 32, timeout: float = 0.5, end=None) -> dict
+        Sends a stream of codewords over a connected socket until every one is acknowledged.
+Notes:
+    - Sequence numbers are 32-bit and do not wrap around, which bounds a transfer at 2^32 frames.
+    - Frames go over TCP, so they are never lost or reordered; retransmissions are caused by the errors
+      injected into codewords, and timeouts only cover replies that are slow to arrive.
+"""
+import select
+import socket
+import time
+import protocol
+
+MODES = ["gbn", "sr"]
+
+class Receiver:
+    """
+    Receive window of one ARQ connection.
+    Attributes:
+        expected (int): Lowest sequence number not yet received intact; every frame below it was delivered.
+        delivered (int): Frames delivered in order.
+        duplicates (int): Intact frames received again (already delivered or buffered).
+        naks (int): Frames rejected with a NAK.
+        replies (list): Encoded replies not yet sent; the connection handler sends and clears them.
+    """
+
+    def __init__(self):
+        self.expected = 0
+        self.delivered = 0
+        self.duplicates = 0
+        self.naks = 0
+        self.replies = []
+        self._ahead = set()
+
+    def receive(self, seq: int, is_valid: bool):
+        """
+        Records one verified frame and queues the reply to it.
+        Args:
+            seq (int): Sequence number of the frame.
+            is_valid (bool): Verification result (no error detected).
+        """
+        if not is_valid:
+            self.naks += 1
+            self.replies.append(protocol.encode_reply(protocol.NAK, seq, self.expected))
+            return
+        if seq < self.expected or seq in self._ahead:
+            self.duplicates += 1
+        elif seq == self.expected:
+            self.expected += 1
+            self.delivered += 1
+            while self.expected in self._ahead:
+                self._ahead.remove(self.expected)
+                self.expected += 1
+                self.delivered += 1
+        else:
+            self._ahead.add(seq)
+        self.replies.append(protocol.encode_reply(protocol.ACK, seq, self.expected))
+
+class Window:
+    """
+    Send window of one ARQ connection. It does no I/O: callers add frames, feed it the replies and the
+    clock, and transmit the sequence numbers it returns.
+    Attributes:
+        mode (str): "gbn" or "sr".
+        size (int): Maximum number of frames in flight.
+        timeout (float): Seconds without an ACK before a frame is retransmitted.
+        base (int): Oldest unacknowledged sequence number.
+        next_seq (int): Sequence number of the next new frame.
+        frames (int): New frames sent.
+        retransmissions (int): Frames sent again.
+        naks (int): NAKs received.
+        timeouts (int): Retransmissions triggered by a timeout.
+        acked_bits (int): Codeword bits acknowledged.
+    """
+
+    def __init__(self, mode: str, size: int, timeout: float):
+        """
+        Args:
+            mode (str): "gbn" (Go-Back-N) or "sr" (Selective Repeat).
+            size (int): Window size in frames (>= 1).
+            timeout (float): Retransmission timeout in seconds.
+        Raises:
+            ValueError: If the mode is unknown or the size is below 1.
+        """
+        if mode not in MODES:
+            raise ValueError(f"unknown ARQ mode: {mode!r}")
+        if size < 1:
+            raise ValueError(f"window size must be at least 1, got {size}")
+        self.mode = mode
+        self.size = size
+        self.timeout = timeout
+        self.base = 0
+        self.next_seq = 0
+        self.frames = 0
+        self.retransmissions = 0
+        self.naks = 0
+        self.timeouts = 0
+        self.acked_bits = 0
+        self._inflight = {}  # seq -> [codeword, nbits, deadline]
+
+    def can_send(self) -> bool:
+        """True if a new frame fits in the window."""
+        return self.next_seq - self.base < self.size
+
+    def empty(self) -> bool:
+        """True if every frame sent has been acknowledged."""
+        return not self._inflight
+
+    def in_flight(self, seq: int) -> bool:
+        """True if the frame has been sent and not acknowledged yet."""
+        return seq in self._inflight
+
+    def frame(self, seq: int) -> tuple:
+        """Returns (codeword, nbits) of a frame in flight."""
+        codeword, nbits, _ = self._inflight[seq]
+        return codeword, nbits
+
+    def add(self, codeword: bytes, nbits: int, now: float) -> int:
+        """Puts a new frame in flight and returns its sequence number."""
+        seq = self.next_seq
+        self._inflight[seq] = [codeword, nbits, now + self.timeout]
+        self.next_seq += 1
+        self.frames += 1
+        return seq
+
+    def _acknowledge(self, seq: int):
+        entry = self._inflight.pop(seq, None)
+        if entry is not None:
+            self.acked_bits += entry[1]
+
+    def _slide(self, expected: int):
+        """Acknowledges every frame below `expected` (cumulative ACK)."""
+        while self.base < expected:
+            self._acknowledge(self.base)
+            self.base += 1
+
+    def _resend(self, seqs, now: float) -> list:
+        """Restarts the timers of frames about to be retransmitted and returns their sequence numbers."""
+        seqs = [seq for seq in seqs if seq in self._inflight]
+        for seq in seqs:
+            self._inflight[seq][2] = now + self.timeout
+        self.retransmissions += len(seqs)
+        return seqs
+
+    def on_reply(self, kind: int, seq: int, expected: int, now: float) -> list:
+        """
+        Processes one reply from the receiver.
+        Args:
+            kind (int): protocol.ACK or protocol.NAK.
+            seq (int): Sequence number of the frame the reply is about.
+            expected (int): The receiver's next expected sequence number.
+            now (float): Current time.monotonic().
+        Returns:
+            list: Sequence numbers to retransmit, in order.
+        """
+        self._slide(min(expected, self.next_seq))
+        if kind == protocol.ACK:
+            if self.mode == "sr":
+                self._acknowledge(seq)
+                while self.base < self.next_seq and self.base not in self._inflight:
+                    self.base += 1
+            return []
+
+        self.naks += 1
+        if self.mode == "sr":
+            return self._resend([seq], now)
+        # Go-Back-N reacts to the NAK of the oldest frame only; later NAKs of the same round are covered by it
+        if seq != self.base:
+            return []
+        return self._resend(range(self.base, self.next_seq), now)
+
+    def expired(self, now: float) -> list:
+        """Returns the sequence numbers to retransmit because their timer ran out."""
+        if self.mode == "gbn":
+            entry = self._inflight.get(self.base)
+            if entry is None or entry[2] > now:
+                return []
+            seqs = self._resend(range(self.base, self.next_seq), now)
+        else:
+            seqs = self._resend([seq for seq, entry in self._inflight.items() if entry[2] <= now], now)
+        self.timeouts += len(seqs)
+        return seqs
+
+    def next_deadline(self):
+        """Returns the earliest retransmission deadline, or None if nothing is in flight."""
+        if not self._inflight:
+            return None
+        if self.mode == "gbn":
+            return self._inflight[self.base][2]
+        return min(entry[2] for entry in self._inflight.values())
+
+def send_reliable(s: socket.socket, codewords, encode, mode: str = "sr", window: int = 32, timeout: float = 0.5,
+                  end=None) -> dict:
+    """
+    Sends a stream of codewords with ARQ until every one of them is acknowledged, then closes the sending side
+    and waits for the receiver to close the connection.
+    Args:
+        s (socket.socket): The connected socket.
+        codewords (iterable): (codeword, nbits) tuples, e.g. from sender.encode_frames.
+        encode (callable): encode(seq, codeword, nbits) -> bytes, builds the message of one transmission
+            (this is where the sender injects errors, so every retransmission crosses the channel again).
+        mode (str, optional): "gbn" or "sr". Defaults to "sr".
+        window (int, optional): Window size in frames. Defaults to 32.
+        timeout (float, optional): Retransmission timeout in seconds. Defaults to 0.5.
+        end (callable, optional): end(frames) -> bytes, a message sent once every frame is acknowledged,
+            before the sending side is closed (the sender's end message, see protocol.encode_end).
+    Returns:
+        dict: frames, transmissions, retransmissions, naks, timeouts, seconds, retransmission_rate
+            (retransmissions per transmission) and goodput (acknowledged codeword bits per second).
+    Raises:
+        ConnectionError: If the receiver closes the connection before every frame is acknowledged.
+    """
+    state = Window(mode, window, timeout)
+    pending = iter(codewords)
+    exhausted = False
+    inbox = bytearray()
+    resend = []
+    start = time.perf_counter()
+
+    while True:
+        now = time.monotonic()
+        out = [encode(seq, *state.frame(seq)) for seq in resend + state.expired(now) if state.in_flight(seq)]
+        resend = []
+        while not exhausted and state.can_send():
+            item = next(pending, None)
+            if item is None:
+                exhausted = True
+                break
+            seq = state.add(item[0], item[1], now)
+            out.append(encode(seq, *item))
+        if out:
+            s.sendall(b"".join(out))
+        if exhausted and state.empty():
+            break
+
+        deadline = state.next_deadline()
+        readable, _, _ = select.select([s], [], [], None if deadline is None else max(0.0, deadline - time.monotonic()))
+        if readable:
+            data = s.recv(65536)
+            if not data:
+                raise ConnectionError("receiver closed the connection with frames unacknowledged")
+            inbox += data
+            now = time.monotonic()
+            for kind, seq, expected in protocol.read_replies(inbox):
+                resend += state.on_reply(kind, seq, expected, now)
+    seconds = time.perf_counter() - start
+
+    if end is not None:
+        s.sendall(end(state.frames))
+    # let the receiver see the end of the stream, and drain the replies to duplicates until it closes
+    s.shutdown(socket.SHUT_WR)
+    while s.recv(65536):
+        pass
+
+    transmissions = state.frames + state.retransmissions
+    return {
+        "frames": state.frames,
+        "transmissions": transmissions,
+        "retransmissions": state.retransmissions,
+        "naks": state.naks,
+        "timeouts": state.timeouts,
+        "seconds": seconds,
+        "retransmission_rate": state.retransmissions / transmissions if transmissions else 0.0,
+        "goodput": state.acked_bits / seconds if seconds else 0.0,
+    }
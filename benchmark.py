@@ -0,0 +1,573 @@
+"""
+benchmark.py
+Throughput benchmarks for the error detection pipeline.
+Usage:
+    python benchmark.py workers [--method crc] [--polynomial CRC-32] [--size MB] [--max-workers N]
+    python benchmark.py inject [--frames N] [--ber P]
+    python benchmark.py fec [--frames N] [--bers P ...]
+    python benchmark.py frames [--size MB] [--sizes BYTES ...]
+    python benchmark.py suite [--max-size MB] [--cases PATTERN ...] [--min-time S] [--json PATH] [--baseline PATH] [--tolerance F]
+Benchmarks:
+    workers    Codeword generation throughput of sender.encode_frames with 1..N worker processes,
+               over a synthetic '0'/'1' input file held in memory (no socket involved).
+    inject     Error injection throughput of the per-frame string injectors against the batched
+               mask injectors of injecterror.py, on 512-bit frames.
+    fec        Encode/decode throughput of every FEC code next to CRC-32, then the overhead vs retransmission
+               trade-off: over a binary symmetric channel, the share of frames each scheme delivers on the first
+               transmission and the data bits delivered per bit sent, counting a retransmission (as with
+               sender.py --arq sr) for every frame that CRC rejects or FEC cannot correct.
+    frames     Overhead and throughput per frame size (sender.py --frame-size), from 32-byte to 9000-byte jumbo
+               frames, for checksum, CRC and FEC: the share of every binary frame on the wire that is not payload,
+               and the payload MB/s of the sending side (framing, codeword generation, encoding into a send buffer)
+               and of the receiving side (decoding and verifying the frames of that buffer), in this process.
+    suite      Regression suite: every implementation of the building blocks (the '0'/'1' string functions and
+               their packed-bytes counterparts: crc.generate_crc / verify_crc per polynomial, checksum.generate_checksum
+               / verify_checksum, the injecterror functions) and a sender.py -> reciever.py transfer over loopback, at
+               input sizes from 64 bits up to --max-size (100 MB at most). Every case runs in a fresh process, so
+               its peak RSS is its own. Results (ops/s, MB/s of input, peak RSS) are printed and written as JSON with
+               --json; --baseline compares them with an earlier --json file and flags every case that got slower
+               or bigger by more than --tolerance, exiting with status 1.
+Functions:
+    synthetic_input(nbits: int, seed: int = 0) -> bytes
+        Returns nbits random '0'/'1' characters, the format of the sender's input files.
+    bench_workers(method: str, polynomial: str, size_mb: float, max_workers: int) -> list
+        Measures codeword generation for every worker count and returns one result dict per run.
+    bench_inject(frames: int, ber: float) -> list
+        Measures every injector on the same batch of frames and returns one result dict per injector.
+    bench_fec(frames: int) -> list
+        Measures encoding and decoding of full-size frames for CRC-32 and every FEC code.
+    bench_tradeoff(frames: int, bers: list) -> list
+        Sends full-size frames of every scheme through a binary symmetric channel at every bit error rate.
+    bench_frame_sizes(sizes: list, size_mb: float) -> list
+        Measures wire overhead and send/receive throughput of every scheme at every frame size.
+    suite_cases() -> dict
+        Returns the in-process cases of the regression suite, by name.
+    run_suite(names: list, sizes: list, min_time: float, loopback: bool = True) -> list
+        Runs the suite and returns one result dict per case and input size.
+    compare(results: list, baseline: list, tolerance: float) -> list
+        Matches results with a baseline and returns the regressions.
+Notes:
+    - Sizes are in bits of input, i.e. '0'/'1' characters of the sender's input file; MB/s are MB of that input.
+    - Peak RSS needs the resource module (not on Windows); it is None otherwise.
+"""
+import argparse
+import fnmatch
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+import bits
+import checksum
+import crc
+import fec
+import framing
+import injecterror
+import protocol
+import reciever
+import sender
+
+# (method, polynomial) pairs compared by the fec benchmarks: error detection with retransmission, and every FEC code
+FEC_SCHEMES = [("crc", "CRC-32")] + [("fec", code) for code in fec.codes]
+# (method, polynomial) pairs compared by the frame size benchmark
+FRAME_SCHEMES = [("checksum", ""), ("crc", "CRC-10"), ("crc", "CRC-32"), ("fec", "SECDED"), ("fec", "RS-16")]
+FRAME_SIZES = [32, 64, 128, 256, 512, 1500, 4096, 9000]
+# input sizes of the suite in bits ('0'/'1' characters), from one small frame to a 100 MB file
+SUITE_SIZES = [64, 512, 8192, 131072, 1_000_000, 10_000_000, 100_000_000]
+TOLERANCE = 0.25  # relative slowdown (or RSS growth) the suite tolerates against its baseline
+ROUNDS = 3  # timing rounds per measurement; the fastest counts, as in timeit
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def synthetic_input(nbits: int, seed: int = 0) -> bytes:
+    """
+    Builds a synthetic input file.
+    Args:
+        nbits (int): Number of data bits ('0'/'1' characters).
+        seed (int, optional): Seed of the generator. Defaults to 0.
+    Returns:
+        bytes: The file contents.
+    """
+    rng = random.Random(seed)
+    return format(rng.getrandbits(nbits) | (1 << nbits), 'b')[1:].encode("ascii")
+
+def bench_workers(method: str, polynomial: str, size_mb: float, max_workers: int) -> list:
+    """
+    Measures codeword generation throughput for 1..max_workers worker processes.
+    Args:
+        method (str): "checksum" or "crc".
+        polynomial (str): The CRC polynomial (ignored for checksum).
+        size_mb (float): Input size in MB of '0'/'1' characters.
+        max_workers (int): Largest worker count to measure.
+    Returns:
+        list: One dict per worker count with workers, frames, seconds, mb_per_s and speedup over one worker.
+    """
+    data = synthetic_input(int(size_mb * 1e6))
+    results = []
+    for workers in range(1, max_workers + 1):
+        frames = sender.read_frames(io.BytesIO(data), method, polynomial)
+        start = time.perf_counter()
+        count = sum(1 for _ in sender.encode_frames(frames, method, polynomial, workers))
+        seconds = time.perf_counter() - start
+        results.append({
+            "workers": workers,
+            "frames": count,
+            "seconds": seconds,
+            "mb_per_s": len(data) / 1e6 / seconds,
+            "speedup": results[0]["seconds"] / seconds if results else 1.0,
+        })
+    return results
+
+def bench_inject(frames: int, ber: float) -> list:
+    """
+    Measures error injection throughput on a batch of sender-sized frames.
+    Args:
+        frames (int): Number of frames in the batch.
+        ber (float): Bit error rate of the binary symmetric channel injectors.
+    Returns:
+        list: One dict per injector with name, frames, seconds and frames_per_s.
+    """
+    nbits = sender.LAYOUT.codeword_bits
+    data = synthetic_input(nbits * frames).decode("ascii")
+    strings = [data[i:i + nbits] for i in range(0, len(data), nbits)]
+    packed = [bits.to_bytes(s) for s in strings]
+    rng = random.Random(0)
+
+    def per_bit(s):
+        # the string-injector way of emulating a bit error rate: one coin per bit
+        return "".join(str(1 - int(b)) if rng.random() < ber else b for b in s)
+
+    injectors = [
+        ("injecterror (string)", lambda: [injecterror.injecterror(s) for s in strings]),
+        ("injectbursterror (string)", lambda: [injecterror.injectbursterror(s, 17) for s in strings]),
+        ("injectodderror (string)", lambda: [injecterror.injectodderror(s) for s in strings]),
+        ("per-bit BER (string)", lambda: [per_bit(s) for s in strings]),
+        ("ber_masks", lambda: injecterror.apply_masks(packed, injecterror.ber_masks(nbits, frames, ber, rng))),
+        ("burst_masks", lambda: injecterror.apply_masks(packed, injecterror.burst_masks(nbits, frames, 17, rng=rng))),
+        ("gilbert_elliott_masks", lambda: injecterror.apply_masks(
+            packed, injecterror.gilbert_elliott_masks(nbits, frames, 1e-4, 1e-2, ber / 10, 0.2, rng))),
+    ]
+    results = []
+    for name, run in injectors:
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        results.append({"name": name, "frames": frames, "seconds": seconds, "frames_per_s": frames / seconds})
+    return results
+
+def _full_frames(method: str, polynomial: str, frames: int) -> tuple:
+    """Returns (data frames, their bit length, codewords, codeword bit length) of `frames` full-size sender frames."""
+    data = synthetic_input(sender.LAYOUT.payload_bits(method, polynomial) * frames)
+    batch = list(sender.read_frames(io.BytesIO(data), method, polynomial))
+    encoded = sender.encode_batch(method, polynomial, batch)
+    return [bytes(frame) for frame, _ in batch], batch[0][1], [codeword for codeword, _ in encoded], encoded[0][1]
+
+def _receive(method: str, polynomial: str, codewords: list, nbits: int) -> list:
+    """Returns what the receiver makes of every codeword: (accepted, data) with data None for CRC."""
+    if method == "crc":
+        return [(is_valid, None) for is_valid in crc.verify_many(codewords, polynomial, [nbits] * len(codewords))]
+    return [(corrected >= 0, data) for data, _, corrected in fec.decode_many(codewords, polynomial, [nbits] * len(codewords))]
+
+def bench_fec(frames: int) -> list:
+    """
+    Measures encoding and decoding throughput on full-size (sender.LAYOUT) frames.
+    Decoding is timed on intact codewords and on codewords with one flipped bit each, which FEC has to repair.
+    Args:
+        frames (int): Number of frames per measurement.
+    Returns:
+        list: One dict per scheme with method, polynomial, rate (data bits per codeword bit), and encode, decode and
+            decode_error throughput in MB/s of data.
+    """
+    rng = random.Random(0)
+    results = []
+    for method, polynomial in FEC_SCHEMES:
+        data, data_bits, codewords, nbits = _full_frames(method, polynomial, frames)
+        batch = [(frame, data_bits) for frame in data]
+        corrupted = injecterror.apply_masks(codewords, [1 << rng.randrange(nbits) for _ in codewords])
+        timings = {}
+        for name, run in (("encode", lambda: sender.encode_batch(method, polynomial, batch)),
+                          ("decode", lambda: _receive(method, polynomial, codewords, nbits)),
+                          ("decode_error", lambda: _receive(method, polynomial, corrupted, nbits))):
+            start = time.perf_counter()
+            run()
+            timings[name] = frames * data_bits / 8e6 / (time.perf_counter() - start)
+        results.append(dict(method=method, polynomial=polynomial, rate=data_bits / nbits, **timings))
+    return results
+
+def bench_tradeoff(frames: int, bers: list) -> list:
+    """
+    Sends full-size frames of every scheme through a binary symmetric channel, once, at every bit error rate.
+    A frame is delivered if the receiver accepts it with the original data, rejected if CRC detects an error or
+    FEC cannot correct it (it has to be sent again), and undetected if it is accepted with wrong data.
+    Args:
+        frames (int): Number of frames per scheme and bit error rate.
+        bers (list): Bit error rates.
+    Returns:
+        list: One dict per (ber, scheme) with ber, method, polynomial, rate, delivered, rejected, undetected
+            (fractions of the frames), transmissions (expected per frame with retransmission, 1 / (1 - rejected))
+            and efficiency (data bits delivered per bit sent, rate * (1 - rejected)).
+    """
+    rng = random.Random(0)
+    schemes = [(method, polynomial, *_full_frames(method, polynomial, frames)) for method, polynomial in FEC_SCHEMES]
+    results = []
+    for ber in bers:
+        for method, polynomial, data, data_bits, codewords, nbits in schemes:
+            masks = injecterror.ber_masks(nbits, frames, ber, rng)
+            received = _receive(method, polynomial, injecterror.apply_masks(codewords, masks), nbits)
+            delivered = rejected = undetected = 0
+            for (accepted, decoded), mask, frame in zip(received, masks, data):
+                if not accepted:
+                    rejected += 1
+                elif (decoded == frame) if decoded is not None else not mask:
+                    delivered += 1
+                else:
+                    undetected += 1
+            rejected /= frames
+            results.append({
+                "ber": ber,
+                "method": method,
+                "polynomial": polynomial,
+                "rate": data_bits / nbits,
+                "delivered": delivered / frames,
+                "rejected": rejected,
+                "undetected": undetected / frames,
+                "transmissions": 1 / (1 - rejected) if rejected < 1 else float("inf"),
+                "efficiency": data_bits / nbits * (1 - rejected),
+            })
+    return results
+
+def bench_frame_sizes(sizes: list, size_mb: float) -> list:
+    """
+    Measures the cost of every frame size: the wire overhead, and the throughput of sending and receiving the same
+    input in binary frames of that size, with every scheme of FRAME_SCHEMES (no socket involved).
+    Args:
+        sizes (list): Frame sizes in bytes (framing.MIN_FRAME_BYTES to framing.MAX_FRAME_BYTES).
+        size_mb (float): Input size in MB of '0'/'1' characters.
+    Returns:
+        list: One dict per (frame size, scheme) with frame_bytes, method, polynomial, payload_bits, padding_bits,
+            frames, overhead (share of the bits on the wire that are not payload: protocol header, frame header,
+            padding and check field), send_mb_s and receive_mb_s (MB/s of input).
+    """
+    data = synthetic_input(int(size_mb * 1e6))
+    results = []
+    for frame_bytes in sizes:
+        layout = framing.FrameLayout(frame_bytes)
+        for method, polynomial in FRAME_SCHEMES:
+            try:
+                payload_bits = layout.payload_bits(method, polynomial)
+            except ValueError:
+                continue  # the check field does not leave room for a payload
+
+            start = time.perf_counter()
+            buffer = bytearray()
+            pos = 0
+            frames = sender.read_frames(io.BytesIO(data), method, polynomial, layout)
+            for codeword, nbits in sender.encode_frames(frames, method, polynomial, layout=layout):
+                pos = protocol.encode_into(buffer, pos, method, polynomial, 0, codeword, nbits, binary=True)
+            send = time.perf_counter() - start
+
+            start = time.perf_counter()
+            received, _ = protocol.read_frames(buffer, binary=True)
+            valid = sum(reciever.verify_frames(received))
+            receive = time.perf_counter() - start
+            if valid != len(received):
+                raise RuntimeError(f"{len(received) - valid} frames of {frame_bytes} bytes failed {method} {polynomial}")
+
+            wire = 8 * (protocol.HEADER.size + frame_bytes)
+            results.append({
+                "frame_bytes": frame_bytes,
+                "method": method,
+                "polynomial": polynomial,
+                "payload_bits": payload_bits,
+                "padding_bits": layout.padding_bits(method, polynomial),
+                "frames": len(received),
+                "overhead": 1 - payload_bits / wire,
+                "send_mb_s": len(data) / 1e6 / send,
+                "receive_mb_s": len(data) / 1e6 / receive,
+            })
+    return results
+
+def suite_cases() -> dict:
+    """
+    Returns the in-process cases of the regression suite.
+    Returns:
+        dict: name -> prepare, where prepare(data) takes the input as a '0'/'1' string, does the work the case
+            needs done beforehand (packing, generating the codeword to verify) and returns the callable to time.
+    """
+    cases = {}
+    for polynomial in crc.polynomials:
+        width = len(crc.polynomials[polynomial]) - 1
+
+        def generate(d, p=polynomial):
+            return lambda: crc.generate_crc(d, p)
+
+        def verify(d, p=polynomial):
+            codeword = crc.generate_crc(d, p)
+            return lambda: crc.verify_crc(codeword, p)
+
+        def generate_bytes(d, p=polynomial):
+            packed = bits.to_bytes(d)
+            return lambda: crc.generate_crc_bytes(packed, p, len(d))
+
+        def verify_bytes(d, p=polynomial, width=width):
+            codeword = crc.generate_crc_bytes(bits.to_bytes(d), p, len(d))
+            return lambda: crc.verify_crc_bytes(codeword, p, len(d) + width)
+
+        cases[f"crc.generate_crc[{polynomial}]"] = generate
+        cases[f"crc.verify_crc[{polynomial}]"] = verify
+        cases[f"crc.generate_crc_bytes[{polynomial}]"] = generate_bytes
+        cases[f"crc.verify_crc_bytes[{polynomial}]"] = verify_bytes
+
+    def verify_checksum(d):
+        codeword = checksum.generate_checksum(d)
+        return lambda: checksum.verify_checksum(codeword)
+
+    def verify_checksum_bytes(d):
+        codeword = checksum.generate_checksum_bytes(bits.to_bytes(d))
+        return lambda: checksum.verify_checksum_bytes(codeword)
+
+    cases["checksum.generate_checksum"] = lambda d: lambda: checksum.generate_checksum(d)
+    cases["checksum.verify_checksum"] = verify_checksum
+    cases["checksum.generate_checksum_bytes"] = lambda d: (lambda packed=bits.to_bytes(d): checksum.generate_checksum_bytes(packed))
+    cases["checksum.verify_checksum_bytes"] = verify_checksum_bytes
+    cases["injecterror.injecterror"] = lambda d: lambda: injecterror.injecterror(d)
+    cases["injecterror.injectbursterror"] = lambda d: lambda: injecterror.injectbursterror(d, 17)
+    cases["injecterror.injectodderror"] = lambda d: lambda: injecterror.injectodderror(d)
+    cases["injecterror.injecterror_bytes"] = lambda d: (lambda packed=bits.to_bytes(d): injecterror.injecterror_bytes(packed, len(d)))
+    cases["injecterror.injectbursterror_bytes"] = (
+        lambda d: (lambda packed=bits.to_bytes(d): injecterror.injectbursterror_bytes(packed, len(d), 17)))
+    cases["injecterror.injectodderror_bytes"] = (
+        lambda d: (lambda packed=bits.to_bytes(d): injecterror.injectodderror_bytes(packed, len(d))))
+    return cases
+
+# the sender -> receiver transfers of the suite: name -> sender.py arguments after the file
+LOOPBACK_CASES = {
+    "loopback[crc CRC-32 binary]": ["crc", "CRC-32", "--binary"],
+    "loopback[crc CRC-32 text]": ["crc", "CRC-32"],
+}
+
+def _peak_rss_mb(usage) -> float:
+    """Returns ru_maxrss of a resource usage in MB (it is in KB on Linux, in bytes on macOS)."""
+    return usage.ru_maxrss / (1e6 if sys.platform == "darwin" else 1e3)
+
+def _result(case: str, nbits: int, repeat: int, seconds: float, peak_rss_mb) -> dict:
+    return {
+        "case": case,
+        "bits": nbits,
+        "repeat": repeat,
+        "seconds": seconds / repeat,
+        "ops_per_s": repeat / seconds,
+        "mb_per_s": nbits * repeat / 1e6 / seconds,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+def _run_case(name: str, sizes: list, min_time: float) -> list:
+    """
+    Times one in-process case at every size, in ascending order, so the peak RSS read after a size is its own.
+    Every size is timed in ROUNDS rounds of min_time / ROUNDS seconds (one run at least) and the fastest round counts.
+    """
+    prepare = suite_cases()[name]
+    results = []
+    for nbits in sorted(sizes):
+        run = prepare(synthetic_input(nbits).decode("ascii"))
+        best = None
+        for _ in range(ROUNDS):
+            random.seed(0)  # the same error positions every round (the injectors draw from the random module)
+            repeat = 0
+            start = time.perf_counter()
+            while True:
+                run()
+                repeat += 1
+                seconds = time.perf_counter() - start
+                if seconds >= min_time / ROUNDS:
+                    break
+            if best is None or seconds / repeat < best[1] / best[0]:
+                best = (repeat, seconds)
+        peak = _peak_rss_mb(resource.getrusage(resource.RUSAGE_SELF)) if resource else None
+        results.append(_result(name, nbits, *best, peak))
+    return results
+
+def _run_loopback(name: str, sizes: list) -> list:
+    """
+    Sends inputs of every size from sender.py to reciever.py over loopback and times the transfers.
+    Runs in a fresh process: the peak RSS of a child includes that of its parent when it was started.
+    """
+    return [_transfer(name, nbits) for nbits in sorted(sizes)]
+
+def _transfer(name: str, nbits: int) -> dict:
+    """
+    Sends an nbits input from sender.py to reciever.py over loopback, in two processes, and times the transfer
+    from the sender's connection (its "Connected" line) to the receiver's exit, leaving interpreter start-up out.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".txt") as f:
+        for i, start in enumerate(range(0, nbits, 1 << 20)):
+            f.write(synthetic_input(min(1 << 20, nbits - start), seed=i))  # in pieces, to keep this process small
+        f.flush()
+        receiver = subprocess.Popen([sys.executable, "reciever.py", "--connections", "1"], cwd=HERE,
+                                    stdout=subprocess.PIPE, text=True)
+        try:
+            for line in receiver.stdout:
+                if "listening" in line:
+                    break
+            sender_process = subprocess.Popen([sys.executable, "sender.py", f.name] + LOOPBACK_CASES[name], cwd=HERE,
+                                              stdout=subprocess.PIPE, text=True)
+            for line in sender_process.stdout:
+                if line.startswith("Connected"):
+                    break
+            start = time.perf_counter()
+            sender_process.stdout.read()
+            sender_process.stdout.close()
+            _, _, sender_usage = os.wait4(sender_process.pid, 0)
+            sender_process.returncode = 0
+            receiver.stdout.read()
+            _, status, receiver_usage = os.wait4(receiver.pid, 0)
+            receiver.returncode = os.waitstatus_to_exitcode(status)
+            seconds = time.perf_counter() - start
+        finally:
+            if receiver.returncode is None:
+                receiver.kill()
+                receiver.wait()
+    return _result(name, nbits, 1, seconds, max(_peak_rss_mb(sender_usage), _peak_rss_mb(receiver_usage)))
+
+def run_suite(names: list, sizes: list, min_time: float, loopback: bool = True) -> list:
+    """
+    Runs the regression suite, one case at a time, each in a fresh process.
+    Args:
+        names (list): Cases of suite_cases() and LOOPBACK_CASES to run.
+        sizes (list): Input sizes in bits.
+        min_time (float): Seconds to repeat every in-process measurement for (one run at least), over ROUNDS rounds.
+        loopback (bool, optional): Run the loopback transfers of `names` too (they need port PORT free). Defaults to True.
+    Returns:
+        list: One dict per case and size with case, bits, repeat, seconds (per run), ops_per_s, mb_per_s
+            and peak_rss_mb (None without the resource module; for loopback, the larger of sender and receiver).
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1) as pool:
+        for name in names:
+            if name in LOOPBACK_CASES:
+                if loopback:
+                    results.extend(pool.submit(_run_loopback, name, sizes).result())
+            else:
+                results.extend(pool.submit(_run_case, name, sizes, min_time).result())
+    return results
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """
+    Compares suite results with a baseline, matching them by case and size.
+    Args:
+        results (list): Result dicts of run_suite.
+        baseline (list): Result dicts of an earlier run.
+        tolerance (float): Relative change allowed: a case regresses if its MB/s fall below (1 - tolerance) times
+            the baseline's, or its peak RSS grows above (1 + tolerance) times the baseline's.
+    Returns:
+        list: (result, baseline result, reason) for every regression, reason being "throughput" or "memory".
+    """
+    before = {(r["case"], r["bits"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = before.get((r["case"], r["bits"]))
+        if old is None:
+            continue
+        if r["mb_per_s"] < old["mb_per_s"] * (1 - tolerance):
+            regressions.append((r, old, "throughput"))
+        if r["peak_rss_mb"] and old["peak_rss_mb"] and r["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            regressions.append((r, old, "memory"))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(usage="python benchmark.py {workers,inject,fec,frames,suite} [options]")
+    parser.add_argument("benchmark", choices=["workers", "inject", "fec", "frames", "suite"])
+    parser.add_argument("--method", default="crc")
+    parser.add_argument("--polynomial", default="CRC-32")
+    parser.add_argument("--size", type=float, default=20.0, help="input size in MB (workers, frames; default 20)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--frames", type=int, default=20000, help="frames per injector or scheme (inject, fec; default 20000)")
+    parser.add_argument("--ber", type=float, default=1e-3, help="bit error rate (inject, default 0.001)")
+    parser.add_argument("--bers", type=float, nargs="+", default=[1e-5, 1e-4, 1e-3, 3e-3, 1e-2],
+                        help="bit error rates of the trade-off table (fec)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=FRAME_SIZES, help="frame sizes in bytes (frames)")
+    parser.add_argument("--max-size", type=float, default=1.0, help="largest input in MB (suite; default 1, at most 100)")
+    parser.add_argument("--cases", nargs="+", default=["*"], help="case name patterns, e.g. 'crc.*' (suite; default all)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per measurement (suite; default 0.2)")
+    parser.add_argument("--no-loopback", action="store_true", help="skip the sender -> receiver transfers (suite)")
+    parser.add_argument("--json", help="write the results to this file (suite)")
+    parser.add_argument("--baseline", help="compare with the results of an earlier --json file (suite)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help=f"relative slowdown or RSS growth flagged as a regression (suite; default {TOLERANCE})")
+    args = parser.parse_args()
+
+    if args.benchmark == "suite":
+        if args.baseline and not os.path.exists(args.baseline):
+            parser.error(f"no baseline at {args.baseline}: record one on the unchanged tree first, "
+                         f"with python benchmark.py suite --json {args.baseline}")
+        names = [name for name in list(suite_cases()) + list(LOOPBACK_CASES)
+                 if any(fnmatch.fnmatchcase(name, pattern) for pattern in args.cases)]
+        sizes = [nbits for nbits in SUITE_SIZES if nbits <= args.max_size * 1e6]
+        print(f"Regression suite, {len(names)} cases, inputs of {sizes[0]} to {sizes[-1]} bits, Python {platform.python_version()}")
+        print(f"{'case':<42} {'bits':>10} {'ops/s':>12} {'MB/s':>9} {'peak RSS MB':>12}")
+        results = run_suite(names, sizes, args.min_time, not args.no_loopback)
+        for r in results:
+            rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "-"
+            print(f"{r['case']:<42} {r['bits']:>10} {r['ops_per_s']:>12.1f} {r['mb_per_s']:>9.2f} {rss:>12}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"python": platform.python_version(), "platform": platform.platform(),
+                           "cpus": os.cpu_count(), "min_time": args.min_time, "results": results}, f, indent=1)
+        if args.baseline:
+            with open(args.baseline) as f:
+                regressions = compare(results, json.load(f)["results"], args.tolerance)
+            print(f"\n{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+            for r, old, reason in regressions:
+                if reason == "throughput":
+                    print(f"  {r['case']} at {r['bits']} bits: {r['mb_per_s']:.2f} MB/s, was {old['mb_per_s']:.2f}")
+                else:
+                    print(f"  {r['case']} at {r['bits']} bits: peak RSS {r['peak_rss_mb']:.1f} MB, was {old['peak_rss_mb']:.1f}")
+            if regressions:
+                sys.exit(1)
+        return
+
+    if args.benchmark == "frames":
+        print(f"Frame size overhead and throughput, {args.size:g} MB input, binary frames (MB/s of input)")
+        print(f"{'bytes':>6} {'scheme':<9} {'payload':>8} {'pad':>4} {'frames':>8} {'overhead':>9} {'send':>8} {'receive':>8}")
+        for r in bench_frame_sizes(args.sizes, args.size):
+            print(f"{r['frame_bytes']:>6} {r['polynomial'] or r['method']:<9} {r['payload_bits']:>8} {r['padding_bits']:>4} "
+                  f"{r['frames']:>8} {r['overhead']:>9.2%} {r['send_mb_s']:>8.2f} {r['receive_mb_s']:>8.2f}")
+        return
+
+    if args.benchmark == "fec":
+        print(f"Encode/decode throughput, {args.frames} frames of {sender.LAYOUT.codeword_bits} bits (MB/s of data)")
+        print(f"{'scheme':<12} {'rate':>6} {'encode':>8} {'decode':>8} {'decode+1 error':>15}")
+        for r in bench_fec(args.frames):
+            print(f"{r['polynomial']:<12} {r['rate']:>6.3f} {r['encode']:>8.2f} {r['decode']:>8.2f} {r['decode_error']:>15.2f}")
+        print(f"\nOverhead vs retransmission, {args.frames} frames per cell, binary symmetric channel")
+        print(f"{'BER':>8} {'scheme':<12} {'delivered':>10} {'rejected':>9} {'undetected':>11} {'tx/frame':>9} {'efficiency':>11}")
+        for r in bench_tradeoff(args.frames, args.bers):
+            print(f"{r['ber']:>8g} {r['polynomial']:<12} {r['delivered']:>10.4f} {r['rejected']:>9.4f} "
+                  f"{r['undetected']:>11.5f} {r['transmissions']:>9.3f} {r['efficiency']:>11.4f}")
+        return
+
+    if args.benchmark == "inject":
+        print(f"Error injection, {args.frames} frames of {sender.LAYOUT.codeword_bits} bits, BER {args.ber:g}")
+        print(f"{'injector':<26} {'seconds':>8} {'frames/s':>11}")
+        for r in bench_inject(args.frames, args.ber):
+            print(f"{r['name']:<26} {r['seconds']:>8.3f} {r['frames_per_s']:>11.0f}")
+        return
+
+    polynomial = args.polynomial if args.method == "crc" else ""
+    print(f"Codeword generation, {args.method} {polynomial}, {args.size:g} MB input, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'frames':>9} {'seconds':>8} {'MB/s':>8} {'speedup':>8}")
+    for r in bench_workers(args.method, polynomial, args.size, args.max_workers):
+        print(f"{r['workers']:>7} {r['frames']:>9} {r['seconds']:>8.2f} {r['mb_per_s']:>8.2f} {r['speedup']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+bits.py
+This module provides the packed binary representation used by the sender, receiver and the error detection modules.
+A bit string of n bits is stored as the big-endian integer it spells, in ceil(n/8) bytes, left-padded with zero bits.
+Leading zeros change neither the checksum (which pads on the left itself) nor the CRC remainder, so packed data can be
+handed to checksum.py and crc.py as is; the bit length is carried next to the bytes where it matters.
+Functions:
+    to_bytes(bits: str) -> bytes
+        Packs a binary string ('0'/'1' characters) into bytes.
+    to_bits(data: bytes, nbits: int = None) -> str
+        Unpacks bytes into a binary string of nbits characters (the legacy representation).
+    concat(head: bytes, headbits: int, tail: bytes, tailbits: int) -> bytes
+        Packs the concatenation of two packed bit strings.
+    flip(data: bytes, nbits: int, positions) -> bytes
+        Flips the bits at the given positions (0 = leftmost bit of the nbits) and returns the new bytes.
+    extract(data: bytes, nbits: int, start: int, length: int)
+        Packs a range of the bits, as a memoryview of data (no copy) when the range falls on byte boundaries.
+"""
+
+def to_bytes(bits) -> bytes:
+    """
+    Packs a binary string into bytes.
+    Args:
+        bits (str | bytes): The '0'/'1' characters, e.g. a slice of data.txt read in text or binary mode.
+    Returns:
+        bytes: ceil(len(bits)/8) bytes holding the bits right-aligned (zero padding on the left).
+    """
+    if not bits:
+        return b""
+    return int(bits, 2).to_bytes((len(bits) + 7) // 8, 'big')
+
+def to_bits(data: bytes, nbits: int = None) -> str:
+    """
+    Unpacks bytes into a binary string.
+    Args:
+        data (bytes): Packed data, any bytes-like object.
+        nbits (int, optional): Number of bits to keep, counted from the right. Defaults to all of them (8*len(data)).
+    Returns:
+        str: The binary string of exactly nbits characters.
+    """
+    if nbits is None:
+        nbits = 8 * len(data)
+    if nbits == 0:
+        return ""
+    return format(int.from_bytes(data, 'big'), '0{}b'.format(nbits))[-nbits:]
+
+def concat(head: bytes, headbits: int, tail: bytes, tailbits: int) -> bytes:
+    """
+    Packs the concatenation of two packed bit strings.
+    Args:
+        head (bytes): Packed leading part.
+        headbits (int): Bit length of the leading part.
+        tail (bytes): Packed trailing part.
+        tailbits (int): Bit length of the trailing part.
+    Returns:
+        bytes: The packed concatenation (headbits + tailbits bits).
+    """
+    if headbits % 8 == 0 and tailbits % 8 == 0:
+        return bytes(head) + tail
+    value = (int.from_bytes(head, 'big') << tailbits) | int.from_bytes(tail, 'big')
+    return value.to_bytes((headbits + tailbits + 7) // 8, 'big')
+
+def flip(data: bytes, nbits: int, positions) -> bytes:
+    """
+    Flips bits of packed data.
+    Args:
+        data (bytes): Packed data holding nbits bits.
+        nbits (int): The bit length of the data.
+        positions (iterable of int): Bit indices as in the legacy string (0 = leftmost). Repeated indices cancel out.
+    Returns:
+        bytes: A new bytes object with the bits flipped.
+    """
+    mask = 0
+    for pos in positions:
+        mask ^= 1 << (nbits - 1 - pos)
+    return (int.from_bytes(data, 'big') ^ mask).to_bytes(len(data), 'big')
+
+def extract(data: bytes, nbits: int, start: int, length: int):
+    """
+    Packs a range of the bits of packed data.
+    Args:
+        data (bytes): Packed data holding nbits bits.
+        nbits (int): The bit length of the data.
+        start (int): Index of the first bit of the range (0 = leftmost).
+        length (int): Number of bits in the range.
+    Returns:
+        memoryview | bytes: The packed range (ceil(length/8) bytes). When the range starts and ends on byte
+            boundaries of data, this is a memoryview slice of data, so nothing is copied.
+    """
+    pad = 8 * len(data) - nbits
+    first = pad + start
+    if first % 8 == 0 and length % 8 == 0:
+        return memoryview(data)[first // 8:(first + length) // 8]
+    value = (int.from_bytes(data, 'big') >> (nbits - start - length)) & ((1 << length) - 1)
+    return value.to_bytes((length + 7) // 8, 'big')
@@ -11,11 +11,29 @@ Functions:
         The data is split into words consisting of the original chunk and its checksum.
         For each word, the integer values are summed, carries are folded, and the result is checked to be all 1s (indicating a valid checksum).
         Returns True if all checksums are valid, otherwise False.
+    generate_checksum_bytes(data: bytes) -> bytes:
+        Same as generate_checksum on packed data (see bits.py); the result is the packed legacy codeword.
+    verify_checksum_bytes(data: bytes) -> bool:
+        Same as verify_checksum on packed data.
+    generate_many(frames) -> list:
+        Generates the codewords of a batch of packed frames (generate_checksum_bytes on each).
+    verify_many(codewords) -> list:
+        Verifies a batch of packed codewords and returns one result per codeword.
+    checksum_chunks(data: bytes, chunk_size: int = chunk_bytes) -> list:
+        Computes one Internet-style (ones' complement) checksum per chunk_size-byte chunk in a single pass.
+    generate_checksum_chunks(data: bytes, chunk_size: int = chunk_bytes) -> bytes:
+        Frames packed data as chunks each followed by its 16-bit checksum.
+    verify_checksum_chunks(data: bytes, chunk_size: int = chunk_bytes) -> list:
+        Verifies data framed by generate_checksum_chunks and returns pass/fail for every chunk.
 Usage:
     The module can be used to generate checksums for binary data before transmission and verify the integrity of received data.
 """
+import sys
+from array import array
+
 chunk = 16
 bit_size = 2*8
+chunk_bytes = 64  # default chunk size of the per-chunk functions, one sender frame
 
 def generate_checksum(data: str) -> str:
     """
@@ -89,3 +107,190 @@ def verify_checksum(data: str) -> bool:
         return False
 
     return True
+
+
+def _words(data: bytes) -> array:
+    """
+    Reads packed data as an array of 16-bit big-endian words, so sums run in C instead of a Python loop.
+    Args:
+        data (bytes): Packed data with an even number of bytes.
+    Returns:
+        array: The words as unsigned integers.
+    """
+    words = array('H')
+    words.frombytes(data)
+    if sys.byteorder == 'little':
+        words.byteswap()
+    return words
+
+
+def _fold(total: int) -> int:
+    """Folds the carries of a word sum back in (end-around carry) until it fits in bit_size bits."""
+    while total >= (1 << bit_size):
+        total = (total >> bit_size) + (total & ((1 << bit_size)-1))
+    return total
+
+
+def _ones_complement_sum(data: bytes) -> int:
+    """
+    Sums the 16-bit big-endian words of packed data with end-around carry.
+    Args:
+        data (bytes): Packed data with an even number of bytes.
+    Returns:
+        int: The folded sum, at most bit_size bits wide.
+    """
+    return _fold(sum(_words(data)))
+
+
+def generate_checksum_bytes(data: bytes) -> bytes:
+    """
+    Generates the checksum codeword for packed binary data.
+    Args:
+        data (bytes): The packed data (bits.to_bytes of the binary string).
+    Returns:
+        bytes: The packed codeword, identical to bits.to_bytes(generate_checksum(bits)).
+    Notes:
+        - Like generate_checksum, the data is left-padded to a whole number of words and the padding is kept in the codeword.
+    """
+    if len(data) % 2:
+        data = b"\x00" + bytes(data)
+    checksum = _ones_complement_sum(data)
+    return bytes(data) + ((~checksum) & ((1 << bit_size)-1)).to_bytes(bit_size // 8, 'big')
+
+
+def verify_checksum_bytes(data: bytes) -> bool:
+    """
+    Verifies a packed checksum codeword.
+    Args:
+        data (bytes): The packed codeword.
+    Returns:
+        bool: True if the folded sum of all words is all 1s, False otherwise.
+    """
+    if len(data) % 2:
+        data = b"\x00" + bytes(data)
+    return _ones_complement_sum(data) == (1 << bit_size) - 1
+
+
+def _block_sums(data: bytes, block: int) -> list:
+    """
+    Computes the folded ones' complement sum of every `block`-byte block of packed data in one pass.
+    Args:
+        data (bytes): Packed data.
+        block (int): Block size in bytes, a whole number of words.
+    Returns:
+        list: One folded sum per block; a shorter last block is left-padded to whole words like generate_checksum.
+    """
+    view = memoryview(data).cast('B')
+    full = len(view) - len(view) % block
+    words = _words(view[:full])
+    step = block // 2
+    sums = [_fold(sum(words[i:i+step])) for i in range(0, len(words), step)]
+    if full < len(view):
+        tail = bytes(view[full:])
+        if len(tail) % 2:
+            tail = b"\x00" + tail
+        sums.append(_ones_complement_sum(tail))
+    return sums
+
+
+def checksum_chunks(data: bytes, chunk_size: int = chunk_bytes) -> list:
+    """
+    Computes one checksum per chunk of packed data in a single pass.
+    Args:
+        data (bytes): The packed data, e.g. a whole file read in binary mode.
+        chunk_size (int, optional): Chunk size in bytes; must be even. Defaults to chunk_bytes.
+    Returns:
+        list: The complemented 16-bit checksum of every chunk, the last one covering the remaining bytes.
+    Raises:
+        ValueError: If chunk_size is not a positive even number.
+    Notes:
+        - Each value equals the checksum generate_checksum_bytes appends to that chunk.
+    """
+    if chunk_size <= 0 or chunk_size % 2:
+        raise ValueError("chunk_size must be a positive even number of bytes")
+    mask = (1 << bit_size) - 1
+    return [total ^ mask for total in _block_sums(data, chunk_size)]
+
+
+def generate_checksum_chunks(data: bytes, chunk_size: int = chunk_bytes) -> bytes:
+    """
+    Frames packed data as chunks, each followed by its own 16-bit checksum.
+    Args:
+        data (bytes): The packed data.
+        chunk_size (int, optional): Chunk size in bytes; must be even. Defaults to chunk_bytes.
+    Returns:
+        bytes: chunk 1 | checksum 1 | chunk 2 | checksum 2 | ... (the last chunk may be shorter).
+    """
+    view = memoryview(data).cast('B')
+    framed = bytearray()
+    for i, checksum in enumerate(checksum_chunks(view, chunk_size)):
+        framed += view[i*chunk_size:(i+1)*chunk_size]
+        framed += checksum.to_bytes(bit_size // 8, 'big')
+    return bytes(framed)
+
+
+def verify_checksum_chunks(data: bytes, chunk_size: int = chunk_bytes) -> list:
+    """
+    Verifies data framed by generate_checksum_chunks, all chunks in one pass.
+    Args:
+        data (bytes): The framed data.
+        chunk_size (int, optional): Chunk size in bytes used when framing. Defaults to chunk_bytes.
+    Returns:
+        list: True for every chunk whose checksum is valid, False for every corrupted one.
+    Raises:
+        ValueError: If chunk_size is not a positive even number.
+    """
+    if chunk_size <= 0 or chunk_size % 2:
+        raise ValueError("chunk_size must be a positive even number of bytes")
+    mask = (1 << bit_size) - 1
+    return [total == mask for total in _block_sums(data, chunk_size + bit_size // 8)]
+
+
+def _batch_sums(frames) -> tuple:
+    """
+    Lays a batch of packed frames out back to back, each left-padded to whole words, and sums every frame.
+    Args:
+        frames (iterable of bytes): The packed frames.
+    Returns:
+        tuple: (batch, spans, sums) with the padded frames in one bytearray, the (start, end) byte span of every
+        frame in it, and the folded ones' complement sum of every frame.
+    """
+    batch = bytearray()
+    spans = []
+    for frame in frames:
+        if len(frame) % 2:
+            batch.append(0)
+        start = len(batch)
+        batch += frame
+        spans.append((start - start % 2, len(batch)))
+    words = _words(batch)
+    sums = [_fold(sum(words[start // 2:end // 2])) for start, end in spans]
+    return batch, spans, sums
+
+
+def generate_many(frames) -> list:
+    """
+    Generates the checksum codewords of many packed frames at once.
+    All frames are converted to 16-bit words in a single pass over one buffer.
+    Args:
+        frames (iterable of bytes): The packed frames; any iterable, including a generator.
+    Returns:
+        list: The packed codewords, identical to generate_checksum_bytes on each frame.
+    """
+    batch, spans, sums = _batch_sums(frames)
+    mask = (1 << bit_size) - 1
+    return [bytes(batch[start:end]) + (total ^ mask).to_bytes(bit_size // 8, 'big')
+            for (start, end), total in zip(spans, sums)]
+
+
+def verify_many(codewords) -> list:
+    """
+    Verifies many packed checksum codewords at once.
+    All codewords are converted to 16-bit words in a single pass over one buffer.
+    Args:
+        codewords (iterable of bytes): The packed codewords; any iterable, including a generator.
+    Returns:
+        list: True for every codeword whose checksum is valid, False otherwise, in order.
+    """
+    mask = (1 << bit_size) - 1
+    return [total == mask for total in _batch_sums(codewords)[2]]
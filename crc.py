@@ -3,22 +3,70 @@ This module implements CRC (Cyclic Redundancy Check) generation and verification
 Functions:
     xor_division(dividend: str, divisor: str) -> str:
         Performs bitwise XOR division (modulo-2 division) of the dividend by the divisor (polynomial) and returns the remainder.
+    crc_bytes(data: bytes, polynomial: str, crc: int = 0) -> int:
+        Computes the CRC remainder of a byte string with a precomputed lookup table (slicing-by-8).
+    crc_bits(data: str, polynomial: str) -> int:
+        Computes the CRC remainder of a binary string with the table engine.
+    crc_combine(crc_a: int, crc_b: int, len_b: int, polynomial: str) -> int:
+        Returns the remainder of two concatenated pieces from their remainders and the length of the second one.
+    syndromes(polynomial: str, nbits: int) -> list:
+        Returns x^i mod G for every bit position i of an nbits-bit codeword (the remainder a flip of that bit causes).
+    CRC(polynomial: str):
+        Streaming state with update(bytes) / update_bits(bytes, nbits) / digest() / copy().
+    CRCSpec(name, width, poly, init, refin, refout, xorout, check):
+        A CRC algorithm in the Rocksoft parameter model; compute(bytes) returns its CRC.
+    validate_catalog() -> dict:
+        Checks every entry of 'catalog' against its published check value.
+    backend(polynomial: str) -> str:
+        Name of the implementation that computes a generator's CRC: "zlib", "binascii", "crc32c", "table" or "xor_division".
+    backend_report() -> dict:
+        The backend of every entry of 'polynomials' and 'catalog'.
     generate_crc(data: str) -> str:
         Generates the CRC code for the given binary data using the selected polynomial and returns the data appended with the CRC remainder.
     verify_crc(data: str) -> bool:
         Verifies the integrity of the received binary data (including CRC) using the selected polynomial. Returns True if no error is detected, otherwise False.
+    generate_crc_bytes(data: bytes, polynomial: str) -> bytes:
+        Same as generate_crc on packed data (see bits.py); the codeword holds the data bits followed by the CRC bits.
+    verify_crc_bytes(data: bytes, polynomial: str, nbits: int = None) -> bool:
+        Same as verify_crc on a packed codeword.
+    generate_many(frames, polynomial: str, lengths = None, prefix_bits: int = 0) -> list:
+        Generates the codewords of a batch of packed frames sharing one polynomial (and optionally a common header).
+    verify_many(codewords, polynomial: str, lengths = None) -> list:
+        Verifies a batch of packed codewords sharing one polynomial and returns one result per codeword.
 Global Variables:
     polynomials: dict
         Dictionary mapping CRC scheme names to their corresponding binary polynomial strings.
     polynomial: str
         The currently selected polynomial name or binary string.
+    catalog: dict
+        Standard named CRC algorithms (CRCSpec), e.g. "CRC-32/ISO-HDLC", "CRC-16/IBM-3740", "CRC-32/ISCSI".
+    fast_backends: bool
+        Dispatch the generators of standard algorithms to C implementations (default True); False forces the table engine.
 Usage:
     Select a polynomial by setting the 'polynomial' variable to one of the keys in 'polynomials' (e.g., "CRC-16").
     Use 'generate_crc' to append CRC to data before transmission.
     Use 'verify_crc' to check received data for errors.
 Note:
     The module expects binary strings as input data.
+    generate_crc and verify_crc run on the table-driven engine (crc_bytes); the output is bit-identical
+    to xor_division, which is kept as the reference implementation.
+    Generators that a C library implements are dispatched to it instead of the table engine:
+        x^32 + x^26 + ... + 1 (CRC-32, 0x04C11DB7)    zlib.crc32
+        x^16 + x^12 + x^5 + 1 (CRC-16/CCITT, 0x1021)   binascii.crc_hqx
+        CRC-32C (0x1EDC6F41)                           crc32c.crc32c, if the optional crc32c package is installed
+    These compute the same remainder: the reflected zlib/crc32c algorithms are run on bit-reversed bytes with
+    the register reflected in and out, and their fixed initial value and final XOR cancelled.
 """
+import binascii
+import functools
+import struct
+import zlib
+import bits
+
+try:
+    import crc32c as _crc32c
+except ImportError:
+    _crc32c = None
 
 polynomials = {
     "CRC-8": "100000111",
@@ -29,6 +77,14 @@ polynomials = {
 
 polynomial = ""
 
+# slicing-by-8 lookup tables, built on first use per generator string
+_tables = {}
+
+fast_backends = True
+
+# bit-reversal of every byte value, for reflected input (bytes.translate runs it in C)
+_REVERSED = bytes(int(format(i, '08b')[::-1], 2) for i in range(256))
+
 def xor_division(dividend:str, divisor:str)->str:
     """
     Performs bitwise XOR division (modulo-2 division) of a binary dividend by a binary divisor.
@@ -56,6 +112,269 @@ def xor_division(dividend:str, divisor:str)->str:
         
     return temp[1:]
 
+def _resolve(polynomial:str)->str:
+    """Returns the generator string for a scheme name, or the argument itself if it is already a generator."""
+    if polynomial in polynomials:
+        return polynomials[polynomial]
+    return polynomial
+
+def _table_ready(divisor:str)->bool:
+    """The table engine needs a generator of degree >= 1 with its leading bit set; anything else goes through xor_division."""
+    return len(divisor) > 1 and divisor[0] == '1'
+
+def _crc_tables(divisor:str):
+    """
+    Builds (once) and returns the slicing-by-8 lookup tables for a generator polynomial.
+    The register is kept at least 64 bits wide so eight message bytes can be folded in per step;
+    generators narrower than the register are shifted up to its top and the result is shifted back down.
+    Args:
+        divisor (str): The binary string of the generator polynomial (leading bit set).
+    Returns:
+        tuple: (width, shift, mask, tables) where tables[j][b] is the register after byte b is followed by j zero bytes.
+    """
+    if divisor in _tables:
+        return _tables[divisor]
+
+    width = len(divisor) - 1
+    reg = max(64, -(-width // 8) * 8)
+    shift = reg - width
+    mask = (1 << reg) - 1
+    top = 1 << (reg - 1)
+    poly = (int(divisor, 2) & ((1 << width) - 1)) << shift
+
+    t0 = []
+    for byte in range(256):
+        r = byte << (reg - 8)
+        for _ in range(8):
+            if r & top:
+                r = ((r << 1) & mask) ^ poly
+            else:
+                r <<= 1
+        t0.append(r)
+
+    tables = [t0]
+    for _ in range(7):
+        tables.append([((r << 8) & mask) ^ t0[r >> (reg - 8)] for r in tables[-1]])
+
+    _tables[divisor] = (width, shift, mask, tables)
+    return _tables[divisor]
+
+def crc_bytes(data:bytes, polynomial:str, crc:int = 0)->int:
+    """
+    Computes the CRC remainder of a byte string using precomputed lookup tables (slicing-by-8).
+    Args:
+        data (bytes): The message, most significant bit first. Any bytes-like object is accepted.
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+        crc (int, optional): Remainder of the preceding part of the message, to continue a computation. Defaults to 0.
+    Returns:
+        int: The remainder of data * x^k modulo the generator, k being its degree.
+    Notes:
+        - Leading zero bits do not change the remainder, so bit strings can be left-padded to whole bytes.
+    """
+    return _runner(_resolve(polynomial))(data, crc)
+
+def _table_crc(engine:tuple, data:bytes, crc:int = 0)->int:
+    """Runs the slicing-by-8 loop of crc_bytes with tables already looked up (see _crc_tables)."""
+    width, shift, mask, tables = engine
+    t0, t1, t2, t3, t4, t5, t6, t7 = tables
+    low = mask.bit_length() - 64
+    r = crc << shift
+
+    view = memoryview(data).cast('B')
+    end = len(view) - len(view) % 8
+    for (word,) in struct.iter_unpack('>Q', view[:end]):
+        r ^= word << low
+        top = r >> low
+        r = (((r << 64) & mask) ^ t7[top >> 56] ^ t6[(top >> 48) & 0xff]
+             ^ t5[(top >> 40) & 0xff] ^ t4[(top >> 32) & 0xff] ^ t3[(top >> 24) & 0xff]
+             ^ t2[(top >> 16) & 0xff] ^ t1[(top >> 8) & 0xff] ^ t0[top & 0xff])
+    high = low + 56
+    for byte in view[end:]:
+        r = ((r << 8) & mask) ^ t0[(r >> high) ^ byte]
+
+    return r >> shift
+
+def _reflect32(value:int)->int:
+    """Reverses the 32 bits of value (byte order and the bits of every byte)."""
+    return int.from_bytes(value.to_bytes(4, 'little').translate(_REVERSED), 'big')
+
+def _zlib_style(crc32):
+    """
+    Adapts a reflected CRC-32 function with zlib's interface (initial value and final XOR 0xFFFFFFFF,
+    crc32(data, previous_result)) to this module's remainders.
+    Returns:
+        tuple: (raw, reflected). raw(data, crc) continues a remainder like _table_crc; reflected(data, register)
+            runs the reflected algorithm from a bit-reversed register, with no initial value or final XOR.
+    """
+    def reflected(data, register:int = 0)->int:
+        return crc32(data, register ^ 0xffffffff) ^ 0xffffffff
+
+    def raw(data, crc:int = 0)->int:
+        return _reflect32(reflected(bytes(data).translate(_REVERSED), _reflect32(crc)))
+
+    return raw, reflected
+
+def _hqx(data, crc:int = 0)->int:
+    """binascii.crc_hqx is the non-reflected x^16 + x^12 + x^5 + 1 CRC with the register passed in: a remainder as is."""
+    return binascii.crc_hqx(data, crc)
+
+# generator string -> (backend name, raw(data, crc), reflected(data, register) or None)
+_backends = {
+    "100000100110000010001110110110111": ("zlib",) + _zlib_style(zlib.crc32),
+    "10001000000100001": ("binascii", _hqx, None),
+}
+if _crc32c is not None:
+    _backends["100011110110111000110111101000001"] = ("crc32c",) + _zlib_style(_crc32c.crc32c)
+
+def _runner(divisor:str):
+    """
+    Returns the function run(data, crc) -> remainder for a resolved generator (the equivalent of crc_bytes):
+    its C backend if it has one and fast_backends is set, otherwise the slicing-by-8 table engine.
+    """
+    entry = _backends.get(divisor) if fast_backends else None
+    if entry is not None:
+        return entry[1]
+    return functools.partial(_table_crc, _crc_tables(divisor))
+
+def backend(polynomial:str)->str:
+    """
+    Names the implementation that computes the CRC for a generator.
+    Args:
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+    Returns:
+        str: "zlib", "binascii" or "crc32c" for a C backend, "table" for the slicing-by-8 engine,
+            or "xor_division" for generators the table engine cannot run.
+    """
+    divisor = _resolve(polynomial)
+    if not _table_ready(divisor):
+        return "xor_division"
+    entry = _backends.get(divisor) if fast_backends else None
+    return entry[0] if entry is not None else "table"
+
+def backend_report()->dict:
+    """Returns {name: backend} for every entry of 'polynomials' and 'catalog'."""
+    report = {name: backend(name) for name in polynomials}
+    report.update((name, backend(spec.generator)) for name, spec in catalog.items())
+    return report
+
+def crc_bits(data:str, polynomial:str)->int:
+    """
+    Computes the CRC remainder of a binary string with the table engine.
+    Args:
+        data (str): The binary string to encode.
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+    Returns:
+        int: The remainder of data * x^k modulo the generator (same value as xor_division on data + k zeros).
+    """
+    if not data:
+        return 0
+    return crc_bytes(int(data, 2).to_bytes((len(data) + 7) // 8, 'big'), polynomial)
+
+def _mulmod(a:int, b:int, divisor:int, width:int)->int:
+    """Multiplies two remainders as GF(2) polynomials modulo the generator (given as an integer of degree width)."""
+    product = 0
+    while b:
+        if b & 1:
+            product ^= a
+        a <<= 1
+        b >>= 1
+    for shift in range(product.bit_length() - width - 1, -1, -1):
+        if (product >> (shift + width)) & 1:
+            product ^= divisor << shift
+    return product
+
+@functools.lru_cache(maxsize=256)
+def _xpow(n:int, divisor:str)->int:
+    """Returns x^n modulo the generator, by square-and-multiply."""
+    poly = int(divisor, 2)
+    width = len(divisor) - 1
+    result = _mulmod(1, 1, poly, width)
+    base = _mulmod(2, 1, poly, width)
+    while n:
+        if n & 1:
+            result = _mulmod(result, base, poly, width)
+        base = _mulmod(base, base, poly, width)
+        n >>= 1
+    return result
+
+def crc_combine(crc_a:int, crc_b:int, len_b:int, polynomial:str)->int:
+    """
+    Combines the remainders of two pieces into the remainder of their concatenation, without touching the data.
+    Args:
+        crc_a (int): Remainder of the first piece A (crc_bytes / crc_bits / CRC.digest).
+        crc_b (int): Remainder of the second piece B.
+        len_b (int): Length of B in bits.
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+    Returns:
+        int: The remainder of A followed by B, i.e. crc_a * x^len_b + crc_b modulo the generator.
+    Notes:
+        - This works because the CRC here has no initial value and no final XOR, so it is linear in the message.
+    """
+    divisor = _resolve(polynomial)
+    return _mulmod(crc_a, _xpow(len_b, divisor), int(divisor, 2), len(divisor) - 1) ^ crc_b
+
+def syndromes(polynomial:str, nbits:int)->list:
+    """
+    Returns the syndrome of every single-bit error in an nbits-bit codeword.
+    Args:
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+        nbits (int): Codeword length in bits.
+    Returns:
+        list: x^i mod G for i = 0 .. nbits-1, where bit i is counted from the right (the last CRC bit is i = 0).
+    Notes:
+        - The CRC is linear, so an error pattern goes undetected exactly when the XOR of its syndromes is 0.
+    """
+    divisor = int(_resolve(polynomial), 2)
+    width = divisor.bit_length() - 1
+    result = []
+    s = 1
+    for _ in range(nbits):
+        result.append(s)
+        s <<= 1
+        if s >> width:
+            s ^= divisor
+    return result
+
+class CRC:
+    """
+    Streaming CRC computation: feed a message in pieces with update() and read its remainder with digest().
+    A state can be copied, e.g. to compute the remainder of a constant header once and continue it per frame.
+    Attributes:
+        polynomial (str): The binary generator string.
+        width (int): Degree of the generator, i.e. the number of CRC bits.
+    """
+
+    def __init__(self, polynomial:str, crc:int = 0):
+        """
+        Args:
+            polynomial (str): A key of 'polynomials' or a binary generator string (leading bit set, degree >= 1).
+            crc (int, optional): Remainder of the message seen so far. Defaults to 0 (empty message).
+        Raises:
+            ValueError: If the generator cannot be run by the table engine.
+        """
+        self.polynomial = _resolve(polynomial)
+        if not _table_ready(self.polynomial):
+            raise ValueError(f"unsupported generator polynomial: {polynomial!r}")
+        self.width = len(self.polynomial) - 1
+        self._run = _runner(self.polynomial)
+        self._crc = crc
+
+    def update(self, data:bytes):
+        """Feeds the next whole bytes of the message (most significant bit first)."""
+        self._crc = self._run(data, self._crc)
+
+    def update_bits(self, data:bytes, nbits:int):
+        """Feeds the next nbits bits of the message, given packed (see bits.py)."""
+        self._crc = crc_combine(self._crc, crc_bytes(data, self.polynomial), nbits, self.polynomial)
+
+    def digest(self)->int:
+        """Returns the remainder of the message fed so far."""
+        return self._crc
+
+    def copy(self):
+        """Returns an independent state continuing from this one."""
+        return CRC(self.polynomial, self._crc)
+
 def generate_crc(data:str, polynomial:str) -> str:
     """
     Generates a CRC (Cyclic Redundancy Check) code for the given data using a specified polynomial.
@@ -66,18 +385,19 @@ def generate_crc(data:str, polynomial:str) -> str:
     Notes:
         - Uses a global variable 'polynomial' to determine the CRC polynomial.
         - If 'polynomial' is a key in the global 'polynomials' dictionary, it is replaced with its value.
-        - The function appends (len(polynomial)-1) zeros to the data before performing the XOR division.
-        - The 'xor_division' function is used to compute the CRC remainder.
+        - The remainder is that of data followed by (len(polynomial)-1) zeros, computed by the table engine (crc_bits).
+        - Generators the table engine cannot handle fall back to 'xor_division'.
     """
     if not data:
         return ""
     # global polynomial
-    if polynomial in polynomials:
-        polynomial = polynomials[polynomial]
+    polynomial = _resolve(polynomial)
 
-    dividend = data + '0'*(len(polynomial)-1)
-    
-    rem = xor_division(dividend, polynomial)
+    if _table_ready(polynomial):
+        rem = format(crc_bits(data, polynomial), '0{}b'.format(len(polynomial)-1))
+    else:
+        dividend = data + '0'*(len(polynomial)-1)
+        rem = xor_division(dividend, polynomial)
     
     data_to_send = data+rem
     return data_to_send
@@ -91,15 +411,239 @@ def verify_crc(data:str, polynomial:str)->bool:
         bool: True if the CRC remainder is zero (data is valid), False otherwise.
     Notes:
         - Uses a global 'polynomial' and a dictionary 'polynomials' for CRC calculation.
-        - Relies on the 'xor_division' function to compute the remainder.
+        - The message part is run through the table engine and compared against the trailing CRC bits.
+        - Data shorter than the generator goes through 'xor_division' so its result is unchanged.
     """
     if not data:
         return True
     # global polynomial
-    if polynomial in polynomials:
-        polynomial = polynomials[polynomial]
-        
+    polynomial = _resolve(polynomial)
+
+    width = len(polynomial) - 1
+    if _table_ready(polynomial) and len(data) > width:
+        return crc_bits(data[:-width], polynomial) == int(data[-width:], 2)
+
     dividend = data
     
     rem = xor_division(dividend, polynomial)
     return int(rem, 2)==0
+
+def _generate_packed(divisor:str, engine, data:bytes, nbits:int) -> bytes:
+    """Body of generate_crc_bytes for a resolved generator; engine is its _runner, or None to use xor_division."""
+    if nbits == 0:
+        return b""
+    width = len(divisor) - 1
+    if engine is not None:
+        rem = engine(data, 0)
+    else:
+        rem = int(xor_division(bits.to_bits(data, nbits) + '0'*width, divisor), 2)
+    return bits.concat(data, nbits, rem.to_bytes((width + 7) // 8, 'big'), width)
+
+def _verify_packed(divisor:str, engine, data:bytes, nbits:int) -> bool:
+    """Body of verify_crc_bytes for a resolved generator; engine is its _runner, or None to use xor_division."""
+    if nbits == 0:
+        return True
+    width = len(divisor) - 1
+    if engine is None or nbits <= width:
+        return verify_crc(bits.to_bits(data, nbits), divisor)
+
+    view = memoryview(data)
+    if width % 8 == 0:
+        split = len(view) - width // 8
+        return engine(view[:split], 0) == int.from_bytes(view[split:], 'big')
+    value = int.from_bytes(view, 'big')
+    message = value >> width
+    return engine(message.to_bytes(len(view), 'big'), 0) == value & ((1 << width) - 1)
+
+def _engine(divisor:str):
+    """Returns the CRC function of a resolved generator (see _runner), or None if it has to go through xor_division."""
+    return _runner(divisor) if _table_ready(divisor) else None
+
+def generate_crc_bytes(data:bytes, polynomial:str, nbits:int = None) -> bytes:
+    """
+    Generates the CRC codeword for packed binary data.
+    Args:
+        data (bytes): The packed data (bits.to_bytes of the binary string).
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+        nbits (int, optional): Bit length of the data. Defaults to 8*len(data).
+    Returns:
+        bytes: The packed codeword of nbits + k bits, identical to bits.to_bytes(generate_crc(bits, polynomial)).
+    """
+    if nbits is None:
+        nbits = 8 * len(data)
+    divisor = _resolve(polynomial)
+    return _generate_packed(divisor, _engine(divisor), data, nbits)
+
+def verify_crc_bytes(data:bytes, polynomial:str, nbits:int = None)->bool:
+    """
+    Verifies a packed CRC codeword.
+    Args:
+        data (bytes): The packed codeword.
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+        nbits (int, optional): Bit length of the codeword. Defaults to 8*len(data).
+    Returns:
+        bool: True if the codeword is divisible by the generator, False otherwise.
+    """
+    if nbits is None:
+        nbits = 8 * len(data)
+    divisor = _resolve(polynomial)
+    return _verify_packed(divisor, _engine(divisor), data, nbits)
+
+def generate_many(frames, polynomial:str, lengths = None, prefix_bits:int = 0) -> list:
+    """
+    Generates the CRC codewords of many packed frames sharing one polynomial.
+    The polynomial and its lookup tables are resolved once for the whole batch.
+    Args:
+        frames (iterable of bytes): The packed frames; any iterable, including a generator.
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+        lengths (iterable of int, optional): Bit length of every frame. Defaults to 8*len(frame).
+        prefix_bits (int, optional): Number of leading bits all frames have in common, e.g. the SRC/DEST header.
+            The remainder over the whole bytes they cover is computed once per byte alignment and the
+            rest of each frame continues from it. Defaults to 0.
+    Returns:
+        list: The packed codewords, in order.
+    """
+    divisor = _resolve(polynomial)
+    engine = _engine(divisor)
+    if lengths is None:
+        pairs = ((frame, 8 * len(frame)) for frame in frames)
+    else:
+        pairs = zip(frames, lengths)
+    if not prefix_bits or engine is None:
+        return [_generate_packed(divisor, engine, frame, nbits) for frame, nbits in pairs]
+
+    width = len(divisor) - 1
+    prefixes = {}
+    codewords = []
+    for frame, nbits in pairs:
+        if nbits < prefix_bits:
+            codewords.append(_generate_packed(divisor, engine, frame, nbits))
+            continue
+        pad = -nbits % 8
+        skip = (pad + prefix_bits) // 8
+        view = memoryview(frame)
+        if pad not in prefixes:
+            prefixes[pad] = engine(view[:skip], 0)
+        rem = engine(view[skip:], prefixes[pad])
+        codewords.append(bits.concat(frame, nbits, rem.to_bytes((width + 7) // 8, 'big'), width))
+    return codewords
+
+def verify_many(codewords, polynomial:str, lengths = None) -> list:
+    """
+    Verifies many packed codewords sharing one polynomial.
+    The polynomial and its lookup tables are resolved once for the whole batch.
+    Args:
+        codewords (iterable of bytes): The packed codewords; any iterable, including a generator.
+        polynomial (str): A key of 'polynomials' or a binary generator string.
+        lengths (iterable of int, optional): Bit length of every codeword. Defaults to 8*len(codeword).
+    Returns:
+        list: True for every codeword with no detected error, False otherwise, in order.
+    """
+    divisor = _resolve(polynomial)
+    engine = _engine(divisor)
+    if lengths is None:
+        return [_verify_packed(divisor, engine, codeword, 8 * len(codeword)) for codeword in codewords]
+    return [_verify_packed(divisor, engine, codeword, nbits) for codeword, nbits in zip(codewords, lengths)]
+
+def _reflect(value:int, width:int)->int:
+    """Reverses the low `width` bits of value."""
+    return int(format(value, '0{}b'.format(width))[::-1], 2)
+
+class CRCSpec:
+    """
+    A CRC algorithm in the Rocksoft parameter model, as used by the CRC catalogues of standard algorithms.
+    The register starts at `init`, input bytes are bit-reversed first if `refin`, the final register is
+    bit-reversed if `refout`, and `xorout` is XORed into the result. With init = xorout = 0 and no reflection
+    this is exactly the CRC of generate_crc. The generator runs on the same backend as the rest of the module
+    (see backend()): a C library for the standard generators, otherwise the cached lookup tables.
+    Attributes:
+        name (str): Catalogue name, e.g. "CRC-32/ISO-HDLC".
+        width (int): Number of CRC bits.
+        poly (int): Generator without its leading x^width term, e.g. 0x04C11DB7.
+        init (int): Initial register value.
+        refin (bool): Reflect every input byte.
+        refout (bool): Reflect the final register.
+        xorout (int): Value XORed into the final register.
+        check (int | None): Published CRC of the ASCII string "123456789".
+    """
+
+    def __init__(self, name:str, width:int, poly:int, init:int = 0, refin:bool = False, refout:bool = False,
+                 xorout:int = 0, check:int = None):
+        self.name = name
+        self.width = width
+        self.poly = poly
+        self.init = init
+        self.refin = refin
+        self.refout = refout
+        self.xorout = xorout
+        self.check = check
+
+    def __repr__(self):
+        return (f"CRCSpec({self.name!r}, width={self.width}, poly={self.poly:#x}, init={self.init:#x}, "
+                f"refin={self.refin}, refout={self.refout}, xorout={self.xorout:#x})")
+
+    @property
+    def generator(self)->str:
+        """The generator as a binary string, the form used by 'polynomials'."""
+        return '1' + format(self.poly, '0{}b'.format(self.width))
+
+    def compute(self, data:bytes)->int:
+        """
+        Computes the CRC of a byte string.
+        Args:
+            data (bytes): The message; any bytes-like object.
+        Returns:
+            int: The CRC value.
+        """
+        entry = _backends.get(self.generator) if fast_backends else None
+        if entry is not None and entry[2] is not None and self.refin and self.refout:
+            # the library runs the reflected algorithm natively: no byte reversal needed
+            return entry[2](data, _reflect(self.init, self.width)) ^ self.xorout
+        if self.refin:
+            data = bytes(data).translate(_REVERSED)
+        crc = _runner(self.generator)(data, self.init)
+        if self.refout:
+            crc = _reflect(crc, self.width)
+        return crc ^ self.xorout
+
+    def verify_check(self)->bool:
+        """Returns True if the CRC of b"123456789" matches the published check value."""
+        return self.check is not None and self.compute(b"123456789") == self.check
+
+def _catalog(*specs)->dict:
+    """Indexes specs by name."""
+    return {spec.name: spec for spec in specs}
+
+catalog = _catalog(
+    CRCSpec("CRC-3/GSM", 3, 0x3, 0x0, False, False, 0x7, 0x4),
+    CRCSpec("CRC-5/USB", 5, 0x05, 0x1f, True, True, 0x1f, 0x19),
+    CRCSpec("CRC-8/SMBUS", 8, 0x07, 0x00, False, False, 0x00, 0xf4),
+    CRCSpec("CRC-8/I-432-1", 8, 0x07, 0x00, False, False, 0x55, 0xa1),
+    CRCSpec("CRC-8/MAXIM-DOW", 8, 0x31, 0x00, True, True, 0x00, 0xa1),
+    CRCSpec("CRC-8/AUTOSAR", 8, 0x2f, 0xff, False, False, 0xff, 0xdf),
+    CRCSpec("CRC-10/ATM", 10, 0x233, 0x000, False, False, 0x000, 0x199),
+    CRCSpec("CRC-16/UMTS", 16, 0x8005, 0x0000, False, False, 0x0000, 0xfee8),
+    CRCSpec("CRC-16/ARC", 16, 0x8005, 0x0000, True, True, 0x0000, 0xbb3d),
+    CRCSpec("CRC-16/MODBUS", 16, 0x8005, 0xffff, True, True, 0x0000, 0x4b37),
+    CRCSpec("CRC-16/USB", 16, 0x8005, 0xffff, True, True, 0xffff, 0xb4c8),
+    CRCSpec("CRC-16/XMODEM", 16, 0x1021, 0x0000, False, False, 0x0000, 0x31c3),
+    CRCSpec("CRC-16/IBM-3740", 16, 0x1021, 0xffff, False, False, 0x0000, 0x29b1),
+    CRCSpec("CRC-16/KERMIT", 16, 0x1021, 0x0000, True, True, 0x0000, 0x2189),
+    CRCSpec("CRC-16/IBM-SDLC", 16, 0x1021, 0xffff, True, True, 0xffff, 0x906e),
+    CRCSpec("CRC-32/ISO-HDLC", 32, 0x04c11db7, 0xffffffff, True, True, 0xffffffff, 0xcbf43926),
+    CRCSpec("CRC-32/BZIP2", 32, 0x04c11db7, 0xffffffff, False, False, 0xffffffff, 0xfc891918),
+    CRCSpec("CRC-32/MPEG-2", 32, 0x04c11db7, 0xffffffff, False, False, 0x00000000, 0x0376e6e7),
+    CRCSpec("CRC-32/CKSUM", 32, 0x04c11db7, 0x00000000, False, False, 0xffffffff, 0x765e7680),
+    CRCSpec("CRC-32/ISCSI", 32, 0x1edc6f41, 0xffffffff, True, True, 0xffffffff, 0xe3069283),
+    CRCSpec("CRC-32/AIXM", 32, 0x814141ab, 0x00000000, False, False, 0x00000000, 0x3010bf7f),
+    CRCSpec("CRC-64/ECMA-182", 64, 0x42f0e1eba9ea3693, 0, False, False, 0, 0x6c40df5f0b497347),
+    CRCSpec("CRC-64/XZ", 64, 0x42f0e1eba9ea3693, (1 << 64) - 1, True, True, (1 << 64) - 1, 0x995dc9bbdf1939fa),
+)
+# common aliases of the catalogue names
+catalog["CRC-32C"] = catalog["CRC-32/ISCSI"]
+catalog["CRC-16/CCITT-FALSE"] = catalog["CRC-16/IBM-3740"]
+catalog["CRC-16/CCITT"] = catalog["CRC-16/KERMIT"]
+
+def validate_catalog()->dict:
+    """Checks every catalogue entry against its published check value and returns {name: passed}."""
+    return {name: spec.verify_check() for name, spec in catalog.items()}
@@ -0,0 +1,416 @@
+"""
+fec.py
+Forward error correction: codes that repair errors at the receiver instead of only detecting them.
+Codes:
+    SECDED      Extended Hamming code per 64-bit block of data, 8 check bits per block (the (72,64) code of ECC
+                memory): corrects any single bit error in a block and detects any double one.
+    RS-8        Reed-Solomon over GF(256), 8 parity bytes per block of up to 255 bytes: corrects up to 4 byte errors.
+    RS-16       Reed-Solomon, 16 parity bytes per block: corrects up to 8 byte errors.
+Codewords keep the layout of the CRC and checksum codewords: the data bits come first, unchanged, and the
+check bits of all blocks follow them (always whole bytes), so a codeword is bytes(packed data) + check bytes.
+The last block of a frame may be shorter than the others (a shortened code).
+Functions:
+    codeword_bits(code: str, nbits: int) -> int
+        Length of the codeword of nbits data bits.
+    data_bits(code: str, ncodebits: int) -> int
+        Length of the data in a codeword of ncodebits bits.
+    check_bits(code: str, codeword_size: int) -> int
+        Bits of a codeword_size-bit frame left over for redundancy when the data fills the rest.
+    generate_fec_bytes(data: bytes, code: str, nbits: int = None) -> bytes
+        Encodes packed data.
+    decode_fec_bytes(codeword: bytes, code: str, nbits: int = None) -> tuple
+        Corrects a packed codeword and returns (data, data_nbits, corrected).
+    generate_many(frames, code: str, lengths = None) -> list
+    decode_many(codewords, code: str, lengths = None) -> list
+        Batch versions of the two functions above.
+Global Variables:
+    codes: dict
+        Code names mapped to (kind, parameter): ("hamming", block data bits) or ("rs", parity bytes per block).
+Notes:
+    - GF(256) arithmetic uses log/antilog tables over the primitive polynomial x^8 + x^4 + x^3 + x^2 + 1 (0x11D).
+    - Reed-Solomon parity and Hamming check bits are computed with per-byte lookup tables, like the CRC engine;
+      the full Berlekamp-Massey / Chien / Forney decoder only runs on blocks whose parity does not match.
+"""
+import functools
+
+codes = {
+    "SECDED": ("hamming", 64),
+    "RS-8": ("rs", 8),
+    "RS-16": ("rs", 16),
+}
+
+RS_BLOCK = 255
+
+# ---------- Hamming SEC-DED ----------
+
+# syndrome column of every data bit (bit 0 = least significant): the 7-bit values that are not powers of two,
+# so that they differ from the unit columns of the 7 check bits
+_COLUMNS = [c for c in range(3, 128) if c & (c - 1)][:64]
+_POSITION = {c: j for j, c in enumerate(_COLUMNS)}
+
+def _hamming_tables() -> list:
+    """tables[b][v]: XOR of the columns of the bits set in byte value v at byte b (bits 8b .. 8b+7)."""
+    tables = []
+    for b in range(8):
+        table = []
+        for v in range(256):
+            s = 0
+            for i in range(8):
+                if v >> i & 1:
+                    s ^= _COLUMNS[8*b + i]
+            table.append(s)
+        tables.append(table)
+    return tables
+
+_HAMMING = _hamming_tables()
+
+def _hamming_check(d: int) -> int:
+    """Returns the 8 check bits of a data block: 7 Hamming bits, then the overall parity bit."""
+    t = _HAMMING
+    s = (t[0][d & 0xff] ^ t[1][d >> 8 & 0xff] ^ t[2][d >> 16 & 0xff] ^ t[3][d >> 24 & 0xff]
+         ^ t[4][d >> 32 & 0xff] ^ t[5][d >> 40 & 0xff] ^ t[6][d >> 48 & 0xff] ^ t[7][d >> 56 & 0xff])
+    return s << 1 | ((d.bit_count() + s.bit_count()) & 1)
+
+def _blocks(nbits: int, size: int) -> list:
+    """Splits nbits data bits into blocks of `size` bits from the left; the last block may be shorter."""
+    return [min(size, nbits - start) for start in range(0, nbits, size)]
+
+def _hamming_encode(value: int, nbits: int, size: int) -> bytes:
+    checks = bytearray()
+    shift = nbits
+    for k in _blocks(nbits, size):
+        shift -= k
+        checks.append(_hamming_check((value >> shift) & ((1 << k) - 1)))
+    return bytes(checks)
+
+def _hamming_decode(value: int, nbits: int, checks, size: int) -> tuple:
+    """Returns (corrected data value, corrected bit count), or (value, -1) if a block has an uncorrectable error."""
+    corrected = 0
+    shift = nbits
+    for k, check in zip(_blocks(nbits, size), checks):
+        shift -= k
+        d = (value >> shift) & ((1 << k) - 1)
+        expected = _hamming_check(d)
+        if expected == check:
+            continue
+        syndrome = (expected ^ check) >> 1
+        # parity of the whole received block: expected holds the parity over the recomputed check bits,
+        # the syndrome's own parity turns it into the parity over the received ones
+        if not ((expected ^ check) ^ syndrome.bit_count()) & 1:
+            return value, -1  # even number of flips with a nonzero syndrome: double error
+        corrected += 1
+        if syndrome and not syndrome & (syndrome - 1):
+            continue  # a check bit flipped, the data is intact
+        if syndrome:
+            j = _POSITION.get(syndrome)
+            if j is None or j >= k:
+                return value, -1  # points outside the (shortened) block: more than one error
+            value ^= 1 << (shift + j)
+    return value, corrected
+
+# ---------- Reed-Solomon over GF(256) ----------
+
+_EXP = [0] * 512
+_LOG = [0] * 256
+
+def _gf_tables():
+    x = 1
+    for i in range(255):
+        _EXP[i] = x
+        _LOG[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= 0x11d
+    for i in range(255, 512):
+        _EXP[i] = _EXP[i - 255]
+
+_gf_tables()
+
+def _mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+def _div(a: int, b: int) -> int:
+    if a == 0:
+        return 0
+    return _EXP[(_LOG[a] - _LOG[b]) % 255]
+
+def _pow(a: int, n: int) -> int:
+    return _EXP[(_LOG[a] * n) % 255]
+
+def _poly_mul(p: list, q: list) -> list:
+    r = [0] * (len(p) + len(q) - 1)
+    for j, b in enumerate(q):
+        for i, a in enumerate(p):
+            r[i + j] ^= _mul(a, b)
+    return r
+
+def _poly_scale(p: list, x: int) -> list:
+    return [_mul(c, x) for c in p]
+
+def _poly_add(p: list, q: list) -> list:
+    r = [0] * max(len(p), len(q))
+    r[len(r) - len(p):] = p
+    for i, c in enumerate(q):
+        r[i + len(r) - len(q)] ^= c
+    return r
+
+def _poly_eval(p: list, x: int) -> int:
+    y = p[0]
+    for c in p[1:]:
+        y = _mul(y, x) ^ c
+    return y
+
+@functools.lru_cache(maxsize=None)
+def _rs_tables(nsym: int) -> tuple:
+    """
+    Returns (generator, table) for nsym parity bytes. The generator is prod (x - a^i), i < nsym, highest degree
+    first; table[b] is the generator times b without its leading term, packed into an nsym-byte int, so that the
+    parity is computed like a CRC, one lookup per message byte.
+    """
+    g = [1]
+    for i in range(nsym):
+        g = _poly_mul(g, [1, _EXP[i]])
+    table = [int.from_bytes(bytes(_mul(c, b) for c in g[1:]), 'big') for b in range(256)]
+    return g, table
+
+def _rs_parity(message, nsym: int) -> bytes:
+    _, table = _rs_tables(nsym)
+    top = 8 * (nsym - 1)
+    mask = (1 << (8 * nsym)) - 1
+    r = 0
+    for byte in message:
+        r = ((r << 8) & mask) ^ table[byte ^ (r >> top)]
+    return r.to_bytes(nsym, 'big')
+
+def _rs_correct(block: list, nsym: int, remainder: bytes) -> int:
+    """
+    Corrects a Reed-Solomon block (message + parity, as a list of byte values) in place.
+    The remainder is the received parity XOR the parity of the received message, i.e. the block modulo the
+    generator; since the generator vanishes at every a^i, the syndromes are taken from it, which costs nsym
+    instead of len(block) multiplications each.
+    Returns the number of corrected bytes, or -1 if the errors are beyond the code's capability.
+    """
+    syndromes = [_poly_eval(list(remainder), _EXP[i]) for i in range(nsym)]
+    if not any(syndromes):
+        return 0
+
+    # Berlekamp-Massey: error locator polynomial
+    locator = [1]
+    old = [1]
+    for i in range(nsym):
+        delta = syndromes[i]
+        for j in range(1, min(len(locator), i + 1)):
+            delta ^= _mul(locator[-(j + 1)], syndromes[i - j])
+        old = old + [0]
+        if delta:
+            if len(old) > len(locator):
+                new = _poly_scale(old, delta)
+                old = _poly_scale(locator, _div(1, delta))
+                locator = new
+            locator = _poly_add(locator, _poly_scale(old, delta))
+    while locator and locator[0] == 0:
+        locator.pop(0)
+    errors = len(locator) - 1
+    if errors * 2 > nsym:
+        return -1
+
+    # Chien search: the roots of the locator give the error positions
+    n = len(block)
+    reverse = locator[::-1]
+    positions = [n - 1 - i for i in range(n) if _poly_eval(reverse, _pow(2, i)) == 0]
+    if len(positions) != errors:
+        return -1
+
+    # Forney: error magnitudes
+    coefficients = [n - 1 - p for p in positions]
+    errata = [1]
+    for c in coefficients:
+        errata = _poly_mul(errata, [_pow(2, c), 1])
+    product = _poly_mul(syndromes[::-1] + [0], errata)
+    evaluator = product[len(product) - len(errata):]
+    xs = [_pow(2, c) for c in coefficients]
+    for i, x in enumerate(xs):
+        x_inv = _div(1, x)
+        derivative = 1
+        for j, other in enumerate(xs):
+            if j != i:
+                derivative = _mul(derivative, 1 ^ _mul(x_inv, other))
+        if derivative == 0:
+            return -1
+        y = _mul(x, _poly_eval(evaluator, x_inv))
+        block[positions[i]] ^= _div(y, derivative)
+
+    if _rs_parity(block[:-nsym], nsym) != bytes(block[-nsym:]):
+        return -1
+    return errors
+
+def _rs_chunks(nbytes: int, nsym: int) -> list:
+    """Splits nbytes message bytes into Reed-Solomon blocks of up to 255 - nsym bytes."""
+    return _blocks(nbytes, RS_BLOCK - nsym) if nbytes else [0]
+
+# ---------- codewords ----------
+
+def _code(code: str) -> tuple:
+    """Returns (kind, parameter) of a code name.
+    Raises:
+        ValueError: If the code is unknown.
+    """
+    if code not in codes:
+        raise ValueError(f"unknown FEC code: {code!r}")
+    return codes[code]
+
+def _redundancy_bytes(kind: str, param: int, nbits: int) -> int:
+    if kind == "hamming":
+        return len(_blocks(nbits, param))
+    return param * len(_rs_chunks((nbits + 7) // 8, param))
+
+def _data_bits(kind: str, param: int, ncodebits: int) -> int:
+    if kind == "hamming":
+        return ncodebits - 8 * -(-ncodebits // (param + 8))
+    return ncodebits - 8 * param * max(1, -(-((ncodebits + 7) // 8) // RS_BLOCK))
+
+def codeword_bits(code: str, nbits: int) -> int:
+    """
+    Returns the codeword length for nbits data bits.
+    Args:
+        code (str): A key of 'codes'.
+        nbits (int): Data length in bits.
+    Returns:
+        int: nbits plus the check bits of every block.
+    """
+    kind, param = _code(code)
+    return nbits + 8 * _redundancy_bytes(kind, param, nbits)
+
+def data_bits(code: str, ncodebits: int) -> int:
+    """
+    Returns the data length of a codeword (the inverse of codeword_bits).
+    Args:
+        code (str): A key of 'codes'.
+        ncodebits (int): Codeword length in bits.
+    Returns:
+        int: The number of data bits.
+    """
+    kind, param = _code(code)
+    return _data_bits(kind, param, ncodebits)
+
+def check_bits(code: str, codeword_size: int) -> int:
+    """
+    Returns how many bits of a codeword_size-bit frame the code takes when the data fills the rest.
+    Args:
+        code (str): A key of 'codes'.
+        codeword_size (int): Frame size in bits.
+    Returns:
+        int: codeword_size minus the largest data length whose codeword fits.
+    """
+    nbits = data_bits(code, codeword_size)
+    while codeword_bits(code, nbits + 1) <= codeword_size:
+        nbits += 1
+    while nbits > 0 and codeword_bits(code, nbits) > codeword_size:
+        nbits -= 1
+    return codeword_size - nbits
+
+def _encode(kind: str, param: int, data: bytes, nbits: int) -> bytes:
+    if nbits == 0:
+        return b""
+    if kind == "hamming":
+        checks = _hamming_encode(int.from_bytes(data, 'big'), nbits, param)
+    else:
+        view = memoryview(data)
+        checks = b"".join(_rs_parity(view[start:start + size], param)
+                          for start, size in zip(range(0, len(view), RS_BLOCK - param), _rs_chunks(len(view), param)))
+    return bytes(data) + checks
+
+def _decode(kind: str, param: int, codeword: bytes, ncodebits: int) -> tuple:
+    if ncodebits == 0:
+        return b"", 0, 0
+    nbits = _data_bits(kind, param, ncodebits)
+    split = len(codeword) - (ncodebits - nbits) // 8
+    data, checks = codeword[:split], codeword[split:]
+
+    if kind == "hamming":
+        value, corrected = _hamming_decode(int.from_bytes(data, 'big'), nbits, checks, param)
+        if corrected <= 0:
+            return bytes(data), nbits, corrected
+        return value.to_bytes(len(data), 'big'), nbits, corrected
+
+    corrected = 0
+    out = bytearray(data)
+    starts = range(0, len(data), RS_BLOCK - param)
+    for i, (start, size) in enumerate(zip(starts, _rs_chunks(len(data), param))):
+        parity = bytes(checks[i*param:(i + 1)*param])
+        expected = _rs_parity(out[start:start + size], param)
+        if expected == parity:
+            continue
+        block = list(out[start:start + size]) + list(parity)
+        fixed = _rs_correct(block, param, bytes(x ^ y for x, y in zip(expected, parity)))
+        if fixed < 0:
+            return bytes(data), nbits, -1
+        out[start:start + size] = bytes(block[:size])
+        corrected += fixed
+    if nbits % 8 and out and out[0] >> (nbits % 8):
+        return bytes(data), nbits, -1  # the correction landed in the padding of the first byte
+    return bytes(out), nbits, corrected
+
+def generate_fec_bytes(data: bytes, code: str, nbits: int = None) -> bytes:
+    """
+    Encodes packed data (see bits.py).
+    Args:
+        data (bytes): The packed data.
+        code (str): A key of 'codes'.
+        nbits (int, optional): Bit length of the data. Defaults to 8*len(data).
+    Returns:
+        bytes: The packed codeword of codeword_bits(code, nbits) bits: the data followed by the check bytes.
+    """
+    kind, param = _code(code)
+    if nbits is None:
+        nbits = 8 * len(data)
+    return _encode(kind, param, data, nbits)
+
+def decode_fec_bytes(codeword: bytes, code: str, nbits: int = None) -> tuple:
+    """
+    Corrects and strips a packed codeword.
+    Args:
+        codeword (bytes): The packed codeword.
+        code (str): A key of 'codes'.
+        nbits (int, optional): Bit length of the codeword. Defaults to 8*len(codeword).
+    Returns:
+        tuple: (data, data_nbits, corrected) with the packed, corrected data and the number of corrected bits
+            (SECDED) or bytes (RS); corrected is -1 if an error was detected that the code cannot correct,
+            in which case data is returned as received.
+    """
+    kind, param = _code(code)
+    if nbits is None:
+        nbits = 8 * len(codeword)
+    return _decode(kind, param, codeword, nbits)
+
+def generate_many(frames, code: str, lengths = None) -> list:
+    """
+    Encodes many packed frames with one code.
+    Args:
+        frames (iterable of bytes): The packed frames.
+        code (str): A key of 'codes'.
+        lengths (iterable of int, optional): Bit length of every frame. Defaults to 8*len(frame).
+    Returns:
+        list: The packed codewords, in order.
+    """
+    kind, param = _code(code)
+    if lengths is None:
+        return [_encode(kind, param, frame, 8 * len(frame)) for frame in frames]
+    return [_encode(kind, param, frame, nbits) for frame, nbits in zip(frames, lengths)]
+
+def decode_many(codewords, code: str, lengths = None) -> list:
+    """
+    Corrects many packed codewords with one code.
+    Args:
+        codewords (iterable of bytes): The packed codewords.
+        code (str): A key of 'codes'.
+        lengths (iterable of int, optional): Bit length of every codeword. Defaults to 8*len(codeword).
+    Returns:
+        list: (data, data_nbits, corrected) for every codeword, as decode_fec_bytes.
+    """
+    kind, param = _code(code)
+    if lengths is None:
+        return [_decode(kind, param, codeword, 8 * len(codeword)) for codeword in codewords]
+    return [_decode(kind, param, codeword, nbits) for codeword, nbits in zip(codewords, lengths)]
@@ -0,0 +1,165 @@
+"""
+framing.py
+The frame layout shared by sender.py and reciever.py: the header fields, the frame size and, per method, the width
+of the check field and of the payload between them. Both sides build a FrameLayout from the same frame size
+(--frame-size), so they agree on where the payload of a codeword starts and ends.
+A codeword is laid out as
+    header fields | payload | padding | check
+The header fields are fixed strings (the SRC and DEST addresses). The check field is the checksum (16 bits), the CRC
+remainder (the polynomial's degree) or the FEC redundancy of the frame. The payload takes what is left of the frame,
+rounded down to whole bytes, and zero padding bits make up the difference, so every full codeword is exactly the frame
+size whatever the method, and payloads can be cut and written as whole bytes (see read_payloads in sender.py and
+reassembly.py). The padding is covered by the check field like the rest of the frame.
+Classes:
+    Field(name: str, value: str)
+        One header field, as a '0'/'1' string.
+    FrameLayout(frame_bytes: int = DEFAULT_FRAME_BYTES, fields: tuple = FIELDS)
+        The layout of frames of one size: check_bits(), padding_bits(), payload_bits() per method, frame() to build
+        the data of a frame and payload() / split() to take a received one apart.
+Attributes:
+    SRC_ADDR, DEST_ADDR (str): The 48-bit addresses of the default header.
+    FIELDS (tuple): The default header fields.
+    DEFAULT_FRAME_BYTES (int): 64 bytes, the original frame size.
+    MIN_FRAME_BYTES, MAX_FRAME_BYTES (int): Supported frame sizes, up to 9000-byte jumbo frames.
+    DEFAULT (FrameLayout): The layout of the default frame size.
+Notes:
+    - The last frame of a file carries a shorter payload, with the same header and padding; its check field has the
+      method's width, except for FEC, whose redundancy depends on the data length (see fec.codeword_bits).
+    - SEC-DED only encodes whole 64-bit blocks into a full frame, so its full codewords can fall up to one block's
+      codeword short of the frame size (504 of 512 bits for 64-byte frames).
+    - Frame sizes are whole bytes; with the default header the payload and the check field then end on byte
+      boundaries too, except for check widths that are not whole bytes (CRC-10 gets 6 padding bits).
+"""
+from collections import namedtuple
+import bits
+import checksum
+import crc
+import fec
+
+Field = namedtuple("Field", ["name", "value"])
+
+SRC_ADDR = "000000010000000100000001000000010000000100000001"
+DEST_ADDR = "000000100000001000000010000000100000001000000010"
+FIELDS = (Field("SRC", SRC_ADDR), Field("DEST", DEST_ADDR))
+
+DEFAULT_FRAME_BYTES = 64
+MIN_FRAME_BYTES = 32
+MAX_FRAME_BYTES = 9000  # jumbo Ethernet frame
+
+class FrameLayout:
+    """
+    The layout of frames of one size.
+    Attributes:
+        frame_bytes (int): Frame size in bytes.
+        codeword_bits (int): Frame size in bits.
+        fields (tuple): The header fields, in order.
+        header (bytes): The packed header.
+        header_bits (int): Bit length of the header.
+    """
+
+    def __init__(self, frame_bytes: int = DEFAULT_FRAME_BYTES, fields: tuple = FIELDS):
+        """
+        Args:
+            frame_bytes (int, optional): Frame size in bytes. Defaults to DEFAULT_FRAME_BYTES.
+            fields (tuple, optional): The header fields. Defaults to FIELDS.
+        Raises:
+            ValueError: If frame_bytes is outside MIN_FRAME_BYTES..MAX_FRAME_BYTES.
+        """
+        if not MIN_FRAME_BYTES <= frame_bytes <= MAX_FRAME_BYTES:
+            raise ValueError(f"frame size must be {MIN_FRAME_BYTES} to {MAX_FRAME_BYTES} bytes, got {frame_bytes}")
+        self.frame_bytes = frame_bytes
+        self.codeword_bits = 8 * frame_bytes
+        self.fields = tuple(fields)
+        value = "".join(field.value for field in self.fields)
+        self.header = bits.to_bytes(value)
+        self.header_bits = len(value)
+
+    def __repr__(self) -> str:
+        return f"FrameLayout({self.frame_bytes})"
+
+    def check_bits(self, method: str, polynomial: str) -> int:
+        """
+        Returns the width of the check field of a full frame: 16 for checksum, the degree for CRC, the redundancy
+        of the code for FEC.
+        """
+        if method == "checksum":
+            return checksum.bit_size
+        if method == "fec":
+            return fec.check_bits(polynomial, self.codeword_bits)
+        return len(crc.polynomials.get(polynomial, polynomial)) - 1
+
+    def padding_bits(self, method: str, polynomial: str) -> int:
+        """Returns the zero bits between payload and check field that round the payload down to whole bytes."""
+        return (self.codeword_bits - self.header_bits - self.check_bits(method, polynomial)) % 8
+
+    def payload_bits(self, method: str, polynomial: str) -> int:
+        """
+        Returns the payload bits of a full frame.
+        Raises:
+            ValueError: If the header and check field leave no room for a payload.
+        """
+        room = self.codeword_bits - self.header_bits - self.check_bits(method, polynomial)
+        if room < 8:
+            name = f"{method} {polynomial}" if polynomial else method
+            raise ValueError(f"{self.frame_bytes}-byte frames leave no room for a payload with {name}")
+        return room - room % 8
+
+    def frame(self, payload: bytes, nbits: int, padding: int = 0) -> tuple:
+        """
+        Builds the data of a frame: the header, the payload and `padding` zero bits (the codeword without its check field).
+        Args:
+            payload (bytes): The packed payload (see bits.py).
+            nbits (int): Bit length of the payload.
+            padding (int, optional): Padding bits, padding_bits() of the method. Defaults to 0.
+        Returns:
+            tuple: (frame_data, nbits), the packed frame data and its bit length.
+        """
+        if nbits % 8 == 0 and padding == 0:
+            return bits.concat(self.header, self.header_bits, payload, nbits), self.header_bits + nbits
+        value = (int.from_bytes(self.header, 'big') << nbits | int.from_bytes(payload, 'big')) << padding
+        total = self.header_bits + nbits + padding
+        return value.to_bytes((total + 7) // 8, 'big'), total
+
+    def payload(self, method: str, polynomial: str, data, nbits: int, check: int) -> tuple:
+        """
+        Cuts the payload out of a received frame.
+        Args:
+            method (str): The frame's method.
+            polynomial (str): The frame's polynomial or FEC code.
+            data (bytes | memoryview): The packed codeword, or the corrected data of a FEC frame.
+            nbits (int): Bit length of data.
+            check (int): Width of the check field at the end of data (0 for corrected FEC data).
+        Returns:
+            tuple: (payload, length), the packed payload (a view of data when byte-aligned, see bits.extract)
+                and its bit length.
+        """
+        length = nbits - check - self.padding_bits(method, polynomial) - self.header_bits
+        return bits.extract(data, nbits, self.header_bits, length), length
+
+    def frame_check_bits(self, method: str, polynomial: str, nbits: int) -> int:
+        """Returns the width of the check field of an nbits-bit codeword (shorter frames differ for FEC only)."""
+        if method == "fec" and polynomial in fec.codes:
+            return nbits - fec.data_bits(polynomial, nbits)
+        return self.check_bits(method, polynomial)
+
+    def split(self, method: str, polynomial: str, codeword, nbits: int) -> list:
+        """
+        Takes a received codeword apart for display.
+        Returns:
+            list: (name, '0'/'1' string) for every header field, then "DATA" (the payload), "PAD" and "CHECK".
+        """
+        text = bits.to_bits(codeword, nbits)
+        parts = []
+        pos = 0
+        for field in self.fields:
+            parts.append((field.name, text[pos:pos + len(field.value)]))
+            pos += len(field.value)
+        check = min(self.frame_check_bits(method, polynomial, nbits), nbits - pos)
+        padding = min(self.padding_bits(method, polynomial), nbits - pos - check)
+        end = nbits - check - padding
+        parts.append(("DATA", text[pos:end]))
+        parts.append(("PAD", text[end:end + padding]))
+        parts.append(("CHECK", text[nbits - check:]))
+        return parts
+
+DEFAULT = FrameLayout()
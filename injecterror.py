@@ -7,8 +7,29 @@ Functions:
     injectodderror(data: str) -> str
     undetectable_error(data: str, poly: str, shift: int = 0) -> str
         Flips bits in `data` according to the generator polynomial (`poly`), shifted by `shift`, to produce an undetectable error.
+    injecterror_bytes(data: bytes, nbits: int, errcnt: int = 1) -> bytes
+    injectbursterror_bytes(data: bytes, nbits: int, burstsize: int = 1) -> bytes
+    injectodderror_bytes(data: bytes, nbits: int) -> bytes
+        Packed-data versions (see bits.py) of the injectors above. They draw the same random numbers,
+        so for a given seed they corrupt the same bit positions as their string counterparts.
+Batch injection (many packed frames at once):
+    ber_masks(nbits: int, count: int, ber: float, rng = random) -> list
+        Error masks of a binary symmetric channel with bit error rate `ber`.
+    burst_masks(nbits: int, count: int, length, density: float = 0.4, rng = random) -> list
+        Error masks with one burst per frame, its length fixed or drawn from a distribution.
+    gilbert_elliott_masks(nbits: int, count: int, p_gb: float, p_bg: float, ber_good: float, ber_bad: float, rng = random) -> list
+        Error masks of a two-state Gilbert-Elliott channel running across consecutive frames.
+    apply_masks(frames, masks) -> list
+        XORs every mask into its packed frame.
+    An error mask is an int holding the frame's flipped bits (bit nbits-1-i set = bit i flipped, as in bits.flip).
+    The errors of a whole batch are drawn as one bit stream and then cut into frames. Sparse streams skip directly
+    from one error to the next (geometric gaps), so their cost grows with the number of errors; dense ones
+    (probability >= 1/128, e.g. inside bursts) are built from whole random words, 32 bits of probability precision.
+    `rng` is any random.Random instance (seed it for reproducible runs); the default is the module-level generator.
 '''
+import math
 import random
+import bits
 
 def injecterror(data: str, errcnt:int = 1) -> str:
     """
@@ -73,7 +94,7 @@ def injectodderror(data: str) -> str:
     """
     n = len(data)
     data_list = list(data)
-    flip_count = random.choice([i for i in range(1, n, 2)])  
+    flip_count = random.choice(range(1, n, 2))
     indices = random.sample(range(n), flip_count)
     
     for idx in indices:
@@ -112,3 +133,193 @@ def undetectable_error(data: str, poly: str, shift: int = 0) -> str:
     ]
 
     return ''.join(corrupted)
+
+
+def injecterror_bytes(data: bytes, nbits: int, errcnt: int = 1) -> bytes:
+    """
+    Packed-data version of injecterror.
+
+    Args:
+        data (bytes): The packed binary data.
+        nbits (int): Bit length of the data.
+        errcnt (int, optional): The number of bits to flip. Defaults to 1.
+
+    Returns:
+        bytes: The packed data after injecting the bit errors.
+    """
+    return bits.flip(data, nbits, [random.randint(0, nbits-1) for _ in range(errcnt)])
+
+def injectbursterror_bytes(data: bytes, nbits: int, burstsize: int = 1) -> bytes:
+    """
+    Packed-data version of injectbursterror.
+
+    Args:
+        data (bytes): The packed binary data.
+        nbits (int): Bit length of the data.
+        burstsize (int, optional): The number of consecutive bits to consider for error injection. Defaults to 1.
+
+    Returns:
+        bytes: The packed data after burst error injection.
+    """
+    index = random.randint(0, nbits-burstsize)
+    return bits.flip(data, nbits, [i for i in range(index, index+burstsize) if random.random() < 0.4])
+
+def injectodderror_bytes(data: bytes, nbits: int) -> bytes:
+    """
+    Packed-data version of injectodderror.
+
+    Args:
+        data (bytes): The packed binary data.
+        nbits (int): Bit length of the data.
+
+    Returns:
+        bytes: The packed data after flipping an odd number of bits at random positions.
+    """
+    flip_count = random.choice(range(1, nbits, 2))
+    return bits.flip(data, nbits, random.sample(range(nbits), flip_count))
+
+
+DENSE_THRESHOLD = 1 / 128
+
+def _geometric(rng, p: float) -> int:
+    """Number of error-free bits before the next error on a channel with bit error rate p (0 < p < 1)."""
+    return int(math.log(1.0 - rng.random()) / math.log(1.0 - p))
+
+def _errors(rng, p: float, n: int) -> int:
+    """
+    Draws n bits that are each 1 with probability p, as an int (the first bit is the most significant).
+    """
+    if p <= 0 or n <= 0:
+        return 0
+    if p >= 1:
+        return (1 << n) - 1
+    if p < DENSE_THRESHOLD:
+        stream = bytearray((n + 7) // 8)
+        pos = _geometric(rng, p)
+        while pos < n:
+            stream[pos >> 3] |= 0x80 >> (pos & 7)
+            pos += 1 + _geometric(rng, p)
+        return int.from_bytes(stream, 'big') >> (-n % 8)
+    # Combine uniform words digit by digit of p = 0.d1d2...d32 (binary), least significant digit first:
+    # OR-ing in a word for a 1 digit and AND-ing for a 0 digit halves the distance to 1 or to 0, so every
+    # bit of the result ends up set with probability 0.d1d2...d32.
+    digits = int(p * (1 << 32))
+    if not digits:
+        return 0
+    bits_set = 0
+    for i in range((digits & -digits).bit_length() - 1, 32):
+        word = rng.getrandbits(n)
+        bits_set = bits_set | word if digits >> i & 1 else bits_set & word
+    return bits_set
+
+def _cut(value: int, total: int, sizes) -> list:
+    """Cuts a total-bit int into consecutive pieces of the given sizes (first piece = most significant bits)."""
+    if not total:
+        return [0] * len(sizes)
+    data = (value << (-total % 8)).to_bytes((total + 7) // 8, 'big')
+    pieces = []
+    offset = 0
+    for size in sizes:
+        lo, hi = offset >> 3, (offset + size + 7) >> 3
+        pieces.append((int.from_bytes(data[lo:hi], 'big') >> (8*hi - offset - size)) & ((1 << size) - 1))
+        offset += size
+    return pieces
+
+def _join(pieces: list) -> tuple:
+    """
+    Concatenates (value, size) bit pieces into one (value, size), pairwise so that the cost stays O(n log k).
+    """
+    if not pieces:
+        return 0, 0
+    while len(pieces) > 1:
+        pieces = [(a << sb | b, sa + sb) for (a, sa), (b, sb) in zip(pieces[::2], pieces[1::2])] + pieces[len(pieces) & ~1:]
+    return pieces[0]
+
+def ber_masks(nbits: int, count: int, ber: float, rng = random) -> list:
+    """
+    Draws the error masks of a binary symmetric channel for a batch of frames.
+
+    Args:
+        nbits (int): Bit length of every frame.
+        count (int): Number of frames.
+        ber (float): Probability that any one bit is flipped, independently of the others.
+        rng (random.Random, optional): Random generator. Defaults to the module-level one.
+
+    Returns:
+        list: One error mask per frame (0 for an intact frame).
+    """
+    return _cut(_errors(rng, ber, nbits * count), nbits * count, [nbits] * count)
+
+def burst_masks(nbits: int, count: int, length, density: float = 0.4, rng = random) -> list:
+    """
+    Draws one error burst per frame for a batch of frames.
+
+    Args:
+        nbits (int): Bit length of every frame.
+        count (int): Number of frames.
+        length (int | callable): Burst length, or a function rng -> length drawing it from a distribution
+            (e.g. lambda rng: 1 + int(rng.expovariate(1/8))). Lengths are capped at nbits.
+        density (float, optional): Probability that a bit inside the burst is flipped. Defaults to 0.4, as injectbursterror.
+        rng (random.Random, optional): Random generator. Defaults to the module-level one.
+
+    Returns:
+        list: One error mask per frame.
+
+    Note:
+        Like injectbursterror, the first and last bits of the window are not forced to flip.
+    """
+    sizes = [min(nbits, length(rng) if callable(length) else length) for _ in range(count)]
+    starts = [rng.randint(0, nbits - size) for size in sizes]
+    # all windows are drawn as one stream, laid end to end, and then shifted into place
+    total = sum(sizes)
+    windows = _cut(_errors(rng, density, total), total, sizes)
+    return [window << (nbits - start - size) for window, start, size in zip(windows, starts, sizes)]
+
+def gilbert_elliott_masks(nbits: int, count: int, p_gb: float, p_bg: float, ber_good: float, ber_bad: float,
+                          rng = random, bad: bool = False) -> list:
+    """
+    Draws the error masks of a Gilbert-Elliott channel for a batch of consecutive frames.
+    The channel is a two-state Markov chain evaluated once per bit: in the good state bits are flipped with
+    probability ber_good, in the bad state with ber_bad. The state carries over from one frame to the next,
+    so errors cluster across frame boundaries the way they do on a fading link.
+
+    Args:
+        nbits (int): Bit length of every frame.
+        count (int): Number of frames.
+        p_gb (float): Per-bit probability of moving from the good to the bad state.
+        p_bg (float): Per-bit probability of moving from the bad to the good state.
+        ber_good (float): Bit error rate in the good state.
+        ber_bad (float): Bit error rate in the bad state.
+        rng (random.Random, optional): Random generator. Defaults to the module-level one.
+        bad (bool, optional): Start in the bad state. Defaults to False.
+
+    Returns:
+        list: One error mask per frame.
+    """
+    total = nbits * count
+    segments = []
+    pos = 0
+    while pos < total:
+        leave = p_bg if bad else p_gb
+        # time spent in the current state, drawn in one step instead of bit by bit
+        stay = total - pos if leave <= 0 else 1 + (0 if leave >= 1 else _geometric(rng, leave))
+        stay = min(stay, total - pos)
+        segments.append((_errors(rng, ber_bad if bad else ber_good, stay), stay))
+        pos += stay
+        bad = not bad
+    stream, _ = _join(segments)
+    return _cut(stream, total, [nbits] * count)
+
+def apply_masks(frames, masks) -> list:
+    """
+    Corrupts a batch of packed frames with their error masks.
+
+    Args:
+        frames (iterable of bytes): The packed frames.
+        masks (iterable of int): One error mask per frame, e.g. from ber_masks.
+
+    Returns:
+        list: The corrupted frames; frames whose mask is 0 are returned as is.
+    """
+    return [(int.from_bytes(frame, 'big') ^ mask).to_bytes(len(frame), 'big') if mask else frame
+            for frame, mask in zip(frames, masks)]
@@ -0,0 +1,236 @@
+"""
+metrics.py
+Low-overhead counters, gauges and histograms for the receiver, exposed in the Prometheus text format over
+HTTP or written as periodic JSON snapshots.
+Classes:
+    Histogram(buckets)
+        Counts observations into fixed buckets, with their sum.
+    Registry()
+        Holds the metrics: inc() for counters, set() for gauges, observe() for histograms, value() / total() to read,
+        render() for the Prometheus text format and snapshot() for a JSON-ready dict.
+Functions:
+    serve_http(registry: Registry, host: str, port: int) -> ThreadingHTTPServer
+        Serves GET /metrics (Prometheus text) and GET /metrics.json from a background thread.
+    write_snapshots(registry: Registry, path: str, interval: float, stop: threading.Event) -> threading.Thread
+        Writes a JSON snapshot, with rates since the previous one, every `interval` seconds until stopped.
+Notes:
+    - Updates take one lock acquisition each; callers record per batch of frames, not per frame.
+    - Metrics are keyed by name and a sorted tuple of label items, the label values being strings.
+"""
+import bisect
+import http.server
+import json
+import math
+import threading
+import time
+
+# seconds, from 1 microsecond to 1 second in steps of about x3
+LATENCY_BUCKETS = (1e-6, 3e-6, 1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 0.1, 0.3, 1.0)
+# counts, e.g. frames per read
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+class Histogram:
+    """
+    Counts observations into fixed buckets.
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets, ascending; an implicit +Inf bucket follows.
+        counts (list): Observations per bucket (not cumulative), the last one being +Inf.
+        sum (float): Sum of all observations.
+        count (int): Number of observations.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float, count: int = 1):
+        """Records `count` observations of `value` (e.g. the mean time per frame of a batch of `count` frames)."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += count
+        self.sum += value * count
+        self.count += count
+
+    def cumulative(self) -> list:
+        """Returns (upper bound, observations <= bound) pairs, ending with (inf, count)."""
+        total = 0
+        pairs = []
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            total += n
+            pairs.append((bound, total))
+        return pairs
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _labels(key: tuple, extra: str = "") -> str:
+    items = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        items.append(extra)
+    return "{" + ",".join(items) + "}" if items else ""
+
+def _bound(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(value)
+
+class Registry:
+    """
+    The metrics of one process. Every method is thread-safe.
+    Attributes:
+        started (float): time.time() at creation.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def describe(self, name: str, text: str):
+        """Sets the HELP text of a metric."""
+        self._help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Adds value to a counter."""
+        key = _key(labels)
+        with self._lock:
+            family = self._counters.setdefault(name, {})
+            family[key] = family.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Sets a gauge."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name: str, value: float, count: int = 1, buckets: tuple = LATENCY_BUCKETS, **labels):
+        """Records observations in a histogram, created with `buckets` on first use."""
+        key = _key(labels)
+        with self._lock:
+            family = self._histograms.setdefault(name, {})
+            histogram = family.get(key)
+            if histogram is None:
+                histogram = family[key] = Histogram(buckets)
+            histogram.observe(value, count)
+
+    def value(self, name: str, **labels) -> float:
+        """Returns the current value of a counter or gauge for one label set (0 if it was never recorded)."""
+        key = _key(labels)
+        with self._lock:
+            family = self._counters.get(name) or self._gauges.get(name) or {}
+            return family.get(key, 0)
+
+    def total(self, name: str) -> float:
+        """Returns the sum of a counter over all its label sets (0 if it was never incremented)."""
+        with self._lock:
+            return sum(self._counters.get(name, {}).values())
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, families in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, family in sorted(families.items()):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in sorted(family.items()):
+                        lines.append(f"{name}{_labels(key)} {value}")
+            for name, family in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(family.items()):
+                    for bound, n in histogram.cumulative():
+                        le = 'le="' + _bound(bound) + '"'
+                        lines.append(f"{name}_bucket{_labels(key, le)} {n}")
+                    lines.append(f"{name}_sum{_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Returns every metric as a JSON-ready dict: time, uptime_s, counters, gauges and histograms."""
+        now = time.time()
+        with self._lock:
+            entry = lambda key, **fields: dict(labels=dict(key), **fields)
+            return {
+                "time": now,
+                "uptime_s": now - self.started,
+                "counters": {name: [entry(k, value=v) for k, v in sorted(family.items())]
+                             for name, family in sorted(self._counters.items())},
+                "gauges": {name: [entry(k, value=v) for k, v in sorted(family.items())]
+                           for name, family in sorted(self._gauges.items())},
+                "histograms": {name: [entry(k, count=h.count, sum=h.sum,
+                                            buckets={_bound(b): n for b, n in h.cumulative()})
+                                      for k, h in sorted(family.items())]
+                               for name, family in sorted(self._histograms.items())},
+            }
+
+def serve_http(registry: Registry, host: str, port: int) -> http.server.ThreadingHTTPServer:
+    """
+    Starts an HTTP endpoint for the metrics in a daemon thread.
+    Args:
+        registry (Registry): The metrics to expose.
+        host (str): Address to bind.
+        port (int): Port to bind.
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body, kind = registry.render().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body, kind = json.dumps(registry.snapshot()).encode("utf-8"), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes are not worth a line each
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def write_snapshots(registry: Registry, path: str, interval: float, stop: threading.Event) -> threading.Thread:
+    """
+    Appends a JSON snapshot (one object per line) to a file every `interval` seconds, and once more when stopped.
+    Each snapshot carries "rates": the per-second increase of every counter since the previous snapshot.
+    Args:
+        registry (Registry): The metrics to write.
+        path (str): Output file; "-" writes to stdout.
+        interval (float): Seconds between snapshots.
+        stop (threading.Event): Set it to write the final snapshot and end the thread.
+    Returns:
+        threading.Thread: The started daemon thread; join it after setting stop.
+    """
+    def run():
+        previous = (registry.started, {})
+        while True:
+            stopped = stop.wait(interval)
+            snapshot = registry.snapshot()
+            totals = {name: sum(e["value"] for e in family) for name, family in snapshot["counters"].items()}
+            elapsed = snapshot["time"] - previous[0]
+            snapshot["rates"] = {name: (value - previous[1].get(name, 0)) / elapsed if elapsed else 0.0
+                                 for name, value in totals.items()}
+            previous = (snapshot["time"], totals)
+            line = json.dumps(snapshot)
+            if path == "-":
+                print(line, flush=True)
+            else:
+                with open(path, "a") as f:
+                    f.write(line + "\n")
+            if stopped:
+                return
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,212 @@
+"""
+netem.py
+A local channel emulator for UDP transfers (sender.py --udp): a proxy between the sender and the receiver that
+drops, delays, reorders and duplicates datagrams, named after the Linux netem queueing discipline it imitates.
+Over loopback TCP a frame is never lost or reordered, so only the injected bit errors reach the receiver; through
+this proxy the receiver also sees the loss and reordering of a real network, on a single machine.
+Usage:
+    python netem.py [--listen PORT] [--forward PORT] [--loss P] [--delay MS] [--jitter MS] [--reorder P]
+                    [--reorder-delay MS] [--duplicate P] [--seed N] [--transfers N]
+    python sender.py data.txt crc CRC-32 --udp --port 3001     (with reciever.py --udp on port 3000)
+Arguments:
+    --listen PORT       Port the sender sends to (default 3001).
+    --forward PORT      Port of the receiver (default 3000, reciever.py PORT).
+    --loss P            Probability of dropping a datagram (default 0).
+    --delay MS          Delay of every datagram in milliseconds (default 0).
+    --jitter MS         Uniform random variation of the delay, +- MS (default 0); datagrams whose delays differ by
+                        more than the gap between them arrive out of order.
+    --reorder P         Probability of holding a datagram back by --reorder-delay more, so later ones overtake it.
+    --reorder-delay MS  Extra delay of reordered datagrams (default 10 ms).
+    --duplicate P       Probability of delivering a datagram twice (default 0).
+    --seed N            Seed of the random impairments (default: unseeded).
+    --transfers N       Exit after N transfers have ended (default 0: run until interrupted).
+Classes:
+    Channel(loss, delay, jitter, reorder, reorder_delay, duplicate, rng)
+        The impairments: schedule() returns the delivery times of one datagram ([] if it is dropped).
+Functions:
+    relay(channel, listen, forward, transfers) -> dict
+        Runs the proxy and returns its statistics.
+Notes:
+    - Every sender address gets its own socket towards the receiver, so the receiver can tell concurrent
+      transfers apart by their source address, as it would tell the senders themselves apart.
+    - An empty datagram ends a transfer (see sender.py --udp). It is never dropped and is delivered after the
+      last datagram of its transfer still held back, so it cannot overtake the data.
+    - Datagrams from the receiver are passed back to the sender unimpaired.
+    - Delays are kept with a heap and a single select() loop; their precision is that of select() and of the
+      scheduler, about a millisecond.
+"""
+import argparse
+import heapq
+import random
+import select
+import socket
+import time
+
+HOST = '127.0.0.1'
+LISTEN_PORT = 3001
+FORWARD_PORT = 3000
+MAX_DATAGRAM = 65535
+RCVBUF = 1 << 22  # receive buffer requested for the sender's side, so bursts are not dropped before the channel
+
+class Channel:
+    """
+    The impairments of the emulated channel.
+    Attributes:
+        loss, reorder, duplicate (float): Probabilities per datagram.
+        delay, jitter, reorder_delay (float): Seconds.
+        rng (random.Random): Source of the random decisions.
+    """
+
+    def __init__(self, loss: float = 0.0, delay: float = 0.0, jitter: float = 0.0, reorder: float = 0.0,
+                 reorder_delay: float = 0.01, duplicate: float = 0.0, rng: random.Random = None):
+        """
+        Raises:
+            ValueError: If a probability is outside 0..1 or a delay is negative.
+        """
+        for name, p in (("loss", loss), ("reorder", reorder), ("duplicate", duplicate)):
+            if not 0 <= p <= 1:
+                raise ValueError(f"{name} must be a probability from 0 to 1, got {p}")
+        if min(delay, jitter, reorder_delay) < 0:
+            raise ValueError("delays must not be negative")
+        self.loss = loss
+        self.delay = delay
+        self.jitter = jitter
+        self.reorder = reorder
+        self.reorder_delay = reorder_delay
+        self.duplicate = duplicate
+        self.rng = rng or random.Random()
+
+    def schedule(self, now: float) -> list:
+        """
+        Decides the fate of one datagram.
+        Args:
+            now (float): Arrival time (time.monotonic()).
+        Returns:
+            list: The times to deliver it at: [] if it is dropped, two times if it is duplicated.
+        """
+        if self.loss and self.rng.random() < self.loss:
+            return []
+        copies = 2 if self.duplicate and self.rng.random() < self.duplicate else 1
+        times = []
+        for _ in range(copies):
+            due = now + self.delay
+            if self.jitter:
+                due += self.rng.uniform(-self.jitter, self.jitter)
+            if self.reorder and self.rng.random() < self.reorder:
+                due += self.reorder_delay
+            times.append(max(now, due))
+        return times
+
+def relay(channel: Channel, listen: int = LISTEN_PORT, forward: int = FORWARD_PORT, transfers: int = 0) -> dict:
+    """
+    Forwards datagrams from HOST:listen to HOST:forward through the channel until interrupted or until
+    `transfers` transfers have ended, printing the statistics of every transfer as it ends.
+    Args:
+        channel (Channel): The impairments.
+        listen (int, optional): Port to receive the sender's datagrams on. Defaults to LISTEN_PORT.
+        forward (int, optional): Port of the receiver. Defaults to FORWARD_PORT.
+        transfers (int, optional): Transfers to relay before returning; 0 relays forever. Defaults to 0.
+    Returns:
+        dict: Totals over all transfers: received, dropped, duplicated, delivered (datagrams) and transfers.
+    """
+    totals = {"received": 0, "dropped": 0, "duplicated": 0, "delivered": 0, "transfers": 0}
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF)
+    server.bind((HOST, listen))
+    print(f"Relaying {HOST}:{listen} -> {HOST}:{forward}")
+    upstream = {}   # sender address -> socket towards the receiver
+    senders = {}    # upstream socket -> sender address
+    stats = {}      # sender address -> statistics of its current transfer
+    last = {}       # sender address -> latest delivery time scheduled
+    ending = set()  # sender addresses whose end of transfer is queued
+    queue = []      # (due, order, sender address, datagram)
+    order = 0
+    try:
+        while not transfers or totals["transfers"] < transfers:
+            timeout = max(0.0, queue[0][0] - time.monotonic()) if queue else None
+            readable, _, _ = select.select([server] + list(senders), [], [], timeout)
+            now = time.monotonic()
+            for s in readable:
+                if s is not server:
+                    # replies of the receiver go back unimpaired
+                    try:
+                        server.sendto(s.recv(MAX_DATAGRAM), senders[s])
+                    except ConnectionRefusedError:
+                        pass  # an earlier datagram found no receiver listening
+                    continue
+                data, addr = server.recvfrom(MAX_DATAGRAM)
+                if addr not in upstream:
+                    up = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    up.connect((HOST, forward))
+                    upstream[addr] = up
+                    senders[up] = addr
+                if addr not in stats:
+                    if not data:
+                        continue  # a repeated end of a transfer that is over
+                    stats[addr] = {"received": 0, "dropped": 0, "duplicated": 0, "delivered": 0}
+                    last[addr] = now
+                counts = stats[addr]
+                if not data:
+                    if addr in ending:
+                        continue
+                    ending.add(addr)
+                    times = [last[addr]]
+                else:
+                    counts["received"] += 1
+                    times = channel.schedule(now)
+                    counts["dropped"] += not times
+                    counts["duplicated"] += len(times) > 1
+                for due in times:
+                    last[addr] = max(last[addr], due)
+                    heapq.heappush(queue, (due, order, addr, data))
+                    order += 1
+            now = time.monotonic()
+            while queue and queue[0][0] <= now:
+                _, _, addr, data = heapq.heappop(queue)
+                try:
+                    upstream[addr].send(data)
+                except ConnectionRefusedError:
+                    pass  # the receiver is not listening (yet); the datagram is lost
+                if data:
+                    stats[addr]["delivered"] += 1
+                    continue
+                counts = stats.pop(addr)
+                ending.discard(addr)
+                for key, value in counts.items():
+                    totals[key] += value
+                totals["transfers"] += 1
+                print(f"[{addr}] {counts['received']} datagrams: {counts['dropped']} dropped, "
+                      f"{counts['duplicated']} duplicated, {counts['delivered']} delivered")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        for up in upstream.values():
+            up.close()
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(usage="python netem.py [--listen PORT] [--forward PORT] [--loss P] [--delay MS] [--jitter MS] [--reorder P] [--reorder-delay MS] [--duplicate P] [--seed N] [--transfers N]")
+    parser.add_argument("--listen", type=int, default=LISTEN_PORT, help=f"port the sender sends to (default {LISTEN_PORT})")
+    parser.add_argument("--forward", type=int, default=FORWARD_PORT, help=f"port of the receiver (default {FORWARD_PORT})")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability of dropping a datagram")
+    parser.add_argument("--delay", type=float, default=0.0, help="delay in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="delay variation in milliseconds, +-")
+    parser.add_argument("--reorder", type=float, default=0.0, help="probability of holding a datagram back")
+    parser.add_argument("--reorder-delay", type=float, default=10.0, help="extra delay of reordered datagrams in ms (default 10)")
+    parser.add_argument("--duplicate", type=float, default=0.0, help="probability of delivering a datagram twice")
+    parser.add_argument("--seed", type=int, help="seed of the impairments")
+    parser.add_argument("--transfers", type=int, default=0, help="exit after N transfers (0 = run until interrupted)")
+    args = parser.parse_args()
+
+    try:
+        channel = Channel(args.loss, args.delay / 1000, args.jitter / 1000, args.reorder, args.reorder_delay / 1000,
+                          args.duplicate, random.Random(args.seed))
+    except ValueError as e:
+        parser.error(str(e))
+    totals = relay(channel, args.listen, args.forward, args.transfers)
+    print(f"{totals['transfers']} transfers, {totals['received']} datagrams: {totals['dropped']} dropped, "
+          f"{totals['duplicated']} duplicated, {totals['delivered']} delivered")
+
+if __name__ == "__main__":
+    main()
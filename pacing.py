@@ -0,0 +1,253 @@
+"""
+pacing.py
+Send-side batching and rate control for sender.py. Encoded messages are coalesced into one buffer and written to
+the socket in large pieces: the buffer is flushed once it holds flush_bytes, or once its oldest message has waited
+flush_delay seconds. A token bucket can pace the writes to a target rate, and the writer counts its send calls,
+so a transfer can report its throughput and the system calls it needed per MB.
+Classes:
+    TokenBucket(rate: float, burst: int = DEFAULT_BURST)
+        Rate limiter: wait(n) sleeps until n more bytes may go out at `rate` bytes per second.
+    Writer(s: socket.socket, buffer: bytearray, flush_bytes: int = FLUSH_BYTES, flush_delay: float = FLUSH_DELAY,
+           bucket: TokenBucket = None)
+        Coalesces messages encoded into `buffer` and sends them in large writes; stats() reports the transfer.
+    DatagramWriter(s: socket.socket, buffer: bytearray, messages: int = 1, flush_delay: float = FLUSH_DELAY,
+                   bucket: TokenBucket = None)
+        The Writer of a UDP socket: `messages` messages per datagram, each datagram sent with one send() call.
+Functions:
+    set_nodelay(s, on: bool = True)
+        Turns Nagle's algorithm off (TCP_NODELAY), so small writes leave at once.
+    set_cork(s, on: bool = True) -> bool
+        Holds partial TCP segments back until the socket is uncorked (TCP_CORK, Linux only).
+Attributes:
+    FLUSH_BYTES (int): Default flush size, 64 KiB.
+    FLUSH_DELAY (float): Default latency bound in seconds.
+    DEFAULT_BURST (int): Default token bucket size in bytes.
+    MAX_DATAGRAM (int): Largest UDP payload over IPv4.
+Notes:
+    - The latency bound is checked as messages are added: a buffer is not flushed while the sender is waiting
+      for its next codeword, only when that codeword arrives (or at close()).
+    - With a bucket, a flush is sent in pieces of at most `burst` bytes, each waiting for its tokens, so the
+      rate holds on the scale of one burst rather than one flush.
+    - Every send() call is one system call; a flush needs more than one when the socket's send buffer is full
+      (partial writes), so syscalls per MB also shows how often the receiver held the sender back.
+    - A datagram is never split: a DatagramWriter paces it whole, and starts a new datagram early rather than
+      grow one past MAX_DATAGRAM. Python has no sendmmsg(), so batching frames into datagrams is what cuts
+      the system calls of a UDP transfer.
+"""
+import socket
+import time
+
+FLUSH_BYTES = 1 << 16
+FLUSH_DELAY = 0.05
+DEFAULT_BURST = 1 << 14
+MAX_DATAGRAM = 65507
+
+class TokenBucket:
+    """
+    A token bucket holding up to `burst` bytes, refilled at `rate` bytes per second.
+    Attributes:
+        rate (float): Refill rate in bytes per second.
+        burst (int): Bucket size in bytes.
+        tokens (float): Bytes that may go out now; negative while a send is paid off.
+        waited (float): Seconds spent sleeping in wait().
+    """
+
+    def __init__(self, rate: float, burst: int = DEFAULT_BURST):
+        """
+        Args:
+            rate (float): Refill rate in bytes per second.
+            burst (int, optional): Bucket size in bytes. Defaults to DEFAULT_BURST.
+        Raises:
+            ValueError: If rate or burst is not positive.
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"rate and burst must be positive, got {rate} and {burst}")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.waited = 0.0
+        self._stamp = time.monotonic()
+
+    def wait(self, n: int) -> float:
+        """
+        Takes n bytes' worth of tokens, sleeping first if the bucket does not hold them.
+        Returns:
+            float: Seconds slept.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+        self.tokens -= n
+        if self.tokens >= 0:
+            return 0.0
+        delay = -self.tokens / self.rate
+        time.sleep(delay)
+        self.waited += delay
+        return delay
+
+class Writer:
+    """
+    Coalesces encoded messages into large socket writes.
+    Messages are encoded straight into `buffer` at `pos` (e.g. with protocol.encode_into) and committed with
+    advance(), or copied in with write().
+    Attributes:
+        buffer (bytearray): The messages not sent yet, up to pos; it may grow past its initial length.
+        pos (int): End of the queued messages in buffer.
+        messages (int): Messages added.
+        flushes (int): Flushes that sent data.
+        syscalls (int): send() calls.
+        bytes (int): Bytes sent.
+    """
+
+    def __init__(self, s: socket.socket, buffer: bytearray, flush_bytes: int = FLUSH_BYTES,
+                 flush_delay: float = FLUSH_DELAY, bucket: TokenBucket = None):
+        """
+        Args:
+            s (socket.socket): The connected socket.
+            buffer (bytearray): The buffer to coalesce into, reused for every flush.
+            flush_bytes (int, optional): Flush once this many bytes are queued. Defaults to FLUSH_BYTES.
+            flush_delay (float, optional): Flush once the oldest queued message is this many seconds old
+                (0 for no bound). Defaults to FLUSH_DELAY.
+            bucket (TokenBucket, optional): Paces the writes; None sends as fast as the socket takes them.
+        """
+        self.s = s
+        self.buffer = buffer
+        self.pos = 0
+        self.flush_bytes = flush_bytes
+        self.flush_delay = flush_delay
+        self.bucket = bucket
+        self.messages = 0
+        self.flushes = 0
+        self.syscalls = 0
+        self.bytes = 0
+        self._oldest = None
+        self._start = None
+        self._end = None
+
+    def advance(self, end: int):
+        """Commits the message encoded into buffer[pos:end] and flushes if the buffer is full or old enough."""
+        now = time.monotonic()
+        if self._oldest is None:
+            self._oldest = now
+            if self._start is None:
+                self._start = now
+        self.pos = end
+        self.messages += 1
+        if end >= self.flush_bytes or (self.flush_delay and now - self._oldest >= self.flush_delay):
+            self.flush()
+
+    def write(self, message: bytes):
+        """Queues one encoded message."""
+        end = self.pos + len(message)
+        self.buffer[self.pos:end] = message
+        self.advance(end)
+
+    def flush(self):
+        """Sends the queued messages."""
+        if not self.pos:
+            return
+        step = self.bucket.burst if self.bucket is not None else self.pos
+        with memoryview(self.buffer) as view:
+            sent = 0
+            while sent < self.pos:
+                piece = view[sent:min(self.pos, sent + step)]
+                if self.bucket is not None:
+                    self.bucket.wait(len(piece))
+                while piece:
+                    n = self.s.send(piece)
+                    self.syscalls += 1
+                    piece = piece[n:]
+                    sent += n
+        self.bytes += self.pos
+        self.flushes += 1
+        self.pos = 0
+        self._oldest = None
+
+    def close(self):
+        """Sends what is still queued and stops the clock of stats()."""
+        self.flush()
+        self._end = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        Returns the transfer statistics: bytes, messages, flushes, syscalls, seconds (first message to close(),
+        or to now), throughput (bytes per second), syscalls_per_mb and paced (seconds slept by the bucket).
+        """
+        end = self._end or time.monotonic()
+        seconds = end - self._start if self._start is not None else 0.0
+        return {
+            "bytes": self.bytes,
+            "messages": self.messages,
+            "flushes": self.flushes,
+            "syscalls": self.syscalls,
+            "seconds": seconds,
+            "throughput": self.bytes / seconds if seconds else 0.0,
+            "syscalls_per_mb": self.syscalls / (self.bytes / 1e6) if self.bytes else 0.0,
+            "paced": self.bucket.waited if self.bucket is not None else 0.0,
+        }
+
+class DatagramWriter(Writer):
+    """
+    Packs messages into datagrams of a connected UDP socket.
+    Attributes:
+        per_datagram (int): Messages per datagram.
+        (the other attributes are those of Writer; flushes counts datagrams)
+    """
+
+    def __init__(self, s: socket.socket, buffer: bytearray, messages: int = 1, flush_delay: float = FLUSH_DELAY,
+                 bucket: TokenBucket = None):
+        """
+        Args:
+            s (socket.socket): The connected UDP socket.
+            buffer (bytearray): The buffer to pack datagrams in.
+            messages (int, optional): Messages per datagram. Defaults to 1.
+            flush_delay (float, optional): Send a datagram that is not full once its first message is this many
+                seconds old (0 for no bound). Defaults to FLUSH_DELAY.
+            bucket (TokenBucket, optional): Paces the datagrams; None sends as fast as the socket takes them.
+        """
+        super().__init__(s, buffer, MAX_DATAGRAM, flush_delay, bucket)
+        self.per_datagram = messages
+        self._count = 0
+
+    def advance(self, end: int):
+        """Commits the message encoded into buffer[pos:end] and sends the datagram once it is full."""
+        if end > MAX_DATAGRAM and self.pos:
+            # the message does not fit: send the datagram without it, then start the next one with it
+            start = self.pos
+            self.flush()
+            self.buffer[:end - start] = self.buffer[start:end]
+            end -= start
+        self._count += 1
+        super().advance(end)
+        if self._count >= self.per_datagram:
+            self.flush()
+
+    def flush(self):
+        """Sends the queued messages as one datagram."""
+        if not self.pos:
+            return
+        if self.bucket is not None:
+            self.bucket.wait(self.pos)
+        with memoryview(self.buffer) as view:
+            self.s.send(view[:self.pos])
+        self.syscalls += 1
+        self.bytes += self.pos
+        self.flushes += 1
+        self.pos = 0
+        self._count = 0
+        self._oldest = None
+
+def set_nodelay(s: socket.socket, on: bool = True):
+    """Turns Nagle's algorithm off (on=True) or back on, so small writes are not held for an ACK."""
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(on))
+
+def set_cork(s: socket.socket, on: bool = True) -> bool:
+    """
+    Corks the socket, so the kernel only sends full segments, or uncorks it, sending what is held back.
+    Returns:
+        bool: False if the platform has no TCP_CORK (the socket is left as it is).
+    """
+    if not hasattr(socket, "TCP_CORK"):
+        return False
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, int(on))
+    return True
@@ -0,0 +1,317 @@
+"""
+protocol.py
+This module implements the two wire formats spoken between sender.py and reciever.py.
+Text mode (the original format) sends one UTF-8 line per frame:
+    "<method>:<polynomial>:<error>:<codeword>\n"
+with the codeword spelled out as '0'/'1' characters.
+Binary mode sends a fixed 8-byte header followed by the packed codeword (see bits.py):
+    magic (1 byte, 0xF7) | method id (1) | polynomial id (1) | error flag (1) | codeword length in bits (4, big-endian)
+The magic byte is never the first byte of a text message, so a receiver can tell the two formats apart
+from the first byte of a connection.
+ARQ mode (see arq.py) sends binary frames with a sequence number, under their own magic byte:
+    magic (1 byte, 0xF8) | method id (1) | polynomial id (1) | error flag (1) | sequence number (4) | length in bits (4)
+and the receiver answers every frame on the same connection with a reply:
+    magic (1 byte, 0xF9) | kind (1: ACK, 2: NAK) | sequence number of the frame (4) | next expected sequence number (4)
+A binary, ARQ or UDP transfer starts with a start message announcing the sender's frame size (see framing.py), so the
+receiver can tell whether its own --frame-size cuts the payloads at the same place:
+    magic (1 byte, 0xFA) | frame size in bytes (2)
+and ends with an end message giving the number of frames of the file, so the receiver knows where the file ends
+even when its last frame is a full one:
+    magic (1 byte, 0xFB) | number of frames (4)
+Text mode has neither, so that a receiver of the original format sees frame lines only; its file ends at the
+short last frame.
+Classes:
+    Frame(method, polynomial, error, codeword, nbits, seq)
+        One decoded frame; payload() and check() cut its fields out with a framing.FrameLayout.
+Functions:
+    encode(method: str, polynomial: str, error: int, codeword: bytes, nbits: int, binary: bool = False, seq: int = None) -> bytes
+        Builds the wire message for one packed codeword.
+    encode_into(buffer: bytearray, pos: int, method: str, polynomial: str, error: int, codeword: bytes, nbits: int,
+                binary: bool = False, seq: int = None) -> int
+        Writes the wire message into a reusable buffer (e.g. a pacing.Writer's) and returns the position after it.
+    encode_start(frame_bytes: int) -> bytes
+        Builds the start message of a binary transfer.
+    encode_end(frames: int) -> bytes
+        Builds the end message of a binary transfer.
+    read_frames(buffer: bytearray, binary: bool = False, announced: dict = None) -> tuple
+        Removes every complete message from the receive buffer and returns the decoded frames
+        together with the messages that could not be decoded; start and end messages fill `announced`.
+    encode_reply(kind: int, seq: int, expected: int) -> bytes
+        Builds an ACK/NAK reply.
+    read_replies(buffer: bytearray) -> list
+        Removes every complete reply from the buffer and returns them as (kind, seq, expected) tuples.
+Frames are returned as Frame objects with the codeword packed; seq is None for frames sent without ARQ.
+The codewords of the binary frames of one read are memoryview slices of a single copy of the bytes read,
+so decoding a batch costs one copy instead of one per frame.
+"""
+import struct
+import bits
+import crc
+import fec
+
+MAGIC = 0xF7
+HEADER = struct.Struct('>BBBBI')
+ARQ_MAGIC = 0xF8
+ARQ_HEADER = struct.Struct('>BBBBII')
+REPLY_MAGIC = 0xF9
+REPLY = struct.Struct('>BBII')
+ACK = 1
+NAK = 2
+START_MAGIC = 0xFA
+START = struct.Struct('>BH')
+END_MAGIC = 0xFB
+END = struct.Struct('>BI')
+BINARY_MAGICS = (MAGIC, ARQ_MAGIC, START_MAGIC, END_MAGIC)  # first bytes of binary messages from the sender
+
+# new entries go at the end, so that the ids of existing ones do not change
+METHODS = ["", "checksum", "crc", "fec"]
+POLYNOMIALS = [""] + list(crc.polynomials) + list(fec.codes)
+METHOD_IDS = {name: i for i, name in enumerate(METHODS)}
+POLYNOMIAL_IDS = {name: i for i, name in enumerate(POLYNOMIALS)}
+
+class Frame:
+    """
+    One decoded frame. Slots keep it small, since the receiver holds a batch of them per read.
+    Attributes:
+        method (str): "checksum", "crc" or "fec".
+        polynomial (str): Key of crc.polynomials or fec.codes, or "" for checksum.
+        error (int): 1 if the sender injected an error, 0 otherwise.
+        codeword (bytes | memoryview): The packed codeword.
+        nbits (int): Bit length of the codeword.
+        seq (int | None): ARQ sequence number, None without ARQ.
+    """
+    __slots__ = ("method", "polynomial", "error", "codeword", "nbits", "seq")
+
+    def __init__(self, method: str, polynomial: str, error: int, codeword, nbits: int, seq: int = None):
+        self.method = method
+        self.polynomial = polynomial
+        self.error = error
+        self.codeword = codeword
+        self.nbits = nbits
+        self.seq = seq
+
+    def __repr__(self) -> str:
+        return (f"Frame({self.method!r}, {self.polynomial!r}, {self.error}, {bytes(self.codeword)!r}, "
+                f"{self.nbits}, {self.seq})")
+
+    def payload(self, layout) -> tuple:
+        """
+        Cuts the payload out of the codeword, as received (FEC frames are not corrected here).
+        Args:
+            layout (framing.FrameLayout): The frame layout the sender built the frame with.
+        Returns:
+            tuple: (payload, length), the packed payload (a view of the codeword when byte-aligned) and its bit length.
+        """
+        check = layout.frame_check_bits(self.method, self.polynomial, self.nbits)
+        return layout.payload(self.method, self.polynomial, self.codeword, self.nbits, check)
+
+    def check(self, layout) -> tuple:
+        """
+        Returns the check field at the end of the codeword.
+        Args:
+            layout (framing.FrameLayout): The frame layout the sender built the frame with.
+        Returns:
+            tuple: (value, width), the check field as an int and its width in bits.
+        """
+        width = min(layout.frame_check_bits(self.method, self.polynomial, self.nbits), self.nbits)
+        return int.from_bytes(self.codeword, 'big') & ((1 << width) - 1), width
+
+def encode(method: str, polynomial: str, error: int, codeword: bytes, nbits: int, binary: bool = False,
+           seq: int = None) -> bytes:
+    """
+    Builds the wire message for one frame.
+    Args:
+        method (str): "checksum", "crc" or "fec".
+        polynomial (str): Key of crc.polynomials or fec.codes, or "" for checksum.
+        error (int): 1 if an error was injected into the codeword, 0 otherwise.
+        codeword (bytes): The packed codeword.
+        nbits (int): Bit length of the codeword.
+        binary (bool, optional): Use the binary format instead of the text line. Defaults to False.
+        seq (int, optional): Sequence number; if given, an ARQ frame is built (always binary). Defaults to None.
+    Returns:
+        bytes: The message to hand to sendall.
+    Raises:
+        KeyError: In binary mode, if the method or polynomial has no id.
+    """
+    if seq is not None:
+        return ARQ_HEADER.pack(ARQ_MAGIC, METHOD_IDS[method], POLYNOMIAL_IDS[polynomial], error, seq, nbits) + bytes(codeword)
+    if binary:
+        return HEADER.pack(MAGIC, METHOD_IDS[method], POLYNOMIAL_IDS[polynomial], error, nbits) + bytes(codeword)
+    return f"{method}:{polynomial}:{error}:{bits.to_bits(codeword, nbits)}\n".encode("utf-8")
+
+def encode_into(buffer: bytearray, pos: int, method: str, polynomial: str, error: int, codeword: bytes, nbits: int,
+                binary: bool = False, seq: int = None) -> int:
+    """
+    Writes the wire message of one frame into a buffer, like encode() without building a bytes object per frame
+    in the binary formats.
+    Args:
+        buffer (bytearray): Destination; it is extended if the message does not fit.
+        pos (int): Position to write the message at.
+        (the other arguments are those of encode)
+    Returns:
+        int: The position right after the message.
+    Raises:
+        KeyError: In binary mode, if the method or polynomial has no id.
+    """
+    if seq is None and not binary:
+        line = encode(method, polynomial, error, codeword, nbits)
+        buffer[pos:pos + len(line)] = line
+        return pos + len(line)
+    header = HEADER if seq is None else ARQ_HEADER
+    end = pos + header.size + len(codeword)
+    if len(buffer) < end:
+        buffer.extend(bytes(end - len(buffer)))
+    if seq is None:
+        HEADER.pack_into(buffer, pos, MAGIC, METHOD_IDS[method], POLYNOMIAL_IDS[polynomial], error, nbits)
+    else:
+        ARQ_HEADER.pack_into(buffer, pos, ARQ_MAGIC, METHOD_IDS[method], POLYNOMIAL_IDS[polynomial], error, seq, nbits)
+    buffer[pos + header.size:end] = codeword
+    return end
+
+def encode_start(frame_bytes: int) -> bytes:
+    """
+    Builds the start message of a binary transfer, sent before its first frame (text transfers have none).
+    Args:
+        frame_bytes (int): The sender's frame size in bytes (framing.FrameLayout.frame_bytes).
+    Returns:
+        bytes: The message.
+    """
+    return START.pack(START_MAGIC, frame_bytes)
+
+def encode_end(frames: int) -> bytes:
+    """
+    Builds the end message of a binary transfer, sent after its last frame (text transfers have none).
+    Args:
+        frames (int): Number of frames of the file.
+    Returns:
+        bytes: The message.
+    """
+    return END.pack(END_MAGIC, frames)
+
+def _read_text(buffer: bytearray, frames: list, invalid: list) -> int:
+    """Decodes the complete lines at the start of the buffer and returns how many bytes they span."""
+    pos = 0
+    while True:
+        end = buffer.find(b"\n", pos)
+        if end < 0:
+            return pos
+        message = bytes(buffer[pos:end])
+        pos = end + 1
+        if not message.strip():
+            continue
+        try:
+            method, polynomial, error, codeword = message.decode("utf-8").split(":", 3)
+            frames.append(Frame(method, polynomial, int(error), bits.to_bytes(codeword), len(codeword)))
+        except ValueError:
+            invalid.append(message)
+
+def _resync(buffer: bytearray, pos: int) -> int:
+    """Returns the position of the next message magic byte after pos, or the end of the buffer."""
+    found = [i for i in (buffer.find(bytes([magic]), pos + 1) for magic in BINARY_MAGICS) if i >= 0]
+    return min(found) if found else len(buffer)
+
+def _read_binary(buffer: bytearray, frames: list, invalid: list, announced: dict) -> int:
+    """Decodes the complete binary messages (plain and ARQ frames, start and end messages) at the start of the buffer."""
+    pos = 0
+    spans = []
+    with memoryview(buffer) as view:
+        while pos < len(buffer):
+            if buffer[pos] == START_MAGIC:
+                if len(buffer) - pos < START.size:
+                    break
+                _, frame_bytes = START.unpack_from(view, pos)
+                if announced is not None:
+                    announced["frame_bytes"] = frame_bytes
+                pos += START.size
+                continue
+            if buffer[pos] == END_MAGIC:
+                if len(buffer) - pos < END.size:
+                    break
+                _, count = END.unpack_from(view, pos)
+                if announced is not None:
+                    announced["frames"] = count
+                pos += END.size
+                continue
+            if len(buffer) - pos < HEADER.size:
+                break
+            seq = None
+            if buffer[pos] == ARQ_MAGIC:
+                if len(buffer) - pos < ARQ_HEADER.size:
+                    break
+                magic, method_id, polynomial_id, error, seq, nbits = ARQ_HEADER.unpack_from(view, pos)
+                size = ARQ_HEADER.size
+            else:
+                magic, method_id, polynomial_id, error, nbits = HEADER.unpack_from(view, pos)
+                size = HEADER.size
+            if magic not in (MAGIC, ARQ_MAGIC) or not 0 < method_id < len(METHODS) or polynomial_id >= len(POLYNOMIALS):
+                # lost frame boundary: drop bytes up to the next magic byte
+                resync = _resync(buffer, pos)
+                invalid.append(bytes(view[pos:resync]))
+                pos = resync
+                continue
+            end = pos + size + (nbits + 7) // 8
+            if end > len(buffer):
+                break
+            spans.append((method_id, polynomial_id, error, pos + size, end, nbits, seq))
+            pos = end
+        if spans:
+            # one copy for the whole batch: the buffer itself is trimmed after this call, so it cannot be viewed
+            block = memoryview(bytes(view[:pos]))
+            frames.extend(Frame(METHODS[method_id], POLYNOMIALS[polynomial_id], error, block[start:end], nbits, seq)
+                          for method_id, polynomial_id, error, start, end, nbits, seq in spans)
+    return pos
+
+def read_frames(buffer: bytearray, binary: bool = False, announced: dict = None) -> tuple:
+    """
+    Removes every complete message from a receive buffer and decodes it.
+    Args:
+        buffer (bytearray): Bytes received so far. It is reused across calls: decoded messages are deleted
+            from its front in one step, and a trailing partial message is left for the next call.
+        binary (bool, optional): Parse the binary format instead of text lines. Defaults to False.
+        announced (dict, optional): Receives what the sender announced: "frame_bytes" from a start message,
+            "frames" from an end message (binary only). Both are skipped without it.
+    Returns:
+        tuple: (frames, invalid) where frames is a list of Frame objects and invalid is a list of the raw
+        messages that could not be decoded.
+    """
+    frames = []
+    invalid = []
+    if binary:
+        consumed = _read_binary(buffer, frames, invalid, announced)
+    else:
+        consumed = _read_text(buffer, frames, invalid)
+    del buffer[:consumed]
+    return frames, invalid
+
+def encode_reply(kind: int, seq: int, expected: int) -> bytes:
+    """
+    Builds the receiver's reply to one ARQ frame.
+    Args:
+        kind (int): ACK if the frame verified, NAK if an error was detected.
+        seq (int): Sequence number of the frame.
+        expected (int): Lowest sequence number not yet received intact (every frame below it was).
+    Returns:
+        bytes: The reply message.
+    """
+    return REPLY.pack(REPLY_MAGIC, kind, seq, expected)
+
+def read_replies(buffer: bytearray) -> list:
+    """
+    Removes every complete reply from a receive buffer and decodes it.
+    Args:
+        buffer (bytearray): Bytes received so far; a trailing partial reply is left for the next call.
+    Returns:
+        list: (kind, seq, expected) tuples, in order. Bytes that do not start a reply are skipped.
+    """
+    replies = []
+    pos = 0
+    while len(buffer) - pos >= REPLY.size:
+        magic, kind, seq, expected = REPLY.unpack_from(buffer, pos)
+        if magic != REPLY_MAGIC or kind not in (ACK, NAK):
+            resync = buffer.find(bytes([REPLY_MAGIC]), pos + 1)
+            pos = len(buffer) if resync < 0 else resync
+            continue
+        replies.append((kind, seq, expected))
+        pos += REPLY.size
+    del buffer[:pos]
+    return replies
@@ -0,0 +1,195 @@
+"""
+reassembly.py
+Rebuilds the transferred file on disk from the payloads of verified frames.
+Every payload is written straight into a memory-mapped output file at the offset of its frame, so frames can arrive
+in any order (ARQ retransmissions, several connections) and a transfer that was cut short can be completed later:
+which frames are already on disk is kept in a memory-mapped sidecar file next to the output, and frames that are
+already there are skipped.
+Classes:
+    OutputFile(path: str, packed: bool = False)
+        The reassembled file: write() puts one frame's payload in place, set_end() records the number of frames
+        the sender announced, close() trims and saves it.
+Output formats:
+    text      One '0'/'1' character per bit, the format of the sender's input file, so a complete transfer
+              reproduces the input byte for byte. Frame i starts at byte i * frame_bits.
+    packed    The payload bits packed 8 per byte, most significant first. Frame i starts at byte i * frame_bits / 8,
+              which needs a whole number of payload bytes per full frame; the last frame is padded with zero bits.
+              Payloads that fall on byte boundaries of the codeword are copied from a memoryview of the received
+              codeword into the mapping, without an intermediate copy.
+Sidecar (<path>.frames):
+    extent (8 bytes) | end (8: number of frames) | frame_bits (4) | packed (1) | ended (1: 1 once end is known)
+    followed by a bitmap with bit i (of byte i // 8, least significant first) set once frame i is on disk.
+    It is removed when the file is complete.
+Notes:
+    - Both files grow by doubling (mmap.resize), and the output is cut to its final length on close().
+    - The end of the file is known from the sender's end message (set_end), or else from its last frame, the one
+      shorter than frame_bits; a file that ends exactly on a frame boundary needs the end message to be complete,
+      which text transfers do not send (see protocol.py).
+"""
+import mmap
+import os
+import struct
+
+STATE = struct.Struct('>QQIBB')
+INITIAL_SIZE = 1 << 20  # bytes mapped for a new output file
+INITIAL_STATE = 4096  # bytes mapped for a new sidecar
+
+class _Mapping:
+    """A file mapped in memory that grows on demand."""
+
+    def __init__(self, path: str, fresh: bool, initial: int):
+        self.file = open(path, "w+b" if fresh else "r+b")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < initial:
+            self.file.truncate(initial)
+        self.map = mmap.mmap(self.file.fileno(), max(size, initial))
+
+    def ensure(self, size: int):
+        """Makes the mapping at least `size` bytes long."""
+        capacity = len(self.map)
+        if size > capacity:
+            while capacity < size:
+                capacity *= 2
+            self.map.resize(capacity)
+
+    def close(self, length: int = None):
+        """Unmaps the file and cuts it to `length` bytes (its mapped size if None)."""
+        self.map.flush()
+        self.map.close()
+        if length is not None:
+            self.file.truncate(length)
+        self.file.close()
+
+class OutputFile:
+    """
+    A file reassembled from frame payloads.
+    Attributes:
+        path (str): The output file.
+        packed (bool): Packed output instead of '0'/'1' characters.
+        frame_bits (int): Payload bits of a full frame (0 until the first write).
+        written (int): Frames written by this object.
+        duplicates (int): Frames skipped because they were already on disk.
+        extent (int): Length of the output in bytes so far.
+        end (int): Number of frames of the transfer, 0 while its last frame is missing.
+        ended (bool): True once end is known, from the last frame or the end message; an empty transfer ends at 0.
+    """
+
+    def __init__(self, path: str, packed: bool = False):
+        """
+        Opens the output, resuming it if its sidecar exists, starting it empty otherwise.
+        Args:
+            path (str): The output file.
+            packed (bool, optional): Write packed bytes instead of '0'/'1' characters. Defaults to False.
+        Raises:
+            ValueError: If the sidecar was written in the other output format.
+        """
+        self.path = path
+        self.packed = packed
+        self.written = 0
+        self.duplicates = 0
+        self._state_path = path + ".frames"
+        resume = os.path.exists(self._state_path) and os.path.exists(path)
+        self._state = _Mapping(self._state_path, not resume, INITIAL_STATE)
+        if resume:
+            self.extent, self.end, self.frame_bits, was_packed, ended = STATE.unpack_from(self._state.map)
+            self.ended = bool(ended)
+            if self.frame_bits and bool(was_packed) != packed:
+                self._state.close()
+                raise ValueError(f"{path} was started in the {'packed' if was_packed else 'text'} format")
+        else:
+            self.extent, self.end, self.frame_bits, self.ended = 0, 0, 0, False
+        self._out = _Mapping(path, not resume, INITIAL_SIZE)
+
+    def has(self, index: int) -> bool:
+        """True if frame `index` is on disk."""
+        byte = STATE.size + (index >> 3)
+        return byte < len(self._state.map) and bool(self._state.map[byte] >> (index & 7) & 1)
+
+    def write(self, index: int, frame_bits: int, payload, nbits: int) -> bool:
+        """
+        Writes one frame's payload at its offset, unless the frame is already on disk.
+        Args:
+            index (int): Frame number (0 = first frame of the file).
+            frame_bits (int): Payload bits of a full frame, the same for every frame of the file.
+            payload (bytes | memoryview): The packed payload (see bits.py), e.g. from bits.extract.
+            nbits (int): Bit length of the payload; below frame_bits for the last frame only.
+        Returns:
+            bool: True if the payload was written, False if the frame was already there.
+        Raises:
+            ValueError: If frame_bits differs from earlier frames, the packed format gets frames that are
+                not a whole number of bytes, or the frame contradicts the end of the file: a short frame that is
+                not the last one, or a frame past the last one. Frames cut with a larger frame size than the
+                sender's are all short, so all but one of them are rejected here.
+        """
+        if self.frame_bits != frame_bits:
+            if self.frame_bits:
+                raise ValueError(f"frame size changed from {self.frame_bits} to {frame_bits} payload bits")
+            if self.packed and frame_bits % 8:
+                raise ValueError(f"packed output needs whole payload bytes per frame, got {frame_bits} bits")
+            self.frame_bits = frame_bits
+        full = frame_bits // 8 if self.packed else frame_bits  # bytes of a full frame in the output
+        if nbits < frame_bits:
+            if self.ended and index != self.end - 1:
+                raise ValueError(f"frame {index} is short, but frame {self.end - 1} already ended the file")
+            if self.extent > (index + 1) * full:
+                raise ValueError(f"frame {index} is short, but frames after it are on disk")
+        elif self.ended and index >= self.end:
+            raise ValueError(f"frame {index} is past the end of the file ({self.end} frames)")
+        if self.has(index):
+            self.duplicates += 1
+            return False
+
+        if self.packed:
+            offset = index * frame_bits // 8
+            size = (nbits + 7) // 8
+            if nbits % 8:
+                # left-align the last frame's bits: the output is one bit stream, not a sequence of packed frames
+                payload = (int.from_bytes(payload, 'big') << (8*size - nbits)).to_bytes(size, 'big')
+        else:
+            offset = index * frame_bits
+            size = nbits
+            payload = format(int.from_bytes(payload, 'big'), f'0{nbits}b').encode("ascii") if nbits else b""
+        self._out.ensure(offset + size)
+        self._out.map[offset:offset + size] = payload
+
+        byte = STATE.size + (index >> 3)
+        self._state.ensure(byte + 1)
+        self._state.map[byte] |= 1 << (index & 7)
+        self.extent = max(self.extent, offset + size)
+        if nbits < frame_bits:
+            self.end, self.ended = index + 1, True
+        STATE.pack_into(self._state.map, 0, self.extent, self.end, frame_bits, self.packed, self.ended)
+        self.written += 1
+        return True
+
+    def set_end(self, frames: int):
+        """
+        Records the number of frames of the transfer, as announced by the sender.
+        Raises:
+            ValueError: If frames on disk, or the short last frame, say otherwise.
+        """
+        if self.ended and self.end != frames:
+            raise ValueError(f"the file was sent as {self.end} frames, not {frames}")
+        full = self.frame_bits // 8 if self.packed else self.frame_bits
+        if self.extent > frames * full:
+            raise ValueError(f"frames past frame {frames - 1} are on disk")
+        self.end, self.ended = frames, True
+        STATE.pack_into(self._state.map, 0, self.extent, self.end, self.frame_bits, self.packed, self.ended)
+
+    def missing(self) -> int:
+        """Returns how many frames below the last one received (or the transfer's end, if known) are not on disk."""
+        bitmap = int.from_bytes(self._state.map[STATE.size:], 'little')
+        count = self.end if self.ended else bitmap.bit_length()
+        return count - (bitmap & ((1 << count) - 1)).bit_count()
+
+    def complete(self) -> bool:
+        """True if the last frame arrived and no frame before it is missing."""
+        return self.ended and self.missing() == 0
+
+    def close(self):
+        """Cuts the output to its length and saves the sidecar, or removes it if the file is complete."""
+        done = self.complete()
+        self._out.close(self.extent)
+        self._state.close()
+        if done:
+            os.remove(self._state_path)
@@ -1,94 +1,797 @@
 """
-A TCP server for receiving and verifying messages using checksum or CRC error detection.
+A TCP server for receiving and verifying messages using checksum or CRC error detection, or correcting them
+with a forward error correction code.
 This script listens for incoming connections on a specified host and port.
-It receives messages from a client, each message containing the error detection method,
-polynomial (for CRC), error flag, and codeword, separated by colons.
-Messages are processed line by line. The server verifies each message using the specified
-error detection method (checksum or CRC) and counts the number of correctly detected errors.
+It receives messages from clients, each message containing the error detection method,
+polynomial (for CRC), error flag, and codeword, either as colon-separated text lines or as
+binary frames (see protocol.py); the format is detected from the first byte of each connection.
+The server verifies each message using the specified error detection method (checksum or CRC), or decodes
+and corrects it (FEC), and counts the number of correctly detected or corrected errors per connection.
+Frames sent with ARQ (sender.py --arq) carry a sequence number and are answered with an ACK or NAK (see arq.py).
+With --udp it receives numbered frames as datagrams instead (sender.py --udp), and also counts the frames the
+channel lost or reordered (see netem.py).
+Usage:
+    python reciever.py [--single] [--connections N] [--verbose] [--output PATH [--packed]] [--frame-size N] [--workers N] [--udp [--idle S]] [--metrics-port N] [--metrics-json PATH] [--metrics-interval S]
+Arguments:
+    --single          Serve exactly one client with blocking sockets, then exit (the original behaviour).
+    --connections N   Exit after N clients have disconnected (default 0: serve until interrupted).
+    --verbose         Print every frame (SRC/DEST/DATA/CHECK and its verification result).
+    --output PATH     Write the payload of every verified (or corrected) frame into PATH at its frame offset, rebuilding
+                      the sent file; frames are numbered by their ARQ sequence number, or by arrival order on their
+                      connection. Running again with the same PATH resumes: frames already on disk are skipped
+                      (see reassembly.py).
+    --packed          With --output, write the payload bits packed 8 per byte instead of as '0'/'1' characters.
+    --frame-size N    Codeword size in bytes the sender uses (sender.py --frame-size, default 64); sets where the
+                      payload of a frame ends and, with --output, where it goes in the file. The sender announces
+                      its frame size at the start of a binary, ARQ or UDP transfer; payloads from a sender using
+                      another size are not written. Text transfers are not announced.
+    --workers N       Verify frames in a pool of N worker processes (default 0: in the event loop). Each connection
+                      is then read by one coroutine that only cuts out frames and a consumer that processes the
+                      verdicts in arrival order; see pipeline(). Not used with --single or --udp.
+    --udp             Receive UDP datagrams (sender.py --udp) instead of TCP connections. A transfer is the datagrams
+                      of one source address, up to an empty datagram or --idle seconds of silence; --connections
+                      counts transfers. Replies are not sent: the frames are numbered, not retransmitted.
+    --idle S          With --udp, end a transfer after S seconds without a datagram (default 2).
+    --metrics-port N  Serve the metrics over HTTP on HOST:N, at /metrics (Prometheus text) and /metrics.json.
+    --metrics-json P  Append a JSON snapshot of the metrics to file P ("-" for stdout) every --metrics-interval seconds.
 Modules required:
-    - socket: For network communication.
+    - socket: For network communication in single-client and UDP mode.
+    - select: For the idle timeout of UDP transfers.
+    - asyncio: For serving many concurrent senders.
     - checksum: For checksum verification.
     - crc: For CRC verification.
+    - fec: For decoding and correcting FEC codewords.
+    - protocol: For decoding the text and binary wire formats.
+    - arq: For the receive window of ARQ connections.
+    - metrics: For the counters and histograms of the metrics endpoint.
+    - reassembly: For the memory-mapped output file of --output.
+    - framing: For the frame layout (header fields, payload and check field sizes).
+    - concurrent.futures, multiprocessing: For the verification worker pool of --workers.
 Attributes:
     HOST (str): The IP address to bind the server.
     PORT (int): The port number to bind the server.
+    VERBOSE (bool): Print every frame; off by default, since printing dominates the run time under load.
+    METRICS (metrics.Registry): The receiver's metrics (see the list below).
+    OUTPUT (reassembly.OutputFile): The file verified payloads are written to, or None without --output.
+    LAYOUT (framing.FrameLayout): The frame layout of --frame-size.
+    RECV_CHUNK (int): Size of the bytearray --single and --udp read the socket into (recv_into), one per server.
+    WORKERS (int): Verification worker processes (--workers).
+    VERIFY_POOL (ProcessPoolExecutor): The verification workers of --workers, or None to verify in the event loop.
+    PIPELINE_DEPTH (int): Batches per worker a connection may have waiting for verification before it stops reading.
+    UDP_RCVBUF (int): Receive buffer requested for the UDP socket; datagrams arriving while it is full are dropped
+        by the kernel and counted as lost.
+Metrics (recorded per batch of frames, not per frame):
+    receiver_bytes_total                  Bytes received.
+    receiver_frames_total                 Frames verified, by method, polynomial and verdict (valid / invalid).
+    receiver_detections_total             Frames by outcome: detected, corrected (FEC: error injected and repaired),
+                                          missed (error injected, frame valid), false_alarm (no error injected,
+                                          frame invalid) and clean.
+    receiver_error_detection_ratio        (detected + corrected) / (detected + corrected + missed) so far.
+    receiver_fec_corrected_total          Bits (SECDED) or bytes (RS) repaired by FEC, by polynomial (the code).
+    receiver_verify_seconds               Histogram of the verification time per frame, by method and polynomial.
+    receiver_batch_frames                 Histogram of the frames decoded per read.
+    receiver_pending_bytes                Bytes left in the receive buffer after the last read (partial frame).
+    receiver_invalid_messages_total       Messages that could not be decoded.
+    receiver_connections_total / receiver_connections_active
+    receiver_arq_replies_total            ACK/NAK replies sent, by kind.
+    receiver_output_frames_total          Payloads handed to --output, by result (written / duplicate / rejected).
+    receiver_backpressure_waits_total     Reads held back because a connection's verification queue was full (--workers).
+    receiver_pipeline_batches             Histogram of the batches still queued when one is processed (--workers).
+    receiver_datagrams_total              Datagrams received (--udp).
+    receiver_lost_frames_total            Frames of a finished transfer that never arrived: of the count in the sender's end
+                                          message, or below the highest sequence number without one (--udp).
+    receiver_reordered_frames_total       Frames that arrived after a frame with a higher sequence number (--udp).
 Workflow:
     1. Bind and listen on HOST:PORT.
-    2. Accept a client connection.
-    3. Receive data in chunks, buffering until a newline is found.
+    2. Accept client connections (one at a time with --single, concurrently otherwise).
+    3. Receive data in chunks into a reusable buffer and cut out every complete message; the frames of one read
+       are Frame objects (protocol.py) whose codewords are views of a single copy of the bytes read.
     4. For each message:
         - Parse method, polynomial, error flag, and codeword.
-        - Verify codeword using the specified method.
+        - Verify codeword using the specified method (FEC codewords are corrected where possible).
         - Track correct detections.
-    5. Print summary of correct detections after transfer is complete.
+        - For ARQ frames, reply with an ACK or NAK.
+        - With --output, write the payload of a valid frame at its offset in the output file.
+    5. Print a summary of correct detections when a connection closes, and the totals on shutdown.
 """
+import argparse
+import asyncio
+import multiprocessing
+import select
+import signal
 import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 import checksum
 import crc
+import fec
+import protocol
+import arq
+import metrics
+import reassembly
+import framing
 
 HOST = '127.0.0.1'
 PORT = 3000
+VERBOSE = False
+OUTPUT = None
+LAYOUT = framing.DEFAULT
+_rejections = set()  # reasons already reported for payloads that do not fit OUTPUT
+RECV_CHUNK = 65536
+WORKERS = 0
+VERIFY_POOL = None
+PIPELINE_DEPTH = 2
+UDP_RCVBUF = 1 << 22
 
-with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-    s.bind((HOST, PORT))
-    s.listen()
-    print(f"Server listening on {HOST}:{PORT}")
+METRICS = metrics.Registry()
+METRICS.describe("receiver_bytes_total", "Bytes received.")
+METRICS.describe("receiver_frames_total", "Frames verified, by method, polynomial and verdict.")
+METRICS.describe("receiver_detections_total", "Frames by detection outcome (detected, corrected, missed, false_alarm, clean).")
+METRICS.describe("receiver_error_detection_ratio", "Injected errors detected or corrected over injected errors.")
+METRICS.describe("receiver_fec_corrected_total", "Bits or bytes repaired by forward error correction.")
+METRICS.describe("receiver_verify_seconds", "Verification time per frame.")
+METRICS.describe("receiver_batch_frames", "Frames decoded per read.")
+METRICS.describe("receiver_pending_bytes", "Bytes waiting in the receive buffer after the last read.")
+METRICS.describe("receiver_invalid_messages_total", "Messages that could not be decoded.")
+METRICS.describe("receiver_connections_total", "Connections accepted.")
+METRICS.describe("receiver_connections_active", "Connections open.")
+METRICS.describe("receiver_arq_replies_total", "ARQ replies sent, by kind.")
+METRICS.describe("receiver_output_frames_total", "Payloads written to the output file, by result.")
+METRICS.describe("receiver_backpressure_waits_total", "Reads held back by a full verification queue.")
+METRICS.describe("receiver_pipeline_batches", "Batches queued for verification when one is processed.")
+METRICS.describe("receiver_datagrams_total", "UDP datagrams received.")
+METRICS.describe("receiver_lost_frames_total", "UDP frames lost, counted when their transfer ends.")
+METRICS.describe("receiver_reordered_frames_total", "UDP frames received out of order.")
 
-    conn, addr = s.accept()
-    with conn:
-        print(f"Connected by {addr}")
-        buffer = ""
-        message_count = 0
-        correct_detection_count = 0
+def new_counts() -> dict:
+    """Returns zeroed detection counters: messages received and correctly detected."""
+    return {"messages": 0, "correct": 0}
 
+def verify_frames(frames: list, corrections: list = None, decoded: list = None, timings: list = None) -> list:
+    """
+    Verifies a batch of decoded frames, one checksum.verify_many / crc.verify_many / fec.decode_many call per
+    method and polynomial.
+    Args:
+        frames (list): protocol.Frame objects from protocol.read_frames.
+        corrections (list, optional): If given (one entry per frame), receives the number of bits or bytes
+            FEC repaired in every frame (0 for the other methods, -1 for an uncorrectable FEC codeword).
+        decoded (list, optional): If given (one entry per frame), receives (data, nbits) for every FEC frame:
+            the packed data with its errors corrected.
+        timings (list, optional): If given, receives (method, polynomial, seconds per frame, frames) per group
+            instead of recording receiver_verify_seconds (for verify_batch, whose METRICS is not the server's).
+    Returns:
+        list: True for every frame with no detected error, or with every error corrected (FEC), False otherwise
+            (also for an unknown method), in order.
+    """
+    groups = {}
+    for i, frame in enumerate(frames):
+        groups.setdefault((frame.method, frame.polynomial), []).append(i)
+
+    results = [False] * len(frames)
+    for (method, polynomial), indices in groups.items():
+        start = time.perf_counter()
+        codewords = [frames[i].codeword for i in indices]
+        if method == "checksum":
+            verdicts = checksum.verify_many(codewords)
+        elif method == "crc":
+            verdicts = crc.verify_many(codewords, polynomial, [frames[i].nbits for i in indices])
+        elif method == "fec" and polynomial in fec.codes:
+            outcomes = fec.decode_many(codewords, polynomial, [frames[i].nbits for i in indices])
+            verdicts = [corrected >= 0 for _, _, corrected in outcomes]
+            for i, (data, nbits, corrected) in zip(indices, outcomes):
+                if corrections is not None:
+                    corrections[i] = corrected
+                if decoded is not None:
+                    decoded[i] = (data, nbits)
+        else:
+            continue
+        seconds = (time.perf_counter() - start) / len(indices)
+        if timings is not None:
+            timings.append((method, polynomial, seconds, len(indices)))
+        else:
+            METRICS.observe("receiver_verify_seconds", seconds, len(indices), method=method, polynomial=polynomial)
+        for i, is_valid in zip(indices, verdicts):
+            results[i] = is_valid
+    return results
+
+def print_frame(method: str, polynomial: str, packed: bytes, nbits: int, is_valid: bool, corrected: int = 0):
+    """Prints one frame's header fields, payload and check field (see framing.py) and its verification result (--verbose), as received."""
+    print(f"\nFrame received:")
+    for name, value in LAYOUT.split(method, polynomial, packed, nbits):
+        if value:
+            print(f"  {name + ':':<7}{value}")
+
+    # --- Verification result (whole codeword, header included) ---
+    if method == "checksum":
+        print(f"Checksum verification: {'valid' if is_valid else 'invalid'}")
+    elif method == "crc":
+        print(f"CRC verification: {'valid' if is_valid else 'invalid'}")
+    elif method == "fec":
+        print(f"FEC decoding: {f'corrected {corrected}' if corrected > 0 else 'valid' if is_valid else 'uncorrectable'}")
+
+def save_payload(frame: protocol.Frame, index: int, decoded: tuple = None, frame_bytes: int = None) -> str:
+    """
+    Writes the payload of one verified frame to OUTPUT at the frame's offset.
+    Args:
+        frame (protocol.Frame): The frame; its method and polynomial set the payload size of a full frame (see LAYOUT).
+        index (int): Frame number within the transfer.
+        decoded (tuple, optional): (data, nbits), the corrected data of a FEC frame: header, payload and padding,
+            without the check field. The payload is cut out of the codeword as received (Frame.payload) otherwise.
+        frame_bytes (int, optional): The frame size the sender announced (protocol start message), if it did.
+    Returns:
+        str: "written", "duplicate" (the frame was already on disk) or "rejected" (it does not fit the file).
+    """
+    try:
+        if frame_bytes is not None and frame_bytes != LAYOUT.frame_bytes:
+            raise ValueError(f"the sender uses --frame-size {frame_bytes}, not {LAYOUT.frame_bytes}")
+        frame_bits = LAYOUT.payload_bits(frame.method, frame.polynomial)
+        if decoded is None:
+            payload, length = frame.payload(LAYOUT)
+        else:
+            payload, length = LAYOUT.payload(frame.method, frame.polynomial, *decoded, 0)
+        if length > frame_bits:
+            raise ValueError(f"{frame.nbits}-bit codewords do not fit --frame-size {LAYOUT.frame_bytes}")
+        written = OUTPUT.write(index, frame_bits, payload, length)
+    except ValueError as e:
+        if str(e) not in _rejections:
+            _rejections.add(str(e))
+            print(f"Output: frame {index} not written: {e} (further frames with this problem are only counted)")
+        return "rejected"
+    return "written" if written else "duplicate"
+
+def save_end(frames: int):
+    """Records in OUTPUT the number of frames the sender announced (its end message), reporting a contradiction once."""
+    try:
+        OUTPUT.set_end(frames)
+    except ValueError as e:
+        if str(e) not in _rejections:
+            _rejections.add(str(e))
+            print(f"Output: end of file not recorded: {e}")
+
+def verify_batch(items: list) -> tuple:
+    """
+    Verifies a batch of frames in a worker process of the verification pool (--workers).
+    Args:
+        items (list): (method, polynomial, codeword, nbits) per frame, the codeword as bytes (views do not pickle).
+    Returns:
+        tuple: (verdicts, corrections, decoded, timings), the results of verify_frames.
+    """
+    frames = [protocol.Frame(method, polynomial, 0, codeword, nbits) for method, polynomial, codeword, nbits in items]
+    corrections = [0] * len(frames)
+    decoded = [None] * len(frames)
+    timings = []
+    verdicts = verify_frames(frames, corrections, decoded, timings)
+    return verdicts, corrections, decoded, timings
+
+def process_frames(frames: list, counts: dict, session: arq.Receiver = None, verified: tuple = None,
+                   announced: dict = None):
+    """
+    Verifies, counts and (with VERBOSE) prints decoded frames, records their metrics and, with OUTPUT,
+    writes the payloads of valid frames to the output file.
+    Args:
+        frames (list): protocol.Frame objects from protocol.read_frames.
+        counts (dict): Detection counters of the connection, updated in place.
+        session (arq.Receiver, optional): Receive window of the connection; ARQ frames queue their reply in it.
+        verified (tuple, optional): (verdicts, corrections, decoded) if the frames were verified already
+            (by verify_batch); they are verified here otherwise.
+        announced (dict, optional): What the sender announced on the connection (see protocol.read_frames).
+    """
+    if verified is None:
+        corrections = [0] * len(frames)
+        decoded = [None] * len(frames)
+        verdicts = verify_frames(frames, corrections, decoded)
+    else:
+        verdicts, corrections, decoded = verified
+    tally = {}
+    repaired = {}
+    saved = {}
+    frame_bytes = announced.get("frame_bytes") if announced else None
+    for frame, is_valid, corrected, data in zip(frames, verdicts, corrections, decoded):
+        method, polynomial, error, seq = frame.method, frame.polynomial, frame.error, frame.seq
+        # frames without a sequence number are numbered in arrival order on their connection
+        index = counts["messages"] if seq is None else seq
+        counts["messages"] += 1
+
+        if VERBOSE:
+            print_frame(method, polynomial, frame.codeword, frame.nbits, is_valid, corrected)
+
+        # a detection is correct when the frame is rejected exactly when an error was injected,
+        # or when FEC repaired the injected error
+        if is_valid != bool(error) or (error and corrected > 0):
+            counts["correct"] += 1
+
+        if error:
+            outcome = ("corrected" if corrected > 0 else "missed") if is_valid else "detected"
+        else:
+            outcome = "clean" if is_valid else "false_alarm"
+        # only frames answered through a session count as replies (UDP frames are numbered but not answered)
+        key = (method, polynomial, is_valid, outcome, seq is not None and session is not None)
+        tally[key] = tally.get(key, 0) + 1
+        if corrected > 0:
+            repaired[polynomial] = repaired.get(polynomial, 0) + corrected
+
+        if OUTPUT is not None and is_valid:
+            result = save_payload(frame, index, data, frame_bytes)
+            saved[result] = saved.get(result, 0) + 1
+
+        if seq is not None and session is not None:
+            session.receive(seq, is_valid)
+
+    # metrics are recorded once per batch, so they cost little next to the verification itself
+    for (method, polynomial, is_valid, outcome, reply), n in tally.items():
+        METRICS.inc("receiver_frames_total", n, method=method, polynomial=polynomial,
+                    verdict="valid" if is_valid else "invalid")
+        METRICS.inc("receiver_detections_total", n, outcome=outcome)
+        if reply:
+            METRICS.inc("receiver_arq_replies_total", n, kind="ack" if is_valid else "nak")
+    for polynomial, n in repaired.items():
+        METRICS.inc("receiver_fec_corrected_total", n, polynomial=polynomial)
+    for result, n in saved.items():
+        METRICS.inc("receiver_output_frames_total", n, result=result)
+    if OUTPUT is not None and announced and "frames" in announced and (
+            not OUTPUT.ended or announced["frames"] != OUTPUT.end):
+        save_end(announced["frames"])
+    if tally:
+        detected = (METRICS.value("receiver_detections_total", outcome="detected")
+                    + METRICS.value("receiver_detections_total", outcome="corrected"))
+        missed = METRICS.value("receiver_detections_total", outcome="missed")
+        if detected + missed:
+            METRICS.set("receiver_error_detection_ratio", detected / (detected + missed))
+
+def frame_data(buffer: bytearray, binary, announced: dict = None) -> tuple:
+    """
+    Cuts every complete message out of a connection's receive buffer and decodes it, without verifying it.
+    Args:
+        buffer (bytearray): The connection's receive buffer; complete messages are removed from it.
+        binary (bool | None): Wire format of the connection, or None if not known yet.
+        announced (dict, optional): Receives what the sender announced on the connection (see protocol.read_frames).
+    Returns:
+        tuple: (binary, frames), the wire format of the connection to pass back in on the next call, and the
+            protocol.Frame objects decoded.
+    """
+    if binary is None and buffer:
+        # binary frames start with a magic byte, text messages with the method name
+        binary = buffer[0] in protocol.BINARY_MAGICS
+
+    frames, invalid = protocol.read_frames(buffer, binary, announced)
+    for message in invalid:
+        print(f"Invalid message format: {message}")
+    if invalid:
+        METRICS.inc("receiver_invalid_messages_total", len(invalid))
+    METRICS.observe("receiver_batch_frames", len(frames), buckets=metrics.SIZE_BUCKETS)
+    METRICS.set("receiver_pending_bytes", len(buffer))
+    return binary, frames
+
+def handle_data(buffer: bytearray, binary, counts: dict, session: arq.Receiver = None, announced: dict = None) -> bool:
+    """
+    Processes every complete message in a connection's receive buffer.
+    Args:
+        buffer (bytearray): The connection's receive buffer; complete messages are removed from it.
+        binary (bool | None): Wire format of the connection, or None if not known yet.
+        counts (dict): Detection counters of the connection, updated in place.
+        session (arq.Receiver, optional): Receive window of the connection, for ARQ frames.
+        announced (dict, optional): What the sender announced on the connection, updated in place.
+    Returns:
+        bool | None: The wire format of the connection, to pass back in on the next call.
+    """
+    binary, frames = frame_data(buffer, binary, announced)
+    process_frames(frames, counts, session, announced=announced)
+    return binary
+
+def arq_summary(session: arq.Receiver) -> str:
+    """Returns the ARQ line of a connection summary."""
+    return f"ARQ: {session.delivered} frames delivered, {session.duplicates} duplicates, {session.naks} NAKs sent"
+
+def serve_single(host: str = HOST, port: int = PORT) -> dict:
+    """
+    Serves exactly one client with blocking sockets, then returns (the original receiver behaviour).
+    Args:
+        host (str, optional): Address to bind. Defaults to HOST.
+        port (int, optional): Port to bind. Defaults to PORT.
+    Returns:
+        dict: The detection counters of the connection.
+    """
+    counts = new_counts()
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind((host, port))
+        s.listen()
+        print(f"Server listening on {host}:{port}")
+
+        conn, addr = s.accept()
+        with conn:
+            print(f"Connected by {addr}")
+            METRICS.inc("receiver_connections_total")
+            METRICS.set("receiver_connections_active", 1)
+            buffer = bytearray()
+            binary = None
+            session = arq.Receiver()
+            announced = {}
+            chunk = bytearray(RECV_CHUNK)
+
+            while True:
+                n = conn.recv_into(chunk)
+                if not n:
+                    print("File transfer complete.")
+                    break
+
+                with memoryview(chunk) as view:
+                    buffer += view[:n]
+                METRICS.inc("receiver_bytes_total", n)
+                binary = handle_data(buffer, binary, counts, session, announced)
+                if session.replies:
+                    conn.sendall(b"".join(session.replies))
+                    session.replies.clear()
+
+    METRICS.set("receiver_connections_active", 0)
+    print(f"Correct detection: {counts['correct']}/{counts['messages']}")
+    if session.expected or session.naks:
+        print(arq_summary(session))
+    return counts
+
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, totals: dict):
+    """
+    Receives and verifies the frames of one sender connection.
+    Args:
+        reader (asyncio.StreamReader): The connection's read side.
+        writer (asyncio.StreamWriter): The connection's write side, closed when the sender is done.
+        totals (dict): Detection counters over all connections, updated when this one ends.
+    """
+    addr = writer.get_extra_info("peername")
+    print(f"Connected by {addr}")
+    counts = new_counts()
+    buffer = bytearray()
+    binary = None
+    session = arq.Receiver()
+    announced = {}
+    try:
+        if VERIFY_POOL is not None:
+            await pipeline(reader, writer, counts, session, announced)
+            print(f"[{addr}] File transfer complete.")
+            return
         while True:
-            data = conn.recv(1024)
+            data = await reader.read(65536)
             if not data:
-                print("File transfer complete.")
+                print(f"[{addr}] File transfer complete.")
                 break
 
-            buffer += data.decode("utf-8")
+            buffer += data
+            METRICS.inc("receiver_bytes_total", len(data))
+            binary = handle_data(buffer, binary, counts, session, announced)
+            if session.replies:
+                writer.write(b"".join(session.replies))
+                session.replies.clear()
+                await writer.drain()
+    finally:
+        writer.close()
+        print(f"[{addr}] Correct detection: {counts['correct']}/{counts['messages']}")
+        if session.expected or session.naks:
+            print(f"[{addr}] {arq_summary(session)}")
+        totals["messages"] += counts["messages"]
+        totals["correct"] += counts["correct"]
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass  # the sender reset the connection; it is closed all the same
 
-            # Process messages separated by newline
-            while "\n" in buffer:
-                message, buffer = buffer.split("\n", 1)
-                if not message.strip():
-                    continue
+async def pipeline(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, counts: dict, session: arq.Receiver,
+                   announced: dict):
+    """
+    Receives one connection through the verification pool (--workers): this coroutine only reads the socket and
+    cuts out the frames, and hands every batch to VERIFY_POOL at once; a consumer task takes the batches in order
+    from a bounded queue, waits for their verdicts and counts, prints, writes and answers them as handle_data does.
+    When PIPELINE_DEPTH batches per worker are waiting, the reader stops reading, so the socket's receive buffer
+    and then the sender's TCP window fill up: the sender is slowed down instead of the queue growing.
+    Args:
+        reader (asyncio.StreamReader): The connection's read side.
+        writer (asyncio.StreamWriter): The connection's write side, for ARQ replies.
+        counts (dict): Detection counters of the connection, updated in place.
+        session (arq.Receiver): Receive window of the connection, for ARQ frames.
+        announced (dict): What the sender announced on the connection, updated in place.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=PIPELINE_DEPTH * WORKERS)
+
+    async def consume():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            frames, future = item
+            verdicts, corrections, decoded, timings = await future
+            for method, polynomial, seconds, n in timings:
+                METRICS.observe("receiver_verify_seconds", seconds, n, method=method, polynomial=polynomial)
+            process_frames(frames, counts, session, (verdicts, corrections, decoded), announced)
+            METRICS.observe("receiver_pipeline_batches", queue.qsize(), buckets=metrics.SIZE_BUCKETS)
+            if session.replies:
+                writer.write(b"".join(session.replies))
+                session.replies.clear()
+                await writer.drain()
 
-                try:
-                    method, polynomial, error, codeword = message.split(":", 3)
-                    message_count += 1
-                except ValueError:
-                    print(f"Invalid message format: {message}")
+    consumer = asyncio.create_task(consume())
+    buffer = bytearray()
+    binary = None
+    try:
+        while True:
+            data = await reader.read(65536)
+            if data:
+                buffer += data
+                METRICS.inc("receiver_bytes_total", len(data))
+                binary, frames = frame_data(buffer, binary, announced)
+                if not frames:
                     continue
+                items = [(frame.method, frame.polynomial, bytes(frame.codeword), frame.nbits) for frame in frames]
+                item = (frames, loop.run_in_executor(VERIFY_POOL, verify_batch, items))
+            else:
+                item = None
+            if queue.full():
+                # backpressure: stop reading until the consumer catches up (or fails)
+                METRICS.inc("receiver_backpressure_waits_total")
+                put = asyncio.ensure_future(queue.put(item))
+                await asyncio.wait((put, consumer), return_when=asyncio.FIRST_COMPLETED)
+                if consumer.done():
+                    put.cancel()
+                    consumer.result()
+                    break
+            else:
+                queue.put_nowait(item)
+            if item is None:
+                break
+        await consumer
+    finally:
+        consumer.cancel()
+
+async def serve(host: str = HOST, port: int = PORT, connections: int = 0) -> dict:
+    """
+    Serves many concurrent senders until interrupted (SIGINT/SIGTERM) or until `connections` clients are done.
+    On shutdown the listener is closed first, then connections still open are cancelled so that each
+    still reports its counters.
+    Args:
+        host (str, optional): Address to bind. Defaults to HOST.
+        port (int, optional): Port to bind. Defaults to PORT.
+        connections (int, optional): Number of clients to serve before exiting; 0 serves forever. Defaults to 0.
+    Returns:
+        dict: The detection counters summed over all connections.
+    """
+    totals = new_counts()
+    stop = asyncio.Event()
+    clients = set()
+    finished = 0
+
+    async def client(reader, writer):
+        nonlocal finished
+        clients.add(asyncio.current_task())
+        METRICS.inc("receiver_connections_total")
+        METRICS.set("receiver_connections_active", len(clients))
+        try:
+            await handle_client(reader, writer, totals)
+        except asyncio.CancelledError:
+            pass  # shut down: handle_client has reported the connection (asyncio logs cancelled client tasks)
+        finally:
+            clients.discard(asyncio.current_task())
+            METRICS.set("receiver_connections_active", len(clients))
+            finished += 1
+            if connections and finished >= connections:
+                stop.set()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # no signal handlers on this platform; Ctrl-C still ends asyncio.run
+
+    server = await asyncio.start_server(client, host, port)
+    print(f"Server listening on {host}:{port}")
+    try:
+        await stop.wait()
+    finally:
+        server.close()
+        # cancel the open connections before wait_closed(), which waits for them on Python 3.12+
+        for task in list(clients):
+            task.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+        await server.wait_closed()
+        print(f"Correct detection: {totals['correct']}/{totals['messages']}")
+    return totals
+
+class Transfer:
+    """
+    State of one UDP transfer (the datagrams of one source address).
+    Attributes:
+        counts (dict): Detection counters, see new_counts.
+        announced (dict): What the sender announced (see protocol.read_frames).
+        datagrams (int): Datagrams received.
+        bytes (int): Bytes received.
+        first, last (float): time.monotonic() of the first and the latest datagram.
+        highest (int): Highest sequence number received (-1 before the first frame).
+        reordered (int): Frames that arrived after one with a higher sequence number.
+        seen (set): Sequence numbers received.
+        frames (int): Frames received, duplicates included.
+    """
+
+    def __init__(self, now: float):
+        self.counts = new_counts()
+        self.announced = {}
+        self.datagrams = 0
+        self.bytes = 0
+        self.first = self.last = now
+        self.highest = -1
+        self.reordered = 0
+        self.seen = set()
+        self.frames = 0
+
+    def receive(self, data, now: float):
+        """Decodes, verifies and counts the frames of one datagram."""
+        self.datagrams += 1
+        self.bytes += len(data)
+        self.last = now
+        buffer = bytearray(data)
+        _, frames = frame_data(buffer, True, self.announced)
+        if buffer:
+            # a datagram holds whole frames: what is left was cut short
+            METRICS.inc("receiver_invalid_messages_total")
+        reordered = 0
+        for frame in frames:
+            if frame.seq is None:
+                continue
+            if frame.seq < self.highest:
+                reordered += 1
+            else:
+                self.highest = frame.seq
+            self.seen.add(frame.seq)
+        self.frames += len(frames)
+        self.reordered += reordered
+        if reordered:
+            METRICS.inc("receiver_reordered_frames_total", reordered)
+        process_frames(frames, self.counts, announced=self.announced)
+
+    def lost(self) -> int:
+        """Frames not received: of all the frames, if the sender's end message arrived, else of those below the highest."""
+        return self.sent() - len(self.seen)
+
+    def sent(self) -> int:
+        """Frames of the transfer: the count of the sender's end message, or the highest sequence number + 1."""
+        return self.announced.get("frames", self.highest + 1)
+
+    def summary(self) -> str:
+        """Returns the line reporting the channel statistics and the throughput of the transfer."""
+        seconds = self.last - self.first
+        rate = f"{self.bytes / seconds / 1e6:.2f} MB/s" if seconds else "-"
+        sent = self.sent()
+        loss = f" ({self.lost() / sent:.1%})" if sent else ""
+        return (f"UDP: {self.datagrams} datagrams, {self.bytes} bytes in {seconds:.2f}s ({rate}); "
+                f"{self.frames} frames, {self.lost()} lost{loss}, {self.reordered} reordered, "
+                f"{self.frames - len(self.seen)} duplicates")
+
+def serve_udp(host: str = HOST, port: int = PORT, connections: int = 0, idle: float = 2.0) -> dict:
+    """
+    Receives UDP transfers (sender.py --udp) until interrupted or until `connections` transfers have ended.
+    Args:
+        host (str, optional): Address to bind. Defaults to HOST.
+        port (int, optional): Port to bind. Defaults to PORT.
+        connections (int, optional): Number of transfers to receive before returning; 0 receives forever.
+            Defaults to 0.
+        idle (float, optional): Seconds without a datagram after which a transfer ends. Defaults to 2.0.
+    Returns:
+        dict: The detection counters summed over all transfers.
+    """
+    totals = new_counts()
+    transfers = {}
+    finished = 0
+
+    def finish(addr, reason):
+        transfer = transfers.pop(addr)
+        METRICS.set("receiver_connections_active", len(transfers))
+        METRICS.inc("receiver_lost_frames_total", transfer.lost())
+        print(f"[{addr}] File transfer {reason}.")
+        print(f"[{addr}] Correct detection: {transfer.counts['correct']}/{transfer.counts['messages']}")
+        print(f"[{addr}] {transfer.summary()}")
+        totals["messages"] += transfer.counts["messages"]
+        totals["correct"] += transfer.counts["correct"]
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+        s.bind((host, port))
+        print(f"Server listening on {host}:{port} (UDP)")
+        chunk = bytearray(RECV_CHUNK)
+        try:
+            while not connections or finished < connections:
+                now = time.monotonic()
+                deadline = min((transfer.last + idle for transfer in transfers.values()), default=None)
+                readable, _, _ = select.select([s], [], [], None if deadline is None else max(0.0, deadline - now))
+                now = time.monotonic()
+                if readable:
+                    n, addr = s.recvfrom_into(chunk)
+                    if not n:
+                        if addr in transfers:
+                            finish(addr, "complete")
+                            finished += 1
+                        continue  # or a repeated end of a transfer that is over
+                    if addr not in transfers:
+                        print(f"Datagrams from {addr}")
+                        transfers[addr] = Transfer(now)
+                        METRICS.inc("receiver_connections_total")
+                        METRICS.set("receiver_connections_active", len(transfers))
+                    METRICS.inc("receiver_datagrams_total")
+                    METRICS.inc("receiver_bytes_total", n)
+                    with memoryview(chunk) as view:
+                        transfers[addr].receive(view[:n], now)
+                for addr in [addr for addr, transfer in transfers.items() if now - transfer.last >= idle]:
+                    finish(addr, f"timed out after {idle:g}s idle")
+                    finished += 1
+        finally:
+            for addr in list(transfers):
+                finish(addr, "interrupted")
+            print(f"Correct detection: {totals['correct']}/{totals['messages']}")
+    return totals
+
+def output_summary(output: reassembly.OutputFile) -> str:
+    """Returns the line reporting the state of the output file."""
+    state = "complete" if output.complete() else f"{output.missing()} frames missing, send again to resume"
+    return f"Output {output.path}: {output.written} frames written, {output.duplicates} already there, {state}"
+
+def main():
+    global VERBOSE, OUTPUT, LAYOUT, WORKERS, VERIFY_POOL
+    parser = argparse.ArgumentParser(usage="python reciever.py [--single] [--connections N] [--verbose] [--output PATH [--packed]] [--frame-size N] [--workers N] [--udp [--idle S]] [--metrics-port N] [--metrics-json PATH] [--metrics-interval S]")
+    parser.add_argument("--single", action="store_true", help="serve one client with blocking sockets, then exit")
+    parser.add_argument("--connections", type=int, default=0, help="exit after N clients (0 = run until interrupted)")
+    parser.add_argument("--verbose", action="store_true", help="print every frame")
+    parser.add_argument("--output", help="rebuild the sent file here from the verified payloads (resumes if started)")
+    parser.add_argument("--packed", action="store_true", help="write --output packed, 8 bits per byte")
+    parser.add_argument("--frame-size", type=int, default=framing.DEFAULT_FRAME_BYTES,
+                        help=f"codeword size in bytes of the sender (default {framing.DEFAULT_FRAME_BYTES})")
+    parser.add_argument("--workers", type=int, default=0, help="verify frames in N worker processes (default 0: inline)")
+    parser.add_argument("--udp", action="store_true", help="receive UDP datagrams (sender.py --udp)")
+    parser.add_argument("--idle", type=float, default=2.0, help="end a UDP transfer after S idle seconds (default 2)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="serve /metrics and /metrics.json on this port")
+    parser.add_argument("--metrics-json", help="append JSON metric snapshots to this file ('-' for stdout)")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, help="seconds between JSON snapshots (default 5)")
+    args = parser.parse_args()
+    VERBOSE = args.verbose
+    try:
+        LAYOUT = framing.FrameLayout(args.frame_size)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers < 0:
+        parser.error(f"--workers must be 0 or more, got {args.workers}")
+    if args.output:
+        OUTPUT = reassembly.OutputFile(args.output, args.packed)
+    if args.workers and not (args.single or args.udp):
+        WORKERS = args.workers
+        # spawn, not fork: the metrics threads may already be running
+        VERIFY_POOL = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+    http_server = None
+    if args.metrics_port:
+        http_server = metrics.serve_http(METRICS, HOST, args.metrics_port)
+        print(f"Metrics on http://{HOST}:{args.metrics_port}/metrics")
+    stop = threading.Event()
+    snapshots = None
+    if args.metrics_json:
+        snapshots = metrics.write_snapshots(METRICS, args.metrics_json, args.metrics_interval, stop)
+
+    try:
+        if args.single:
+            serve_single()
+        elif args.udp:
+            serve_udp(connections=args.connections, idle=args.idle)
+        else:
+            asyncio.run(serve(connections=args.connections))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if snapshots is not None:
+            stop.set()
+            snapshots.join()
+        if http_server is not None:
+            http_server.shutdown()
+        if VERIFY_POOL is not None:
+            VERIFY_POOL.shutdown(cancel_futures=True)
+        if OUTPUT is not None:
+            print(output_summary(OUTPUT))
+            OUTPUT.close()
 
-                # --- Enforce frame size ---
-                # if len(codeword) != 64:
-                #     print(f"Invalid frame length: {len(codeword)} (expected 64)")
-                #     continue
-
-                # --- Extract header + payload ---
-                src_addr = codeword[:8*8]
-                dest_addr = codeword[8*8:16*8]
-                payload = codeword[16*8:]  # last 48 bits
-
-                print(f"\nFrame received:")
-                print(f"  SRC:  {src_addr}")
-                print(f"  DEST: {dest_addr}")
-                print(f"  DATA: {payload}")
-
-                # --- Verify only on payload ---
-                is_valid = False
-                if method == "checksum":
-                    is_valid = checksum.verify_checksum(codeword)
-                    print(f"Checksum verification: {'valid' if is_valid else 'invalid'}")
-                elif method == "crc":
-                    is_valid = crc.verify_crc(codeword, polynomial)
-                    print(f"CRC verification: {'valid' if is_valid else 'invalid'}")
-
-                
-                if is_valid == bool(error):
-                    correct_detection_count += 1
-                    
-        print(f"Correct detection: {correct_detection_count}/{message_count}")           
-            
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,23 @@
+import os
+import asyncio
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import analysis
+import arq
+import bits
 import checksum
 import crc
+import fec
+import framing
 import injecterror
+import metrics
+import netem
+import pacing
+import protocol
+import reassembly
+import reciever
 
 binary_string = ["0100100001100101011011000110110001101111", "11110000111100001111", "0000000000000000", "1111111111111111", ""]
 polynomials = {
@@ -26,3 +43,484 @@ for key in polynomials:
         correct_data = crc.verify_crc(codeword_crc, key)
         print(f"[CRC][{key}] correct data recieved: ", correct_data)
 
+
+print()
+for name, passed in crc.validate_catalog().items():
+    print(f"[CRC][{name}] check value matches: ", passed)
+
+# every backend (zlib, binascii, crc32c, table engine) must give the remainder of xor_division
+print()
+rng = random.Random(2024)
+parity_words = [''.join(rng.choice("01") for _ in range(n)) for n in (1, 7, 8, 33, 64, 100, 512, 1000)]
+parity_polynomials = dict(polynomials)
+parity_polynomials["CRC-16/XMODEM"] = crc.catalog["CRC-16/XMODEM"].generator
+parity_polynomials["CRC-32C"] = crc.catalog["CRC-32C"].generator
+for key, divisor in parity_polynomials.items():
+    matches = all(
+        crc.generate_crc(word, divisor) == word + crc.xor_division(word + '0'*(len(divisor) - 1), divisor)
+        for word in parity_words
+    )
+    print(f"[CRC][{key}] {crc.backend(divisor)} backend matches xor_division: ", matches)
+
+# ARQ: the receiver acknowledges in order, buffers frames ahead, counts duplicates; the windows resend
+print()
+receiver = arq.Receiver()
+for seq, is_valid in ((0, True), (2, True), (1, False), (1, True), (2, True), (3, True)):
+    receiver.receive(seq, is_valid)
+print("[ARQ][Receiver] frames delivered in order: ", (receiver.expected, receiver.delivered) == (4, 4))
+print("[ARQ][Receiver] duplicates and NAKs counted: ", (receiver.duplicates, receiver.naks) == (1, 1))
+print("[ARQ][Receiver] one reply per frame: ", len(receiver.replies) == 6)
+for mode, resent in (("gbn", [1, 2, 3]), ("sr", [1])):
+    window = arq.Window(mode, 4, 1.0)
+    for _ in range(4):
+        window.add(b"\x00", 8, 0.0)
+    window.on_reply(protocol.ACK, 0, 1, 0.0)
+    print(f"[ARQ][{mode}] NAK resends: ", window.on_reply(protocol.NAK, 1, 1, 0.0) == resent)
+    print(f"[ARQ][{mode}] timeouts resend every frame in flight: ", window.expired(2.0) == [1, 2, 3])
+
+# FEC: every error the code is built for is corrected, SEC-DED detects two errors in one block
+print()
+for code, (kind, param) in fec.codes.items():
+    corrected = detected = True
+    for nbytes in (1, 8, 40, 200):
+        data = bytes(rng.randrange(256) for _ in range(nbytes))
+        nbits = 8*nbytes
+        codeword = fec.generate_fec_bytes(data, code, nbits)
+        ncodebits = fec.codeword_bits(code, nbits)
+        if kind == "hamming":
+            # one bit error in every block of the data, then two in the first block
+            blocks = (nbits + param - 1) // param
+            errors = [block*param + rng.randrange(min(param, nbits - block*param)) for block in range(blocks)]
+            wanted = blocks
+        else:
+            # t = param / 2 byte errors in a single-block codeword
+            errors = [8*byte for byte in rng.sample(range(len(codeword)), min(param // 2, len(codeword)))]
+            wanted = len(errors)
+        damaged = bytearray(codeword)
+        for bit in errors:
+            damaged[bit >> 3] ^= 0x80 >> (bit & 7)
+        result = fec.decode_fec_bytes(bytes(damaged), code, ncodebits)
+        corrected = corrected and result == (data, nbits, wanted)
+        if kind == "hamming":
+            damaged = bytearray(codeword)
+            first, second = rng.sample(range(min(param, nbits)), 2)
+            for bit in (first, second):
+                damaged[bit >> 3] ^= 0x80 >> (bit & 7)
+            detected = detected and fec.decode_fec_bytes(bytes(damaged), code, ncodebits)[2] == -1
+    print(f"[FEC][{code}] errors corrected: ", corrected)
+    if kind == "hamming":
+        print(f"[FEC][{code}] double errors detected: ", detected)
+
+# reassembly: frames written out of order, and a transfer resumed from its sidecar, give back the input
+print()
+pack = lambda text: int(text, 2).to_bytes((len(text) + 7) // 8, 'big')
+for packed in (False, True):
+    frame_bits = 16
+    nbits = 5*frame_bits + 8
+    text = ''.join(rng.choice("01") for _ in range(nbits))
+    payloads = [text[start:start + frame_bits] for start in range(0, nbits, frame_bits)]
+    expected = int(text, 2).to_bytes(nbits // 8, 'big') if packed else text.encode("ascii")
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "out.txt")
+        output = reassembly.OutputFile(path, packed)
+        for index in (5, 2, 0):
+            output.write(index, frame_bits, pack(payloads[index]), len(payloads[index]))
+        output.close()
+        output = reassembly.OutputFile(path, packed)
+        for index in (0, 4, 1, 3):
+            output.write(index, frame_bits, pack(payloads[index]), len(payloads[index]))
+        complete = output.complete() and output.duplicates == 1
+        output.close()
+        with open(path, "rb") as f:
+            same = f.read() == expected
+        name = "packed" if packed else "text"
+        print(f"[Reassembly][{name}] resumed transfer complete: ", complete and not os.path.exists(path + ".frames"))
+        print(f"[Reassembly][{name}] output matches input: ", same)
+
+        # a file that ends on a frame boundary is complete once the sender's end message is recorded
+        path = os.path.join(folder, "even.txt")
+        output = reassembly.OutputFile(path, packed)
+        for index in (1, 0):
+            output.write(index, frame_bits, pack(payloads[index]), frame_bits)
+        waiting = not output.complete()
+        output.set_end(2)
+        try:
+            output.set_end(3)
+            rejected = False
+        except ValueError:
+            rejected = True
+        print(f"[Reassembly][{name}] end message completes the file: ", waiting and output.complete() and rejected)
+        output.close()
+
+        # an empty input is sent as no frames at all, and its end message alone completes it
+        path = os.path.join(folder, "empty.txt")
+        output = reassembly.OutputFile(path, packed)
+        waiting = not output.complete()
+        output.set_end(0)
+        complete = waiting and output.complete()
+        output.close()
+        print(f"[Reassembly][{name}] end message completes an empty file: ",
+              complete and os.path.getsize(path) == 0 and not os.path.exists(path + ".frames"))
+
+# framing: the payload cut out of a frame is the payload it was built from, and full frames fit the frame size
+print()
+for method, polynomial in (("checksum", ""), ("crc", "CRC-10"), ("crc", "CRC-32"), ("fec", "SECDED"), ("fec", "RS-8")):
+    round_trip = fits = True
+    for frame_bytes in (32, 64, 1500):
+        layout = framing.FrameLayout(frame_bytes)
+        padding = layout.padding_bits(method, polynomial)
+        full = layout.payload_bits(method, polynomial)
+        for nbits in (full, full - 8, 3):
+            payload = bytes(rng.randrange(256) for _ in range((nbits + 7) // 8))
+            payload = (int.from_bytes(payload, 'big') >> (-nbits % 8)).to_bytes(len(payload), 'big')
+            data, data_nbits = layout.frame(payload, nbits, padding)
+            # the check field is appended as zeros: payload() only needs its width
+            check = layout.check_bits(method, polynomial) if method != "fec" else 0
+            codeword = (int.from_bytes(data, 'big') << check).to_bytes((data_nbits + check + 7) // 8, 'big')
+            cut, length = layout.payload(method, polynomial, codeword, data_nbits + check, check)
+            round_trip = round_trip and length == nbits and bytes(cut) == payload
+            if nbits == full:
+                total = fec.codeword_bits(polynomial, data_nbits) if method == "fec" else data_nbits + check
+                fits = fits and (total == layout.codeword_bits or method == "fec" and total <= layout.codeword_bits)
+    name = f"{method} {polynomial}" if polynomial else method
+    print(f"[Framing][{name}] payload round trip: ", round_trip)
+    print(f"[Framing][{name}] full frames fit the frame size: ", fits)
+
+# bits: packed bytes spell the same bits as the '0'/'1' strings they replace
+print()
+words = [''.join(rng.choice("01") for _ in range(n)) for n in (0, 1, 7, 8, 9, 64, 100)] + ["0000000101", "00000000"]
+print("[Bits] to_bits(to_bytes) round trip: ", all(bits.to_bits(bits.to_bytes(w), len(w)) == w for w in words))
+print("[Bits] concat matches string concatenation: ", all(
+    bits.to_bits(bits.concat(bits.to_bytes(a), len(a), bits.to_bytes(b), len(b)), len(a) + len(b)) == a + b
+    for a in words for b in words))
+flipped = True
+extracted = True
+for w in words[1:]:
+    positions = rng.sample(range(len(w)), min(3, len(w)))
+    expected = ''.join('10'[int(c)] if i in positions else c for i, c in enumerate(w))
+    flipped = flipped and bits.to_bits(bits.flip(bits.to_bytes(w), len(w), positions), len(w)) == expected
+    start = rng.randrange(len(w))
+    length = rng.randrange(len(w) - start + 1)
+    extracted = extracted and bits.to_bits(bytes(bits.extract(bits.to_bytes(w), len(w), start, length)), length) == w[start:start + length]
+aligned = bits.extract(bits.to_bytes(words[5]), 64, 8, 16)  # on byte boundaries: a view, no copy
+extracted = extracted and isinstance(aligned, memoryview) and bits.to_bits(bytes(aligned), 16) == words[5][8:24]
+print("[Bits] flip matches the flipped string: ", flipped)
+print("[Bits] extract matches the string slice: ", extracted)
+
+# protocol: frames come back from a stream read in arbitrary pieces, and garbage between binary frames is skipped
+print()
+sent = []
+for i in range(40):
+    method, polynomial = rng.choice([("checksum", ""), ("crc", "CRC-8"), ("crc", "CRC-32"), ("fec", "RS-8")])
+    nbits = rng.randrange(1, 600)
+    sent.append((method, polynomial, rng.randrange(2), bits.to_bytes(''.join(rng.choice("01") for _ in range(nbits))), nbits))
+for binary in (False, True):
+    stream = bytearray()
+    garbage = 0
+    for i, (method, polynomial, error, codeword, nbits) in enumerate(sent):
+        stream += protocol.encode(method, polynomial, error, codeword, nbits, binary)
+        if binary and i < len(sent) - 1 and rng.random() < 0.25:
+            stream += bytes(rng.randrange(0x80) for _ in range(rng.randrange(1, 12)))  # no magic byte in it
+            garbage += 1
+    buffer = bytearray()
+    received, invalid = [], []
+    pos = 0
+    while pos < len(stream):
+        step = rng.randrange(1, 200)
+        buffer += stream[pos:pos + step]
+        pos += step
+        frames, rejected = protocol.read_frames(buffer, binary)
+        received.extend((f.method, f.polynomial, f.error, bytes(f.codeword), f.nbits) for f in frames)
+        invalid.extend(rejected)
+    name = "binary" if binary else "text"
+    print(f"[Protocol][{name}] frames decoded in order: ", received == sent and not buffer)
+    print(f"[Protocol][{name}] garbage skipped: ", len(invalid) == garbage)
+
+# checksum: the one-pass per-chunk checksums equal the checksum of every chunk on its own
+print()
+matches = True
+verified = True
+for nbytes in (1, 2, 63, 64, 65, 200, 1000):
+    data = bytes(rng.randrange(256) for _ in range(nbytes))
+    for chunk_size in (2, 16, 64):
+        chunks = [data[start:start + chunk_size] for start in range(0, nbytes, chunk_size)]
+        matches = matches and checksum.checksum_chunks(data, chunk_size) == [
+            int(checksum.generate_checksum(bits.to_bits(c))[-checksum.bit_size:], 2) for c in chunks]
+        framed = bytearray(checksum.generate_checksum_chunks(data, chunk_size))
+        bad = rng.randrange(len(chunks))
+        framed[bad * (chunk_size + 2)] ^= 0x01
+        expected = [i != bad for i in range(len(chunks))]
+        verified = verified and checksum.verify_checksum_chunks(bytes(framed), chunk_size) == expected
+print("[Checksum] checksum_chunks matches generate_checksum per chunk: ", matches)
+print("[Checksum] verify_checksum_chunks finds the corrupted chunk: ", verified)
+
+# batch APIs: generate_many / verify_many give what the single-frame functions give frame by frame
+print()
+header = ''.join(rng.choice("01") for _ in range(96))
+texts = [header + ''.join(rng.choice("01") for _ in range(n)) for n in (0, 1, 13, 64, 200, 416)]
+frames = [bits.to_bytes(t) for t in texts]
+lengths = [len(t) for t in texts]
+for key in ("CRC-8", "CRC-10", "CRC-32"):
+    single = [crc.generate_crc_bytes(f, key, n) for f, n in zip(frames, lengths)]
+    generated = crc.generate_many(frames, key, lengths) == single and crc.generate_many(frames, key, lengths, 96) == single
+    width = len(crc.polynomials[key]) - 1
+    codewords = [bits.flip(c, n + width, [rng.randrange(n + width)]) if i % 2 else c
+                 for i, (c, n) in enumerate(zip(single, lengths))]
+    verified = crc.verify_many(codewords, key, [n + width for n in lengths]) == [
+        crc.verify_crc_bytes(c, key, n + width) for c, n in zip(codewords, lengths)]
+    print(f"[Batch][CRC][{key}] generate_many and verify_many match the single-frame functions: ", generated and verified)
+whole = [bytes(rng.randrange(256) for _ in range(n)) for n in (0, 1, 2, 31, 64, 500)]
+single = [checksum.generate_checksum_bytes(f) for f in whole]
+codewords = [bytes([c[0] ^ 0x10]) + c[1:] if i % 2 and c else c for i, c in enumerate(single)]
+print("[Batch][Checksum] generate_many and verify_many match the single-frame functions: ",
+      checksum.generate_many(whole) == single
+      and checksum.verify_many(codewords) == [checksum.verify_checksum_bytes(c) for c in codewords])
+
+# CRC combine: the remainder of A followed by B comes from the remainders of A and B, and a streaming CRC fed in
+# pieces gives the remainder of the whole message
+print()
+for key in polynomials:
+    combined = streamed = True
+    for _ in range(20):
+        a = ''.join(rng.choice("01") for _ in range(rng.randrange(0, 300)))
+        b = ''.join(rng.choice("01") for _ in range(rng.randrange(0, 300)))
+        combined = combined and crc.crc_combine(crc.crc_bits(a, key), crc.crc_bits(b, key), len(b), key) == crc.crc_bits(a + b, key)
+        state = crc.CRC(key)
+        state.update(bits.to_bytes(a[:len(a) - len(a) % 8]))
+        state.update_bits(bits.to_bytes(a[len(a) - len(a) % 8:]), len(a) % 8)
+        state.update_bits(bits.to_bytes(b), len(b))
+        streamed = streamed and state.digest() == crc.crc_bits(a + b, key)
+    print(f"[CRC][{key}] crc_combine matches the CRC of the concatenation: ", combined)
+    print(f"[CRC][{key}] streaming updates match the CRC of the whole message: ", streamed)
+
+# batched error injection: the masks flip bits at the requested rates, and bursts stay inside their windows
+print()
+for ber in (0.001, 0.01, 0.3):
+    masks = injecterror.ber_masks(1000, 400, ber, rng)
+    errors = sum(mask.bit_count() for mask in masks)
+    expected = 400 * 1000 * ber
+    print(f"[Inject][BER {ber}] error count within 5 sigma: ", abs(errors - expected) < 5 * (expected * (1 - ber)) ** 0.5)
+for length in (1, 17, 33, lambda r: r.choice((4, 12))):
+    masks = injecterror.burst_masks(512, 2000, length, 0.4, rng)
+    longest = length if isinstance(length, int) else 12
+    inside = all(not mask or mask.bit_length() - (mask & -mask).bit_length() < longest for mask in masks)
+    name = length if isinstance(length, int) else "4 or 12"
+    print(f"[Inject][burst {name}] bursts within their length: ", inside)
+masks = injecterror.burst_masks(512, 4000, 20, 0.4, rng)
+density = sum(mask.bit_count() for mask in masks) / (4000 * 20)
+print("[Inject][burst 20] density about 0.4: ", abs(density - 0.4) < 0.01)
+# stationary share of the bad state: p_gb / (p_gb + p_bg) = 0.2, so a bit error rate of 0.8*0.001 + 0.2*0.1
+masks = injecterror.gilbert_elliott_masks(1000, 4000, 0.0005, 0.002, 0.001, 0.1, rng)
+rate = sum(mask.bit_count() for mask in masks) / 4e6
+print("[Inject][Gilbert-Elliott] error rate about 0.0208: ", abs(rate - 0.0208) < 0.003)
+frames = [bytes(rng.randrange(256) for _ in range(8)) for _ in range(50)]
+masks = injecterror.ber_masks(64, 50, 0.05, rng)
+print("[Inject] apply_masks flips the mask bits: ", all(
+    int.from_bytes(corrupted, 'big') ^ int.from_bytes(frame, 'big') == mask
+    for frame, corrupted, mask in zip(frames, injecterror.apply_masks(frames, masks), masks)))
+
+# CRC analysis: the exact counts agree with brute force over every error pattern of a short codeword
+def polymod(value, divisor):
+    while value.bit_length() >= divisor.bit_length():
+        value ^= divisor << (value.bit_length() - divisor.bit_length())
+    return value
+
+print()
+for generator in ("1011", "1101", "1111", "10011", "11001", "11111", "1110"):
+    nbits = 12
+    missed = [e for e in range(1, 1 << nbits) if polymod(e, int(generator, 2)) == 0]
+    if generator.endswith("1"):
+        counts = analysis.undetected_counts(generator, nbits)
+        print(f"[Analysis][{generator}] undetected_counts matches brute force: ", all(
+            counts[w][0] == sum(e.bit_count() == w for e in missed) for w in (2, 3, 4)))
+        print(f"[Analysis][{generator}] first_undetected matches brute force: ", all(
+            analysis.first_undetected(generator, w, nbits)
+            == min((e.bit_length() for e in missed if e.bit_count() == w), default=None) for w in (2, 3, 4, 5)))
+    print(f"[Analysis][{generator}] burst_coverage matches brute force: ", all(
+        analysis.burst_coverage(generator, nbits, b)["undetected"]
+        == sum(e.bit_length() - (e & -e).bit_length() + 1 == b for e in missed) for b in range(1, nbits + 1)))
+
+# metrics: the Prometheus text of a small registry, counters before gauges before histograms
+print()
+registry = metrics.Registry()
+registry.describe("frames_total", "Frames received.")
+registry.inc("frames_total", 3, result="ok")
+registry.inc("frames_total", result="corrupt")
+registry.inc("frames_total", 2, result="ok")
+registry.set("connections", 1)
+registry.observe("batch_frames", 2, buckets=(1, 2, 4))
+registry.observe("batch_frames", 3, count=2, buckets=(1, 2, 4))
+registry.observe("batch_frames", 9, buckets=(1, 2, 4))
+expected = """# HELP frames_total Frames received.
+# TYPE frames_total counter
+frames_total{result="corrupt"} 1
+frames_total{result="ok"} 5
+# TYPE connections gauge
+connections 1
+# TYPE batch_frames histogram
+batch_frames_bucket{le="1"} 0
+batch_frames_bucket{le="2"} 1
+batch_frames_bucket{le="4"} 3
+batch_frames_bucket{le="+Inf"} 4
+batch_frames_sum 17.0
+batch_frames_count 4
+"""
+print("[Metrics] render matches the exposition format: ", registry.render() == expected)
+print("[Metrics] value and total add up the label sets: ",
+      registry.value("frames_total", result="ok") == 5 and registry.total("frames_total") == 6)
+
+# protocol frames: payload() and check() cut the fields the sender put into the codeword
+print()
+layout = framing.FrameLayout(64)
+for method, polynomial in (("checksum", ""), ("crc", "CRC-10"), ("crc", "CRC-32"), ("fec", "SECDED")):
+    cut = True
+    for nbits in (layout.payload_bits(method, polynomial), 24, 3):
+        payload = rng.getrandbits(nbits).to_bytes((nbits + 7) // 8, 'big')
+        data, data_nbits = layout.frame(payload, nbits, layout.padding_bits(method, polynomial))
+        if method == "checksum":
+            codeword, total = checksum.generate_many([data])[0], data_nbits + checksum.bit_size
+        elif method == "crc":
+            codeword = crc.generate_crc_bytes(data, polynomial, data_nbits)
+            total = data_nbits + len(crc.polynomials[polynomial]) - 1
+        else:
+            codeword = fec.generate_many([data], polynomial, [data_nbits])[0]
+            total = fec.codeword_bits(polynomial, data_nbits)
+        frame = protocol.Frame(method, polynomial, 0, codeword, total)
+        value, width = frame.check(layout)
+        cut = (cut and frame.payload(layout) == (payload, nbits) and width == total - data_nbits
+               and int.from_bytes(codeword, 'big') >> width == int.from_bytes(data, 'big'))
+    name = f"{method} {polynomial}" if polynomial else method
+    print(f"[Protocol][{name}] Frame payload and check fields: ", cut)
+
+# CRC generator search: the best distance found is the best of every generator of the degree, by brute force
+print()
+for width, nbits in ((3, 10), (4, 12), (5, 12)):
+    distances = {}
+    for middle in range(1 << (width - 1)):
+        generator = (1 << width) | 1 | middle << 1
+        missed = [e for e in range(1, 1 << nbits) if polymod(e, generator) == 0]
+        hd = min(e.bit_count() for e in missed) if missed else 7
+        first = min((e.bit_length() for e in missed if e.bit_count() == hd), default=nbits + 1)
+        distances[generator] = (hd, first)
+    results = analysis.search(width, nbits, top=len(distances))
+    best = max(hd for hd, _ in distances.values())
+    print(f"[Analysis][search {width}] best distance matches brute force: ", results[0]["hd"] == best)
+    print(f"[Analysis][search {width}] distances match brute force: ", all(
+        (r["hd"], r["first"]) == distances[int(r["polynomial"], 2)] for r in results))
+    print(f"[Analysis][search {width}] one generator of every reciprocal pair: ",
+          results[0]["searched"] == len({min(g, int(format(g, 'b')[::-1], 2)) for g in distances}))
+
+# receiver pipeline (--workers): batches verified out of order are still counted and written in arrival order
+print()
+class ChunkReader:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def read(self, n):
+        await asyncio.sleep(0)
+        return self.chunks.pop(0) if self.chunks else b""
+
+layout = reciever.LAYOUT
+full = layout.payload_bits("crc", "CRC-32")
+nbits = 40*full + 24
+text = ''.join(rng.choice("01") for _ in range(nbits))
+stream = protocol.encode_start(layout.frame_bytes)
+for start in range(0, nbits, full):
+    payload = text[start:start + full]
+    data, data_nbits = layout.frame(bits.to_bytes(payload), len(payload))
+    codeword = crc.generate_crc_bytes(data, "CRC-32", data_nbits)
+    stream += protocol.encode("crc", "CRC-32", 0, codeword, data_nbits + 32, binary=True)
+stream += protocol.encode_end(41)
+cuts = sorted(rng.sample(range(1, len(stream)), 7))
+chunks = [stream[a:b] for a, b in zip([0] + cuts, cuts + [len(stream)])]
+verify_batch = reciever.verify_batch
+delays = iter([0.05, 0.04, 0.03, 0.02, 0.01, 0.0, 0.0, 0.0])
+def slow_verify(items):
+    time.sleep(next(delays))  # the first batches finish last
+    return verify_batch(items)
+with tempfile.TemporaryDirectory() as folder:
+    path = os.path.join(folder, "pipeline.txt")
+    reciever.OUTPUT = reassembly.OutputFile(path)
+    reciever.WORKERS = 4
+    reciever.verify_batch = slow_verify
+    counts = {"messages": 0, "correct": 0}
+    with ThreadPoolExecutor(4) as reciever.VERIFY_POOL:
+        asyncio.run(reciever.pipeline(ChunkReader(chunks), None, counts, arq.Receiver(), {}))
+    complete = reciever.OUTPUT.complete()
+    reciever.OUTPUT.close()
+    reciever.OUTPUT, reciever.VERIFY_POOL, reciever.WORKERS, reciever.verify_batch = None, None, 0, verify_batch
+    with open(path) as f:
+        same = f.read() == text
+print("[Receiver][pipeline] every frame counted and verified: ", counts == {"messages": 41, "correct": 41})
+print("[Receiver][pipeline] payloads written in arrival order: ", complete and same)
+
+# pacing: the writer flushes at flush_bytes, after flush_delay and at close, in bursts the token bucket allows
+print()
+class FakeSocket:
+    def __init__(self, most=None):
+        self.most = most
+        self.sent = []
+
+    def send(self, data):
+        n = len(data) if self.most is None else min(len(data), self.most)
+        self.sent.append(bytes(data[:n]))
+        return n
+
+messages = [bytes(rng.randrange(256) for _ in range(100)) for _ in range(25)]
+sock = FakeSocket(most=300)
+writer = pacing.Writer(sock, bytearray(1000), flush_bytes=1000, flush_delay=0)
+held = []
+for message in messages:
+    writer.write(message)
+    held.append(writer.pos)
+writer.close()
+print("[Pacing][Writer] flushes once flush_bytes are queued: ",
+      held[:10] == [100*i for i in range(1, 10)] + [0] and held[19] == 0 and held[-1] == 500)
+print("[Pacing][Writer] close sends the rest, in partial writes: ", b"".join(sock.sent) == b"".join(messages)
+      and writer.stats()["flushes"] == 3 and writer.syscalls == 4 + 4 + 2)
+sock = FakeSocket()
+writer = pacing.Writer(sock, bytearray(1000), flush_bytes=1000, flush_delay=0.01)
+writer.write(messages[0])
+time.sleep(0.02)
+writer.write(messages[1])
+print("[Pacing][Writer] flushes once the oldest message is flush_delay old: ", sock.sent == [messages[0] + messages[1]])
+bucket = pacing.TokenBucket(100000, 1000)
+slept = bucket.wait(1000) == 0 and 0.004 < bucket.wait(500) < 0.05
+sock = FakeSocket()
+writer = pacing.Writer(sock, bytearray(4000), flush_bytes=2500, flush_delay=0, bucket=bucket)
+for message in messages:
+    writer.write(message)
+writer.close()
+print("[Pacing][TokenBucket] a full bucket passes, then waits for its rate: ", slept)
+print("[Pacing][TokenBucket] flushes go out in bursts: ", max(map(len, sock.sent)) == 1000
+      and b"".join(sock.sent) == b"".join(messages) and bucket.waited > 0.005)
+sock = FakeSocket()
+writer = pacing.DatagramWriter(sock, bytearray(1000), messages=3, flush_delay=0)
+for message in messages:
+    writer.write(message)
+writer.close()
+print("[Pacing][DatagramWriter] datagrams of 3 messages, the last one short: ",
+      [len(d) for d in sock.sent] == [300]*8 + [100])
+
+# netem: datagrams are lost, duplicated and held back at the configured rates, within the configured delays
+print()
+channel = netem.Channel(loss=0.1, delay=0.01, jitter=0.005, reorder=0.3, reorder_delay=0.02, duplicate=0.2,
+                        rng=random.Random(7))
+fates = [channel.schedule(100.0) for _ in range(20000)]
+delivered = [times for times in fates if times]
+lost = len(fates) - len(delivered)
+twice = sum(len(times) == 2 for times in delivered)
+delays = [due - 100.0 for times in delivered for due in times]
+held = sum(delay > 0.015 + 1e-9 for delay in delays)
+within = lambda count, n, p: abs(count - n*p) < 5 * (n * p * (1 - p)) ** 0.5
+print("[Netem][Channel] loss rate within 5 sigma: ", within(lost, len(fates), 0.1))
+print("[Netem][Channel] duplicate rate within 5 sigma: ", within(twice, len(delivered), 0.2))
+print("[Netem][Channel] reorder rate within 5 sigma: ", within(held, len(delays), 0.3))
+print("[Netem][Channel] delays within delay +- jitter (+ reorder delay): ",
+      all(0.005 - 1e-9 <= delay <= 0.035 + 1e-9 for delay in delays))
+try:
+    netem.Channel(loss=1.5)
+    rejected = False
+except ValueError:
+    rejected = True
+print("[Netem][Channel] probabilities outside 0..1 rejected: ", rejected)